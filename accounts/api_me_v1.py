@@ -220,7 +220,7 @@ def _get_reviewable_merge_request(user, token: str) -> AccountMergeRequest:
 def current_profile_endpoint(request):
     """Return the authenticated user's profile summary."""
     profile = _get_profile_or_none(request.auth)
-    balance = points_services.get_detailed_balance_or_zero(request.auth)
+    balance = points_services.get_detailed_balance(request.auth)
     return {
         "user": {
             "id": request.auth.id,
@@ -261,7 +261,7 @@ def organization_detail_endpoint(request, slug: str):
     """Return organization details for a current member."""
     organization = _get_organization_or_404(slug)
     membership = _get_membership_or_error(request.auth, organization)
-    balance = points_services.get_detailed_balance_or_zero(organization)
+    balance = points_services.get_detailed_balance(organization)
     return {
         "organization": serialize_organization(organization, membership),
         "membership": serialize_membership(membership),
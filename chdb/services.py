@@ -693,7 +693,7 @@ def get_available_languages() -> list[str]:
         return []
 
 
-def _compute_outreach_date_range() -> tuple[int, int]:
+def compute_outreach_date_range() -> tuple[int, int]:
     """
     Compute start_month and end_month for the last 24 months.
 
@@ -709,44 +709,16 @@ def _compute_outreach_date_range() -> tuple[int, int]:
     return start_month, end_month
 
 
-def query_developers_for_outreach(
-    tag_ids: list[str],
-    languages: list[str] | None = None,
-    countries: list[str] | None = None,
-    regions: list[str] | None = None,
-    top_n: int | None = None,
-) -> list[dict]:
-    """
-    Query developers matching the given criteria for talent outreach.
-
-    Steps:
-        1. Expand tag_ids to get associated repos (via flatten_labels table)
-        2. (Optional) Filter repos by programming languages (via repo_info table)
-        3. Query contributors of these repos (using last 2 years of OpenRank data)
-        4. (Optional) Filter by countries/regions (if data available)
-        5. Sort by global OpenRank contribution score (descending, last 2 years cumulative)
-        6. (Optional) Apply top_n limit
-
-    Args:
-        tag_ids: List of label IDs to expand into repos.
-        languages: Optional list of programming languages to filter repos.
-        countries: Optional list of countries to filter developers.
-        regions: Optional list of regions to filter developers.
-        top_n: Optional limit on number of results returned.
-
-    Returns:
-        List of dicts with keys: platform, actor_id, actor_login, openrank_score.
-
-    """
-    if not tag_ids:
-        return []
-
-    normalized_ids = _normalize_label_ids(tag_ids)
-    if not normalized_ids:
-        return []
-
-    start_month, end_month = _compute_outreach_date_range()
-
+def _outreach_developers_sql(  # noqa: PLR0913
+    normalized_ids: list[str],
+    languages: list[str] | None,
+    countries: list[str] | None,
+    regions: list[str] | None,
+    top_n: int | None,
+    *,
+    keys_only: bool = False,
+) -> str:
+    """Build the outreach developer query; ``keys_only`` selects just the keys."""
     # Build repo subquery from flatten_labels
     tag_placeholders = ", ".join(
         f"'{tid.replace(chr(39), '')}'" for tid in normalized_ids
@@ -782,14 +754,21 @@ def query_developers_for_outreach(
             regions,
         )
 
-    limit_clause = f"LIMIT {int(top_n)}" if top_n and int(top_n) > 0 else ""
+    limited = bool(top_n and int(top_n) > 0)
+    if keys_only:
+        # Skip the login lookup; score only when top_n needs the ranking
+        columns = "platform, actor_id"
+        order_clause = "ORDER BY SUM(openrank) DESC" if limited else ""
+    else:
+        columns = (
+            "platform, actor_id, argMax(actor_login, created_at) AS login, "
+            "SUM(openrank) AS openrank_score"
+        )
+        order_clause = "ORDER BY openrank_score DESC"
+    limit_clause = f"LIMIT {int(top_n)}" if limited else ""
 
-    sql = f"""
-        SELECT
-            platform,
-            actor_id,
-            argMax(actor_login, created_at) AS login,
-            SUM(openrank) AS openrank_score
+    return f"""
+        SELECT {columns}
         FROM normalized_community_openrank
         WHERE (platform, repo_id) IN ({repo_subquery})
           {language_filter}
@@ -800,10 +779,50 @@ def query_developers_for_outreach(
               WHERE entity_type='User' AND id=':bot'
           )
         GROUP BY platform, actor_id
-        ORDER BY openrank_score DESC
+        {order_clause}
         {limit_clause}
     """  # noqa: S608
 
+
+def query_developers_for_outreach(
+    tag_ids: list[str],
+    languages: list[str] | None = None,
+    countries: list[str] | None = None,
+    regions: list[str] | None = None,
+    top_n: int | None = None,
+) -> list[dict]:
+    """
+    Query developers matching the given criteria for talent outreach.
+
+    Steps:
+        1. Expand tag_ids to get associated repos (via flatten_labels table)
+        2. (Optional) Filter repos by programming languages (via repo_info table)
+        3. Query contributors of these repos (using last 2 years of OpenRank data)
+        4. (Optional) Filter by countries/regions (if data available)
+        5. Sort by global OpenRank contribution score (descending, last 2 years cumulative)
+        6. (Optional) Apply top_n limit
+
+    Args:
+        tag_ids: List of label IDs to expand into repos.
+        languages: Optional list of programming languages to filter repos.
+        countries: Optional list of countries to filter developers.
+        regions: Optional list of regions to filter developers.
+        top_n: Optional limit on number of results returned.
+
+    Returns:
+        List of dicts with keys: platform, actor_id, actor_login, openrank_score.
+
+    """
+    if not tag_ids:
+        return []
+
+    normalized_ids = _normalize_label_ids(tag_ids)
+    if not normalized_ids:
+        return []
+
+    start_month, end_month = compute_outreach_date_range()
+    sql = _outreach_developers_sql(normalized_ids, languages, countries, regions, top_n)
+
     try:
         result = ClickHouseDB.query(
             sql,
@@ -832,3 +851,39 @@ def query_developers_for_outreach(
     except Exception as e:
         logger.error("Failed to query developers for outreach: %s", e)
         return []
+
+
+def query_outreach_developer_keys(
+    tag_ids: list[str],
+    languages: list[str] | None = None,
+    countries: list[str] | None = None,
+    regions: list[str] | None = None,
+    top_n: int | None = None,
+) -> list[tuple[str, str]]:
+    """
+    Return ``(platform, actor_id)`` for the developers an outreach would target.
+
+    Same filters as :func:`query_developers_for_outreach`, but without the
+    login lookup or (unless ``top_n`` ranks them) the score column; used to
+    count an audience without building the full developer list.
+    """
+    if not tag_ids:
+        return []
+
+    normalized_ids = _normalize_label_ids(tag_ids)
+    if not normalized_ids:
+        return []
+
+    start_month, end_month = compute_outreach_date_range()
+    sql = _outreach_developers_sql(
+        normalized_ids, languages, countries, regions, top_n, keys_only=True
+    )
+    try:
+        result = ClickHouseDB.query(
+            sql,
+            parameters={"start_month": start_month, "end_month": end_month},
+        )
+        return [(row[0] or "GitHub", str(row[1])) for row in _get_result_rows(result)]
+    except Exception as e:
+        logger.error("Failed to query outreach developer keys: %s", e)
+        return []
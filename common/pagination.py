@@ -0,0 +1,79 @@
+"""Paginator that avoids exact COUNT(*) on large, append-only tables."""
+
+import json
+import logging
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+# 规划器估算行数低于该值时执行精确 COUNT
+ESTIMATED_COUNT_THRESHOLD = 10_000
+
+
+def planner_estimate(queryset) -> int | None:
+    """
+    返回 PostgreSQL 规划器对 ``queryset`` 行数的估算, 其他数据库返回 None.
+
+    未筛选且未切片的整表查询读取 ``pg_class.reltuples``; 带条件或 LIMIT/OFFSET
+    的查询读取 EXPLAIN 的 Plan Rows.
+    表从未 ANALYZE 过或估算失败时返回 None, 由调用方退回精确计数.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    # 切片查询的 OFFSET 依赖排序, 保留 ORDER BY
+    query = queryset.query if queryset.query.is_sliced else queryset.order_by().query
+    try:
+        with connection.cursor() as cursor:
+            if not query.where and not query.distinct and not query.is_sliced:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                estimate = row[0] if row else None
+            else:
+                sql, params = query.sql_with_params()
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]["Plan"]["Plan Rows"]
+    except DatabaseError:
+        logger.warning("规划器行数估算失败, 退回精确计数", exc_info=True)
+        return None
+
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    大结果集使用规划器估算总数的分页器.
+
+    先执行以 ``threshold`` 为上限的 COUNT, 小结果集直接得到精确值, 不产生额外的
+    EXPLAIN 往返; 超出上限时才读取规划器估算 (``is_estimate`` 为 True),
+    估算偏小或无法估算 (如 SQLite) 时退回精确 COUNT.
+    """
+
+    threshold = ESTIMATED_COUNT_THRESHOLD
+    is_estimate = False
+
+    @cached_property
+    def count(self):
+        """Return the planner estimate for large querysets, else an exact count."""
+        if isinstance(self.object_list, QuerySet):
+            counted = self.object_list[: self.threshold + 1].count()
+            if counted <= self.threshold:
+                return counted
+            estimate = planner_estimate(self.object_list)
+            if estimate is not None and estimate > self.threshold:
+                self.is_estimate = True
+                return estimate
+        return super().count
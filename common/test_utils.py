@@ -66,18 +66,30 @@ class BrowserE2ETestCase(CacheClearMixin, StaticLiveServerTestCase):
         cls._previous_async_unsafe = os.environ.get("DJANGO_ALLOW_ASYNC_UNSAFE")
         os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
         cls._playwright = sync_playwright().start()
-        cls.browser = cls._playwright.chromium.launch(headless=True)
+        try:
+            cls.browser = cls._playwright.chromium.launch(headless=True)
+        except Exception:
+            # tearDownClass is skipped when setUpClass fails; without this the
+            # Playwright event loop stays on the thread and breaks later async tests
+            cls._playwright.stop()
+            cls._restore_async_unsafe()
+            super().tearDownClass()
+            raise
 
     @classmethod
     def tearDownClass(cls):
         """Close browser resources after the class finishes."""
         cls.browser.close()
         cls._playwright.stop()
+        cls._restore_async_unsafe()
+        super().tearDownClass()
+
+    @classmethod
+    def _restore_async_unsafe(cls):
         if cls._previous_async_unsafe is None:
             os.environ.pop("DJANGO_ALLOW_ASYNC_UNSAFE", None)
         else:
             os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = cls._previous_async_unsafe
-        super().tearDownClass()
 
     def setUp(self):
         """Create a fresh browser context and page for each test."""
@@ -0,0 +1,134 @@
+"""Tests for the estimated-count paginator."""
+
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError
+from django.test import TestCase
+
+from common.pagination import EstimatedCountPaginator, planner_estimate
+from config.api_common import (
+    build_paginated_response,
+    estimate_total,
+    paginate_queryset,
+)
+
+
+def _postgres_connections(*rows, error=None):
+    cursor = MagicMock()
+    cursor.fetchone.side_effect = rows
+    if error is not None:
+        cursor.execute.side_effect = error
+    connection = MagicMock(vendor="postgresql")
+    connection.cursor.return_value.__enter__.return_value = cursor
+    return {"default": connection}, cursor
+
+
+class PlannerEstimateTests(TestCase):
+    """Tests for planner_estimate."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.users = get_user_model().objects.all()
+
+    def test_sqlite_has_no_estimate(self):
+        """Non-PostgreSQL backends fall back to exact counts."""
+        self.assertIsNone(planner_estimate(self.users))
+
+    def test_unfiltered_queryset_reads_reltuples(self):
+        """Whole-table querysets use pg_class.reltuples."""
+        fake, cursor = _postgres_connections((120_000,))
+        with patch("common.pagination.connections", fake):
+            self.assertEqual(planner_estimate(self.users), 120_000)
+        self.assertIn("reltuples", cursor.execute.call_args.args[0])
+
+    def test_filtered_queryset_reads_explain_rows(self):
+        """Filtered querysets use the EXPLAIN row estimate."""
+        fake, cursor = _postgres_connections(('[{"Plan": {"Plan Rows": 4321}}]',))
+        with patch("common.pagination.connections", fake):
+            estimate = planner_estimate(self.users.filter(is_active=True))
+        self.assertEqual(estimate, 4321)
+        self.assertTrue(cursor.execute.call_args.args[0].startswith("EXPLAIN"))
+
+    def test_sliced_queryset_reads_explain_rows(self):
+        """LIMIT/OFFSET is honoured by using EXPLAIN instead of reltuples."""
+        fake, cursor = _postgres_connections(('[{"Plan": {"Plan Rows": 20}}]',))
+        with patch("common.pagination.connections", fake):
+            self.assertEqual(planner_estimate(self.users[:20]), 20)
+        self.assertTrue(cursor.execute.call_args.args[0].startswith("EXPLAIN"))
+
+    def test_unanalyzed_table_and_errors_return_none(self):
+        """Negative reltuples and database errors yield no estimate."""
+        fake, _ = _postgres_connections((-1,))
+        with patch("common.pagination.connections", fake):
+            self.assertIsNone(planner_estimate(self.users))
+
+        fake, _ = _postgres_connections(error=DatabaseError("boom"))
+        with patch("common.pagination.connections", fake):
+            self.assertIsNone(planner_estimate(self.users))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    """Tests for EstimatedCountPaginator and its API wiring."""
+
+    def setUp(self):
+        """Create a handful of users."""
+        User = get_user_model()
+        for index in range(3):
+            User.objects.create_user(username=f"page{index}", password="pass")
+        self.users = User.objects.order_by("id")
+
+    def test_small_results_skip_planner_estimate(self):
+        """Results within the threshold are counted exactly, without EXPLAIN."""
+        with patch("common.pagination.planner_estimate") as estimate:
+            paginator = EstimatedCountPaginator(self.users, 2)
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 3)
+        estimate.assert_not_called()
+        self.assertFalse(paginator.is_estimate)
+
+    def test_large_results_use_estimate(self):
+        """Results past the capped count report the planner estimate."""
+        with (
+            patch.object(EstimatedCountPaginator, "threshold", 2),
+            patch("common.pagination.planner_estimate", return_value=50_000),
+        ):
+            paginator = EstimatedCountPaginator(self.users, 20)
+            with self.assertNumQueries(1):
+                self.assertEqual(paginator.count, 50_000)
+        self.assertTrue(paginator.is_estimate)
+        self.assertEqual(paginator.num_pages, 2500)
+
+    def test_stale_estimate_falls_back_to_exact_count(self):
+        """An estimate below the capped count is ignored."""
+        with (
+            patch.object(EstimatedCountPaginator, "threshold", 2),
+            patch("common.pagination.planner_estimate", return_value=1),
+        ):
+            paginator = EstimatedCountPaginator(self.users, 2)
+            self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.is_estimate)
+
+    def test_lists_are_counted_directly(self):
+        """Plain sequences keep the default behaviour."""
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
+
+    def test_api_response_flags_estimates(self):
+        """Paged API responses report whether the total is estimated."""
+        with (
+            patch.object(EstimatedCountPaginator, "threshold", 2),
+            patch("common.pagination.planner_estimate", return_value=80_000),
+        ):
+            page = paginate_queryset(self.users, page=1, page_size=2)
+            payload = build_paginated_response(page, [])
+        self.assertEqual(payload["pagination"]["total_items"], 80_000)
+        self.assertTrue(payload["pagination"]["total_is_estimate"])
+
+        exact = build_paginated_response(paginate_queryset(self.users), [])
+        self.assertFalse(exact["pagination"]["total_is_estimate"])
+
+    def test_cursor_estimate_prefers_planner_rows(self):
+        """Capped cursor totals use the planner estimate when available."""
+        with patch("config.api_common.planner_estimate", return_value=90_000):
+            self.assertEqual(estimate_total(self.users, cap=2), (90_000, True))
+        self.assertEqual(estimate_total(self.users, cap=2), (2, True))
@@ -63,6 +63,35 @@ class BrowserE2ETestCaseTests(SimpleTestCase):
             else:
                 os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = previous_value
 
+    @patch.object(StaticLiveServerTestCase, "tearDownClass")
+    @patch.object(StaticLiveServerTestCase, "setUpClass")
+    @patch("common.test_utils.sync_playwright")
+    def test_failed_browser_launch_stops_playwright_and_restores_env(
+        self,
+        mock_sync_playwright,
+        mock_parent_setup,
+        mock_parent_teardown,
+    ):
+        """A failed launch releases Playwright since tearDownClass never runs."""
+        playwright = Mock()
+        playwright.chromium.launch.side_effect = RuntimeError("no browser")
+        mock_sync_playwright.return_value.start.return_value = playwright
+
+        previous_value = os.environ.get("DJANGO_ALLOW_ASYNC_UNSAFE")
+        os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "preserve-me"
+        try:
+            with self.assertRaises(RuntimeError):
+                DummyBrowserCase.setUpClass()
+
+            playwright.stop.assert_called_once()
+            self.assertEqual(os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"], "preserve-me")
+            mock_parent_teardown.assert_called_once()
+        finally:
+            if previous_value is None:
+                os.environ.pop("DJANGO_ALLOW_ASYNC_UNSAFE", None)
+            else:
+                os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = previous_value
+
     @patch("common.test_utils.CacheClearMixin.tearDown")
     @patch("common.test_utils.CacheClearMixin.setUp")
     def test_setup_and_teardown_manage_context_lifecycle(
@@ -2,14 +2,28 @@
 
 from __future__ import annotations
 
+import base64
+import binascii
+import datetime
+import json
+import operator
 import re
 from dataclasses import dataclass
+from functools import reduce
 from typing import Any
 
-from django.core.paginator import Paginator
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 from django.utils import translation
 from ninja import Schema
 
+from common.pagination import EstimatedCountPaginator, planner_estimate
+
+# 游标分页默认排序键, 需能唯一确定行顺序
+CURSOR_ORDERING = ("-created_at", "-id")
+# 估算总数时最多计数的行数, 超出即返回上限并标记为估算值
+ESTIMATED_TOTAL_CAP = 10_000
+
 
 class ErrorResponseSchema(Schema):
     """Standardized error payload."""
@@ -28,6 +42,18 @@ class PaginationSchema(Schema):
     total_pages: int
     has_next: bool
     has_previous: bool
+    total_is_estimate: bool = False
+
+
+class CursorPaginationSchema(Schema):
+    """Cursor (keyset) pagination metadata."""
+
+    mode: str
+    page_size: int
+    next_cursor: str | None = None
+    has_next: bool
+    total_items: int | None = None
+    total_is_estimate: bool = False
 
 
 @dataclass(slots=True)
@@ -159,22 +185,201 @@ def translate_error_detail(detail: Any) -> Any:
     return detail
 
 
-def paginate_queryset(
+@dataclass(slots=True)
+class CursorPage:
+    """A single keyset page, shaped like a Django page for list endpoints."""
+
+    object_list: list[Any]
+    page_size: int
+    next_cursor: str | None = None
+    total_items: int | None = None
+    total_is_estimate: bool = False
+
+    def __iter__(self):
+        """Iterate over the page rows."""
+        return iter(self.object_list)
+
+    def has_next(self) -> bool:
+        """Return whether another page follows."""
+        return self.next_cursor is not None
+
+
+def _invalid_cursor_error() -> ApiError:
+    return ApiError(
+        "validation_error",
+        422,
+        "Request validation failed.",
+        {"cursor": [{"message": "The cursor is invalid.", "code": "invalid"}]},
+    )
+
+
+def _cursor_json_default(value):
+    # 保留完整微秒精度, 避免键集比较时跳过或重复行
+    if isinstance(value, datetime.date | datetime.time):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Encode ordering values into an opaque URL-safe cursor."""
+    payload = json.dumps(values, default=_cursor_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: int) -> list[Any]:
+    """Decode an opaque cursor, raising a 422 ApiError when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error) as exc:
+        raise _invalid_cursor_error() from exc
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise _invalid_cursor_error()
+    return values
+
+
+def _cursor_field(model, field_path: str):
+    *relations, name = field_path.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+
+def _parse_cursor_values(
+    model, ordering: tuple[str, ...], values: list[Any]
+) -> list[Any]:
+    """Convert decoded cursor values to their ordering fields' types, or raise 422."""
+    parsed = []
+    for field_path, raw in zip(ordering, values, strict=True):
+        if raw is None or isinstance(raw, dict | list):
+            raise _invalid_cursor_error()
+        field = _cursor_field(model, field_path.lstrip("-"))
+        try:
+            value = field.to_python(raw)
+            field.run_validators(value)
+        except (ValidationError, TypeError, ValueError) as exc:
+            raise _invalid_cursor_error() from exc
+        parsed.append(value)
+    return parsed
+
+
+def _keyset_filter(ordering: tuple[str, ...], values: list[Any]) -> Q:
+    clauses = []
+    for index, field in enumerate(ordering):
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{field.lstrip('-')}__{lookup}": values[index]})
+        for previous_field, previous_value in zip(
+            ordering[:index], values[:index], strict=True
+        ):
+            clause &= Q(**{previous_field.lstrip("-"): previous_value})
+        clauses.append(clause)
+    return reduce(operator.or_, clauses)
+
+
+def _cursor_values(obj, ordering: tuple[str, ...]) -> list[Any]:
+    values = []
+    for field in ordering:
+        value = obj
+        for part in field.lstrip("-").split("__"):
+            value = getattr(value, part)
+        values.append(value)
+    return values
+
+
+def estimate_total(queryset, cap: int = ESTIMATED_TOTAL_CAP) -> tuple[int, bool]:
+    """
+    Count at most ``cap`` rows; return ``(total, is_estimate)``.
+
+    超出上限时优先返回规划器估算值, 无法估算时返回上限.
+    """
+    counted = queryset.order_by()[: cap + 1].count()
+    if counted > cap:
+        return max(planner_estimate(queryset) or 0, cap), True
+    return counted, False
+
+
+def paginate_queryset_by_cursor(  # noqa: PLR0913
+    queryset,
+    cursor: str = "",
+    page_size: int = 20,
+    *,
+    max_page_size: int = 100,
+    ordering: tuple[str, ...] = CURSOR_ORDERING,
+    include_total: bool = False,
+) -> CursorPage:
+    """Return a keyset page; an empty cursor starts from the first row."""
+    safe_page_size = min(max(page_size or 20, 1), max_page_size)
+    ordering = tuple(ordering)
+    page_queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = _parse_cursor_values(
+            queryset.model, ordering, decode_cursor(cursor, len(ordering))
+        )
+        page_queryset = page_queryset.filter(_keyset_filter(ordering, values))
+
+    rows = list(page_queryset[: safe_page_size + 1])
+    next_cursor = None
+    if len(rows) > safe_page_size:
+        rows = rows[:safe_page_size]
+        next_cursor = encode_cursor(_cursor_values(rows[-1], ordering))
+
+    total_items, total_is_estimate = None, False
+    if include_total:
+        total_items, total_is_estimate = estimate_total(queryset)
+    return CursorPage(
+        object_list=rows,
+        page_size=safe_page_size,
+        next_cursor=next_cursor,
+        total_items=total_items,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+def paginate_queryset(  # noqa: PLR0913
     queryset,
     page: int = 1,
     page_size: int = 20,
     *,
     max_page_size: int = 100,
+    cursor: str | None = None,
+    cursor_ordering: tuple[str, ...] = CURSOR_ORDERING,
+    include_total: bool = False,
 ):
-    """Return a Django page object with bounded pagination settings."""
+    """
+    Return a bounded page of ``queryset``.
+
+    ``cursor`` 为 None 时沿用页码分页 (COUNT + OFFSET, 大结果集用规划器估算总数);
+    传入字符串 (首页为空串) 时切换为键集分页, 返回 CursorPage.
+    """
+    if cursor is not None:
+        return paginate_queryset_by_cursor(
+            queryset,
+            cursor,
+            page_size,
+            max_page_size=max_page_size,
+            ordering=cursor_ordering,
+            include_total=include_total,
+        )
     safe_page = max(page or 1, 1)
     safe_page_size = min(max(page_size or 20, 1), max_page_size)
-    paginator = Paginator(queryset, safe_page_size)
+    paginator = EstimatedCountPaginator(queryset, safe_page_size)
     return paginator.get_page(safe_page)
 
 
 def build_paginated_response(page_obj, items: list[Any]) -> dict[str, Any]:
     """Return a consistent list response shape."""
+    if isinstance(page_obj, CursorPage):
+        return {
+            "items": items,
+            "pagination": {
+                "mode": "cursor",
+                "page_size": page_obj.page_size,
+                "next_cursor": page_obj.next_cursor,
+                "has_next": page_obj.has_next(),
+                "total_items": page_obj.total_items,
+                "total_is_estimate": page_obj.total_is_estimate,
+            },
+        }
     return {
         "items": items,
         "pagination": {
@@ -184,5 +389,6 @@ def build_paginated_response(page_obj, items: list[Any]) -> dict[str, Any]:
             "total_pages": page_obj.paginator.num_pages,
             "has_next": page_obj.has_next(),
             "has_previous": page_obj.has_previous(),
+            "total_is_estimate": getattr(page_obj.paginator, "is_estimate", False),
         },
     }
@@ -100,6 +100,7 @@ env = environ.Env(
     OUTREACH_COST_PER_USER=(int, 5),
     OUTREACH_REWARD_RATIO=(float, 0.5),
     OUTREACH_REWARD_EXPIRY_DAYS=(int, 30),
+    POINTS_WALLET_ID_CACHE_SIZE=(int, 10000),
 )
 
 TESTING = "test" in sys.argv or "PYTEST_VERSION" in os.environ
@@ -158,6 +159,10 @@ OUTREACH_COST_PER_USER = env("OUTREACH_COST_PER_USER")
 OUTREACH_REWARD_RATIO = env("OUTREACH_REWARD_RATIO")
 OUTREACH_REWARD_EXPIRY_DAYS = env("OUTREACH_REWARD_EXPIRY_DAYS")
 
+# 进程内缓存的 (所有者 → 钱包 id) 条目上限, 0 表示只在单个请求内缓存。
+# 测试会回滚数据库而不触发删除信号, 因此测试中关闭进程级缓存。
+POINTS_WALLET_ID_CACHE_SIZE = 0 if TESTING else env("POINTS_WALLET_ID_CACHE_SIZE")
+
 INSTALLED_APPS = [
     # Use the GitHub OAuth-backed admin site instead of the stock one.
     "config.apps.GitHubAdminConfig",
@@ -209,6 +214,7 @@ _BASE_MIDDLEWARE = [
     "social_django.middleware.SocialAuthExceptionMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.contrib.redirects.middleware.RedirectFallbackMiddleware",
+    "points.middleware.WalletIdCacheMiddleware",
 ]
 
 if REDIS_URL:
@@ -458,7 +464,16 @@ SERVER_EMAIL = "server@openshare.cn"
 
 
 # tasks
-TASKS = {"default": {"BACKEND": "django_tasks.backends.database.DatabaseBackend"}}
+if TESTING:
+    # 测试中同步执行任务, 不等待事务提交
+    TASKS = {
+        "default": {
+            "BACKEND": "django_tasks.backends.immediate.ImmediateBackend",
+            "ENQUEUE_ON_COMMIT": False,
+        }
+    }
+else:
+    TASKS = {"default": {"BACKEND": "django_tasks.backends.database.DatabaseBackend"}}
 
 # APScheduler Configuration
 APSCHEDULER_DATETIME_FORMAT = "N j, Y, f:s a"
@@ -0,0 +1,122 @@
+"""Tests for shared API pagination helpers."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from config.api_common import (
+    ApiError,
+    CursorPage,
+    build_paginated_response,
+    decode_cursor,
+    encode_cursor,
+    estimate_total,
+    paginate_queryset,
+)
+
+
+class CursorPaginationTests(TestCase):
+    """Keyset pagination over (date_joined, id)."""
+
+    ordering = ("-date_joined", "-id")
+
+    def setUp(self):
+        """Create users sharing timestamps to exercise the id tie-breaker."""
+        User = get_user_model()
+        base = timezone.now().replace(microsecond=123456)
+        for index in range(5):
+            User.objects.create_user(
+                username=f"cursor_user_{index}",
+                password="pass",
+                date_joined=base - timedelta(seconds=index // 2),
+            )
+        self.queryset = User.objects.filter(username__startswith="cursor_user_")
+
+    def _walk(self, page_size):
+        seen = []
+        cursor = ""
+        while True:
+            page = paginate_queryset(
+                self.queryset,
+                page_size=page_size,
+                cursor=cursor,
+                cursor_ordering=self.ordering,
+            )
+            seen.extend(user.username for user in page)
+            if not page.has_next():
+                return seen
+            cursor = page.next_cursor
+
+    def test_cursor_walk_returns_every_row_once_in_order(self):
+        """Walking all cursor pages matches the ordered queryset."""
+        expected = list(
+            self.queryset.order_by(*self.ordering).values_list("username", flat=True)
+        )
+        for page_size in (1, 2, 5, 10):
+            self.assertEqual(self._walk(page_size), expected)
+
+    def test_cursor_response_shape(self):
+        """Cursor pages expose next_cursor and an optional estimated total."""
+        page = paginate_queryset(
+            self.queryset,
+            page_size=2,
+            cursor="",
+            cursor_ordering=self.ordering,
+            include_total=True,
+        )
+        payload = build_paginated_response(page, ["a", "b"])
+
+        self.assertIsInstance(page, CursorPage)
+        self.assertEqual(payload["pagination"]["mode"], "cursor")
+        self.assertEqual(payload["pagination"]["page_size"], 2)
+        self.assertTrue(payload["pagination"]["has_next"])
+        self.assertEqual(payload["pagination"]["total_items"], 5)
+        self.assertFalse(payload["pagination"]["total_is_estimate"])
+
+    def test_page_mode_is_default(self):
+        """Without a cursor the page-number paginator is used."""
+        page = paginate_queryset(self.queryset.order_by("id"), page=2, page_size=2)
+        payload = build_paginated_response(page, [])
+
+        self.assertEqual(payload["pagination"]["page"], 2)
+        self.assertEqual(payload["pagination"]["total_items"], 5)
+
+    def test_estimate_total_caps_count(self):
+        """Counts beyond the cap are reported as estimates."""
+        self.assertEqual(estimate_total(self.queryset, cap=3), (3, True))
+        self.assertEqual(estimate_total(self.queryset, cap=10), (5, False))
+
+    def test_invalid_cursor_raises_validation_error(self):
+        """Malformed or mismatched cursors raise a 422 ApiError."""
+        for cursor in ("not-base64!", encode_cursor(["only-one"])):
+            with self.assertRaises(ApiError) as ctx:
+                decode_cursor(cursor, 2)
+            self.assertEqual(ctx.exception.status_code, 422)
+
+    def test_tampered_cursor_values_raise_validation_error(self):
+        """Well-encoded cursors with values of the wrong type are rejected."""
+        joined = timezone.now().isoformat()
+        for values in (
+            ["x", "y"],
+            [None, 1],
+            [{}, 1],
+            [joined, []],
+            [joined, "not-an-id"],
+            [joined, 10**30],
+        ):
+            with self.subTest(values=values), self.assertRaises(ApiError) as ctx:
+                paginate_queryset(
+                    self.queryset,
+                    cursor=encode_cursor(values),
+                    cursor_ordering=self.ordering,
+                )
+            self.assertEqual(ctx.exception.status_code, 422)
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        """Datetimes keep full precision inside the cursor."""
+        value = timezone.now().replace(microsecond=654321)
+        decoded = decode_cursor(encode_cursor([value, Decimal("1.5")]), 2)
+        self.assertEqual(decoded, [value.isoformat(), "1.5"])
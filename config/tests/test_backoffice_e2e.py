@@ -7,6 +7,7 @@ from django.urls import reverse
 from accounts.models import Organization
 from common.test_utils import BrowserE2ETestCase
 from messages.models import UserMessage
+from messages.services import sync_broadcasts
 from points import services as points_services
 from points.models import PointType, Tag
 
@@ -110,6 +111,8 @@ class BackOfficeE2ETests(BrowserE2ETestCase):
         self.page.check("#id_is_broadcast")
         self.page.locator("input[name='_save']").click()
         self.page.wait_for_load_state("networkidle")
+        for user in (user_one, user_two, admin):
+            sync_broadcasts(user)
 
         self.assertTrue(
             UserMessage.objects.filter(
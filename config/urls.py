@@ -25,10 +25,13 @@ from django.urls import include, path
 # Importing this module ensures any future site-level admin tweaks load.
 from config import admin as _admin_config  # noqa: F401
 from config.api_v1 import api_v1
+from messages.views import message_events_view
 
 urlpatterns = [
     path("admin/doc/", include("django.contrib.admindocs.urls")),
     path("admin/", admin.site.urls),
+    # SSE 长连接不经过 Ninja, 需由 ASGI 服务
+    path("api/v1/messages/events", message_events_view, name="message-events"),
     path("api/v1/", api_v1.urls),
     # OAuth callbacks dispatched by social-django (used by the SPA login flow).
     path("", include("social_django.urls", namespace="social")),
@@ -22,7 +22,10 @@ if [ "${IS_WORKER:-0}" = "1" ]; then
     exec python manage.py db_worker
 else
     echo "Starting as web server on port ${PORT:-8000}..."
-    exec gunicorn config.wsgi:application \
+    # ASGI via uvicorn workers so the SSE message stream is not buffered;
+    # with async workers --timeout is a heartbeat, not a per-request limit.
+    exec gunicorn config.asgi:application \
+        --worker-class uvicorn_worker.UvicornWorker \
         --bind 0.0.0.0:"${PORT:-8000}" \
         --workers "${GUNICORN_WORKERS:-1}" \
         --timeout "${GUNICORN_TIMEOUT:-120}" \
@@ -18,6 +18,7 @@ from accounts.api_serializers import (
 from accounts.api_v1 import jwt_bearer_auth
 from config.api_common import (
     ApiError,
+    CursorPaginationSchema,
     ErrorResponseSchema,
     PaginationSchema,
     build_paginated_response,
@@ -72,7 +73,7 @@ class PublicUserSearchResponseSchema(Schema):
     """Paginated public user search response."""
 
     items: list[PublicUserSearchItemSchema]
-    pagination: PaginationSchema
+    pagination: PaginationSchema | CursorPaginationSchema
     query: str
     filters: dict[str, str]
     total_matches: int
@@ -142,6 +143,7 @@ def public_user_search_endpoint(
     sort: str = SearchFilters.DEFAULT_SORT,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
 ):
     """Search public user profiles."""
     query = q.strip()
@@ -178,10 +180,22 @@ def public_user_search_endpoint(
     available_companies = _collect_available_values(users_qs, "company")
 
     total_matches = users_qs.count()
-    limited_queryset = users_qs[:MAX_SEARCH_RESULTS]
-    page_obj = paginate_queryset(
-        limited_queryset, page=page, page_size=page_size, max_page_size=50
-    )
+    if cursor is not None:
+        # 键集分页无 OFFSET 成本, 深翻页无需 MAX_SEARCH_RESULTS 截断
+        page_obj = paginate_queryset(
+            users_qs,
+            page_size=page_size,
+            max_page_size=50,
+            cursor=cursor,
+            cursor_ordering=(*filters.ordering(), "id"),
+        )
+    else:
+        page_obj = paginate_queryset(
+            users_qs[:MAX_SEARCH_RESULTS],
+            page=page,
+            page_size=page_size,
+            max_page_size=50,
+        )
     response = build_paginated_response(
         page_obj, [_serialize_user(user) for user in page_obj]
     )
@@ -6,8 +6,10 @@ from django.contrib.auth import get_user_model
 from django.db.models import Count, Q
 from django.utils.html import format_html
 
-from .models import Message, UserMessage
-from .services import send_message
+from common.pagination import EstimatedCountPaginator
+
+from .models import ArchivedUserMessage, Message, UserMessage
+from .services import reconcile_inbox_counters, send_message
 
 User = get_user_model()
 
@@ -157,10 +159,13 @@ class MessageAdmin(admin.ModelAdmin):
     @admin.display(description="接收人数", ordering="_recipient_count")
     def recipient_count(self, obj):
         """显示接收人数."""
-        count = getattr(obj, "_recipient_count", obj.get_recipient_count())
         if obj.is_broadcast:
-            return format_html('<span class="badge bg-primary">{} (广播)</span>', count)
-        return count
+            # 广播在读取时才并入收件箱, 注解值只反映已同步的人数
+            return format_html(
+                '<span class="badge bg-primary">{} (广播)</span>',
+                obj.get_recipient_count(),
+            )
+        return getattr(obj, "_recipient_count", obj.get_recipient_count())
 
     @admin.display(description="未读数量", ordering="_unread_count")
     def unread_count(self, obj):
@@ -204,6 +209,9 @@ class MessageAdmin(admin.ModelAdmin):
 class UserMessageAdmin(admin.ModelAdmin):
     """用户消息管理."""
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     list_display = [
         "user",
         "message_title",
@@ -290,9 +298,17 @@ class UserMessageAdmin(admin.ModelAdmin):
     @admin.action(description="恢复删除")
     def restore(self, request, queryset):
         """批量恢复已删除的消息."""
-        count = queryset.filter(is_deleted=True).update(is_deleted=False)
+        restored = queryset.filter(is_deleted=True)
+        user_ids = set(restored.values_list("user_id", flat=True))
+        count = restored.update(is_deleted=False)
+        reconcile_inbox_counters(user_ids)
         self.message_user(request, f"成功恢复 {count} 条消息")
 
+    def save_model(self, request, obj, form, change):
+        """保存状态后校准该用户的收件箱计数."""
+        super().save_model(request, obj, form, change)
+        reconcile_inbox_counters([obj.user_id])
+
     def has_add_permission(self, request):
         """不允许直接添加用户消息."""
         return False
@@ -300,3 +316,25 @@ class UserMessageAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """仅允许修改状态字段."""
         return True
+
+
+@admin.register(ArchivedUserMessage)
+class ArchivedUserMessageAdmin(admin.ModelAdmin):
+    """归档用户消息 (只读)."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    list_display = ["id", "user", "message", "is_read", "is_deleted", "created_at"]
+    list_filter = ["is_deleted", "message__message_type", "archived_at"]
+    search_fields = ["user__username", "message__title"]
+    list_select_related = ["user", "message"]
+    ordering = ["-archived_at"]
+
+    def has_add_permission(self, request):
+        """禁止新增, 归档由定时任务写入."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """禁止修改."""
+        return False
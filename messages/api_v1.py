@@ -5,27 +5,32 @@ from __future__ import annotations
 
 from typing import Any
 
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 from ninja import Router, Schema
 
 from accounts.api_v1 import jwt_bearer_auth
 from config.api_common import (
     ApiError,
+    CursorPaginationSchema,
     ErrorResponseSchema,
     PaginationSchema,
     build_paginated_response,
     paginate_queryset,
 )
 
+from .events import STREAM_TICKET_MAX_AGE_SECONDS, inbox_events, issue_stream_ticket
 from .models import Message, UserMessage
 from .services import (
     delete_messages,
+    get_message_history,
     get_message_stats,
     get_unread_count,
     get_user_messages,
     mark_all_as_read,
     mark_as_read,
     mark_as_unread,
+    sync_broadcasts,
 )
 
 router = Router(tags=["messages"], auth=jwt_bearer_auth)
@@ -73,11 +78,21 @@ class MessageStatsSchema(Schema):
 
 class MessageListResponseSchema(Schema):
     items: list[MessageItemSchema]
-    pagination: PaginationSchema
+    pagination: PaginationSchema | CursorPaginationSchema
     stats: MessageStatsSchema
     filters: dict[str, str | None]
 
 
+class MessageHistoryResponseSchema(Schema):
+    items: list[MessageItemSchema]
+    pagination: PaginationSchema | CursorPaginationSchema
+
+
+class StreamTicketSchema(Schema):
+    ticket: str
+    expires_in: int
+
+
 class CountResponseSchema(Schema):
     count: int
 
@@ -165,12 +180,14 @@ def _serialize_message_detail(user_message: UserMessage) -> MessageDetailSchema:
         422: ErrorResponseSchema,
     },
 )
-def message_list_endpoint(
+def message_list_endpoint(  # noqa: PLR0913
     request,
     message_type: str | None = None,
     status: str = "all",
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
 ):
     """List inbox messages for the current user."""
     _validate_message_type(message_type)
@@ -189,7 +206,12 @@ def message_list_endpoint(
         messages_qs = messages_qs.filter(is_read=True)
 
     page_obj = paginate_queryset(
-        messages_qs, page=page, page_size=page_size, max_page_size=100
+        messages_qs,
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     items = [_serialize_message_item(item) for item in page_obj.object_list]
 
@@ -228,6 +250,34 @@ def message_list_endpoint(
     return response
 
 
+@router.get(
+    "/history",
+    response={
+        200: MessageHistoryResponseSchema,
+        401: ErrorResponseSchema,
+        422: ErrorResponseSchema,
+    },
+)
+def message_history_endpoint(
+    request,
+    message_type: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+):
+    """List archived (older read) messages for the current user."""
+    _validate_message_type(message_type)
+    page_obj = paginate_queryset(
+        get_message_history(request.auth, message_type=message_type),
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+    )
+    items = [_serialize_message_item(item) for item in page_obj.object_list]
+    return build_paginated_response(page_obj, items)
+
+
 @router.get(
     "/stats",
     response={200: MessageStatsSchema, 401: ErrorResponseSchema},
@@ -237,6 +287,29 @@ def message_stats_endpoint(request):
     return get_message_stats(request.auth)
 
 
+@router.post(
+    "/events/ticket",
+    response={200: StreamTicketSchema, 401: ErrorResponseSchema},
+)
+def message_events_ticket_endpoint(request):
+    """Issue a short-lived ticket for opening the event stream via EventSource."""
+    return {
+        "ticket": issue_stream_ticket(request.auth),
+        "expires_in": STREAM_TICKET_MAX_AGE_SECONDS,
+    }
+
+
+@router.get(
+    "/events/metrics",
+    response={200: dict, 401: ErrorResponseSchema, 403: ErrorResponseSchema},
+)
+def message_events_metrics_endpoint(request):
+    """Return live-event connection and heartbeat counts for this process."""
+    if not request.auth.is_staff:
+        raise PermissionDenied
+    return inbox_events.metrics()
+
+
 @router.get(
     "/unread-count",
     response={
@@ -270,16 +343,9 @@ def message_mark_read_endpoint(request, payload: MessageActionSchema):
     count = mark_as_read(request.auth, payload.message_ids)
 
     # Check for outreach reading rewards
-    from talent_reach.services import claim_reading_reward
+    from talent_reach.services import claim_reading_rewards
 
-    rewards = []
-    user_messages = UserMessage.objects.filter(
-        user=request.auth, message_id__in=payload.message_ids
-    )
-    for um in user_messages:
-        reward_result = claim_reading_reward(user=request.auth, user_message_id=um.id)
-        if reward_result:
-            rewards.append(reward_result)
+    rewards = claim_reading_rewards(request.auth, payload.message_ids)
 
     response: dict = {"updated": count}
     if rewards:
@@ -346,6 +412,7 @@ def message_delete_endpoint(request, payload: MessageActionSchema):
 )
 def message_detail_endpoint(request, message_id: int):
     """Return a single inbox message without mutating read state."""
+    sync_broadcasts(request.auth)
     user_message = get_object_or_404(
         UserMessage.objects.select_related("message", "message__sender"),
         message_id=message_id,
@@ -367,12 +434,10 @@ def message_detail_mark_read_endpoint(request, message_id: int):
     updated = mark_as_read(request.auth, [message_id])
 
     # Check for outreach reading reward
-    from talent_reach.services import claim_reading_reward
+    from talent_reach.services import claim_reading_rewards
 
-    reward = None
-    um = UserMessage.objects.filter(user=request.auth, message_id=message_id).first()
-    if um:
-        reward = claim_reading_reward(user=request.auth, user_message_id=um.id)
+    rewards = claim_reading_rewards(request.auth, [message_id])
+    reward = rewards[0] if rewards else None
 
     response: dict = {"updated": updated}
     if reward:
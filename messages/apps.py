@@ -10,3 +10,8 @@ class SiteMessagesConfig(AppConfig):
     name = "messages"
     label = "site_messages"
     verbose_name = "站内信"
+
+    def ready(self):
+        """Import signal handlers when app is ready."""
+        super().ready()
+        import messages.signals  # noqa: F401
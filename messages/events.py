@@ -0,0 +1,204 @@
+"""收件箱实时事件: 通过 Redis pub/sub (或进程内回落) 推送给 SSE 连接."""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import redis
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+INBOX_EVENTS_CHANNEL = "messages:inbox-events"
+# Redis 订阅线程断线后的重连间隔 (秒)
+LISTENER_RETRY_SECONDS = 5
+# 单个连接积压的事件上限, 超出后丢弃 (客户端重连时会重新拿到未读数)
+SUBSCRIPTION_QUEUE_SIZE = 100
+# SSE 连接票据: 仅用于建立事件流, 不能作为 API 凭证使用;
+# 有效期需大于心跳间隔与重连等待之和, 见 messages.views
+STREAM_TICKET_SALT = "messages.events.stream-ticket"
+STREAM_TICKET_MAX_AGE_SECONDS = 60
+
+
+@dataclass(eq=False, slots=True)
+class Subscription:
+    """一个 SSE 连接在本进程内的订阅."""
+
+    user_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(
+        default_factory=lambda: asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+    )
+
+    def offer(self, event: dict) -> None:
+        """在所属事件循环中入队, 队列已满时丢弃."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.info("收件箱事件积压, 丢弃: user_id=%s", self.user_id)
+
+
+class InboxEventHub:
+    """
+    进程级事件分发中心.
+
+    每个进程只建立一个 Redis 订阅, 收到事件后按 user_id 分发到本进程内的
+    SSE 连接队列; 未配置 REDIS_URL 时直接在进程内分发, 供单进程开发使用.
+    """
+
+    def __init__(self):
+        """Initialize an empty hub."""
+        self._subscribers: dict[int, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._redis = None
+        self._counters = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "heartbeats_sent": 0,
+            "events_delivered": 0,
+            "publish_errors": 0,
+        }
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """在当前事件循环中为 ``user_id`` 注册订阅."""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+            self._counters["connections_opened"] += 1
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """移除订阅."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+            self._counters["connections_closed"] += 1
+
+    def record_heartbeat(self) -> None:
+        """记录一次心跳."""
+        with self._lock:
+            self._counters["heartbeats_sent"] += 1
+
+    def metrics(self) -> dict:
+        """返回本进程的连接与事件计数."""
+        with self._lock:
+            return {
+                **self._counters,
+                "active_connections": sum(map(len, self._subscribers.values())),
+                "active_users": len(self._subscribers),
+                "backend": "redis" if settings.REDIS_URL else "memory",
+            }
+
+    def publish(self, user_ids: list[int] | None, event: dict) -> None:
+        """
+        发布事件.
+
+        Args:
+            user_ids: 接收事件的用户 ID, None 表示所有在线用户 (广播)
+            event: 事件内容, 至少包含 ``type``
+
+        """
+        payload = json.dumps({"user_ids": user_ids, "event": event})
+        if not settings.REDIS_URL:
+            self._dispatch(payload)
+            return
+        try:
+            self._get_redis().publish(INBOX_EVENTS_CHANNEL, payload)
+        except Exception:
+            # 推送失败不影响业务, 客户端重连时会拿到最新未读数
+            with self._lock:
+                self._counters["publish_errors"] += 1
+            logger.warning("发布收件箱事件失败", exc_info=True)
+
+    def _dispatch(self, payload: str) -> None:
+        data = json.loads(payload)
+        user_ids = data["user_ids"]
+        with self._lock:
+            if user_ids is None:
+                targets = [s for subs in self._subscribers.values() for s in subs]
+            else:
+                targets = [
+                    s for uid in user_ids for s in self._subscribers.get(uid, ())
+                ]
+            self._counters["events_delivered"] += len(targets)
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.offer, data["event"]
+                )
+            except RuntimeError:
+                # 事件循环已关闭, 连接即将被回收
+                continue
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _ensure_listener(self) -> None:
+        if not settings.REDIS_URL:
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name="inbox-events-listener", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INBOX_EVENTS_CHANNEL)
+                for message in pubsub.listen():
+                    self._dispatch(message["data"])
+            except Exception:
+                logger.warning("收件箱事件订阅中断, 稍后重连", exc_info=True)
+                time.sleep(LISTENER_RETRY_SECONDS)
+
+
+inbox_events = InboxEventHub()
+
+
+def publish_on_commit(user_ids: list[int] | None, event: dict) -> None:
+    """在事务提交后发布事件, 回滚时不推送."""
+    transaction.on_commit(lambda: inbox_events.publish(user_ids, event))
+
+
+def issue_stream_ticket(user) -> str:
+    """
+    签发建立 SSE 连接用的短期票据.
+
+    票据会出现在查询参数与访问日志中, 因此只在
+    ``STREAM_TICKET_MAX_AGE_SECONDS`` 秒内有效, 且只被事件流接受.
+    """
+    return signing.dumps(user.pk, salt=STREAM_TICKET_SALT)
+
+
+def get_user_from_stream_ticket(ticket: str):
+    """校验票据并返回激活且未被合并的用户, 无效或过期时返回 None."""
+    if not ticket:
+        return None
+    try:
+        user_id = signing.loads(
+            ticket, salt=STREAM_TICKET_SALT, max_age=STREAM_TICKET_MAX_AGE_SECONDS
+        )
+    except signing.BadSignature:
+        return None
+    user = get_user_model()._default_manager.filter(pk=user_id).first()
+    if not user or not user.is_active or user.merged_into_id:
+        return None
+    return user
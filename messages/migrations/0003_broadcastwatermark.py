@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_drop_user_email_unique'),
+        ('site_messages', '0002_alter_message_message_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='broadcast_watermark', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+                ('last_broadcast_id', models.PositiveBigIntegerField(default=0, verbose_name='最后同步的广播ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '广播同步水位',
+                'verbose_name_plural': '广播同步水位',
+            },
+        ),
+    ]
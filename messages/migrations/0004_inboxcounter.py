@@ -0,0 +1,61 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_inbox_counters(apps, schema_editor):
+    UserMessage = apps.get_model("site_messages", "UserMessage")
+    InboxCounter = apps.get_model("site_messages", "InboxCounter")
+    rows = (
+        UserMessage.objects.filter(is_deleted=False)
+        .order_by()
+        .values_list("user_id", "message__message_type")
+        .annotate(count=Count("id"), unread=Count("id", filter=Q(is_read=False)))
+    )
+    batch = []
+    for user_id, message_type, count, unread in rows.iterator(
+        chunk_size=BACKFILL_BATCH_SIZE
+    ):
+        batch.append(
+            InboxCounter(
+                user_id=user_id, message_type=message_type, total=count, unread=unread
+            )
+        )
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            InboxCounter.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        InboxCounter.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('site_messages', '0003_broadcastwatermark'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_type', models.CharField(choices=[('system', '系统消息'), ('personal', '个人消息'), ('payment', '支付信息'), ('shipping', '发货信息'), ('activity', '活动通知'), ('announcement', '公告'), ('points', '积分变动'), ('order', '订单信息'), ('security', '安全提醒'), ('withdrawal', '提现信息'), ('outreach', 'Outreach')], max_length=20, verbose_name='消息类型')),
+                ('total', models.IntegerField(default=0, verbose_name='消息数')),
+                ('unread', models.IntegerField(default=0, verbose_name='未读数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_counters', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '收件箱计数',
+                'verbose_name_plural': '收件箱计数',
+                'unique_together': {('user', 'message_type')},
+            },
+        ),
+        migrations.RunPython(backfill_inbox_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('site_messages', '0004_inboxcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedUserMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='原用户消息ID')),
+                ('is_read', models.BooleanField(default=False, verbose_name='已读')),
+                ('read_at', models.DateTimeField(blank=True, null=True, verbose_name='阅读时间')),
+                ('is_deleted', models.BooleanField(default=False, verbose_name='已删除')),
+                ('created_at', models.DateTimeField(verbose_name='接收时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '归档用户消息',
+                'verbose_name_plural': '归档用户消息',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='usermessage',
+            name='site_messag_user_id_537675_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usermessage',
+            name='site_messag_user_id_a23efb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usermessage',
+            name='site_messag_user_id_96c610_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usermessage',
+            name='site_messag_message_68f30e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-created_at'], name='msg_um_live_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_read', False)), fields=['user'], name='msg_um_live_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermessage',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['message'], name='msg_um_msg_unread_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedusermessage',
+            name='message',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_user_messages', to='site_messages.message', verbose_name='消息'),
+        ),
+        migrations.AddField(
+            model_name='archivedusermessage',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to=settings.AUTH_USER_MODEL, verbose_name='用户'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedusermessage',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['user', '-created_at'], name='msg_aum_history_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+from django.db.models import Max
+
+SEED_BATCH_SIZE = 1000
+
+
+def seed_broadcast_watermarks(apps, schema_editor):
+    """
+    Start each user's watermark at the newest broadcast they already hold.
+
+    Broadcasts sent before lazy sync were fanned out to one UserMessage per
+    recipient; without a watermark sync_broadcasts would rescan every one of
+    them and re-insert those the user never received.
+    """
+    UserMessage = apps.get_model("site_messages", "UserMessage")
+    ArchivedUserMessage = apps.get_model("site_messages", "ArchivedUserMessage")
+    BroadcastWatermark = apps.get_model("site_messages", "BroadcastWatermark")
+
+    seeds = {}
+    for model in (UserMessage, ArchivedUserMessage):
+        rows = (
+            model.objects.filter(message__is_broadcast=True)
+            .order_by()
+            .values_list("user_id")
+            .annotate(max_id=Max("message_id"))
+        )
+        for user_id, max_id in rows.iterator(chunk_size=SEED_BATCH_SIZE):
+            seeds[user_id] = max(seeds.get(user_id, 0), max_id)
+
+    user_ids = sorted(seeds)
+    for start in range(0, len(user_ids), SEED_BATCH_SIZE):
+        batch = user_ids[start : start + SEED_BATCH_SIZE]
+        existing = dict(
+            BroadcastWatermark.objects.filter(user_id__in=batch).values_list(
+                "user_id", "last_broadcast_id"
+            )
+        )
+        BroadcastWatermark.objects.bulk_create(
+            [
+                BroadcastWatermark(user_id=user_id, last_broadcast_id=seeds[user_id])
+                for user_id in batch
+                if user_id not in existing
+            ]
+        )
+        for user_id, last_broadcast_id in existing.items():
+            if last_broadcast_id < seeds[user_id]:
+                BroadcastWatermark.objects.filter(user_id=user_id).update(
+                    last_broadcast_id=seeds[user_id]
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("site_messages", "0005_archive_and_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_broadcast_watermarks, migrations.RunPython.noop),
+    ]
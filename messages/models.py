@@ -2,6 +2,7 @@
 
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Q
 from django.utils import timezone
 
 
@@ -63,8 +64,16 @@ class Message(models.Model):
         return f"{self.get_message_type_display()}: {self.title}"
 
     def get_recipient_count(self):
-        """获取接收者数量."""
-        return self.user_messages.count()
+        """获取接收者数量 (广播按发送时已注册的激活用户计)."""
+        if self.is_broadcast:
+            from django.contrib.auth import get_user_model
+
+            return (
+                get_user_model()
+                .objects.filter(is_active=True, date_joined__lte=self.created_at)
+                .count()
+            )
+        return self.user_messages.count() + self.archived_user_messages.count()
 
 
 class UserMessage(models.Model):
@@ -96,11 +105,23 @@ class UserMessage(models.Model):
         verbose_name_plural = "用户消息"
         ordering = ["-created_at"]
         unique_together = [["user", "message"]]
+        # 部分索引只覆盖收件箱实际查询的行, 已删除行等待归档, 不进入索引
         indexes = [
-            models.Index(fields=["user", "-created_at"]),
-            models.Index(fields=["user", "is_read"]),
-            models.Index(fields=["user", "is_deleted"]),
-            models.Index(fields=["message", "is_read"]),
+            models.Index(
+                fields=["user", "-created_at"],
+                condition=Q(is_deleted=False),
+                name="msg_um_live_recent_idx",
+            ),
+            models.Index(
+                fields=["user"],
+                condition=Q(is_deleted=False, is_read=False),
+                name="msg_um_live_unread_idx",
+            ),
+            models.Index(
+                fields=["message"],
+                condition=Q(is_read=False),
+                name="msg_um_msg_unread_idx",
+            ),
         ]
 
     def __str__(self):
@@ -113,6 +134,10 @@ class UserMessage(models.Model):
             self.is_read = True
             self.read_at = timezone.now()
             self.save(update_fields=["is_read", "read_at"])
+            if not self.is_deleted:
+                InboxCounter.adjust(
+                    [self.user_id], self.message.message_type, unread=-1
+                )
 
     def mark_as_unread(self):
         """标记为未读."""
@@ -120,9 +145,127 @@ class UserMessage(models.Model):
             self.is_read = False
             self.read_at = None
             self.save(update_fields=["is_read", "read_at"])
+            if not self.is_deleted:
+                InboxCounter.adjust([self.user_id], self.message.message_type, unread=1)
 
     def soft_delete(self):
         """软删除."""
         if not self.is_deleted:
             self.is_deleted = True
             self.save(update_fields=["is_deleted"])
+            InboxCounter.adjust(
+                [self.user_id],
+                self.message.message_type,
+                total=-1,
+                unread=0 if self.is_read else -1,
+            )
+
+
+class ArchivedUserMessage(models.Model):
+    """已读或已删除的旧用户消息冷归档, 主键沿用原 UserMessage ID."""
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="原用户消息ID")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_messages",
+        verbose_name="用户",
+    )
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name="archived_user_messages",
+        verbose_name="消息",
+    )
+    is_read = models.BooleanField(default=False, verbose_name="已读")
+    read_at = models.DateTimeField(null=True, blank=True, verbose_name="阅读时间")
+    is_deleted = models.BooleanField(default=False, verbose_name="已删除")
+    created_at = models.DateTimeField(verbose_name="接收时间")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="归档时间")
+
+    class Meta:
+        """模型元数据."""
+
+        verbose_name = "归档用户消息"
+        verbose_name_plural = "归档用户消息"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                condition=Q(is_deleted=False),
+                name="msg_aum_history_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """字符串表示."""
+        return f"{self.user_id} - {self.message_id} (归档)"
+
+
+class BroadcastWatermark(models.Model):
+    """用户已同步到收件箱的最大广播消息 ID."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="broadcast_watermark",
+        verbose_name="用户",
+    )
+    last_broadcast_id = models.PositiveBigIntegerField(
+        default=0, verbose_name="最后同步的广播ID"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        """模型元数据."""
+
+        verbose_name = "广播同步水位"
+        verbose_name_plural = "广播同步水位"
+
+    def __str__(self):
+        """字符串表示."""
+        return f"{self.user_id}: {self.last_broadcast_id}"
+
+
+class InboxCounter(models.Model):
+    """用户收件箱计数 (按消息类型, 不含已删除)."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="inbox_counters",
+        verbose_name="用户",
+    )
+    message_type = models.CharField(
+        max_length=20, choices=Message.MessageType.choices, verbose_name="消息类型"
+    )
+    total = models.IntegerField(default=0, verbose_name="消息数")
+    unread = models.IntegerField(default=0, verbose_name="未读数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        """模型元数据."""
+
+        verbose_name = "收件箱计数"
+        verbose_name_plural = "收件箱计数"
+        unique_together = [["user", "message_type"]]
+
+    def __str__(self):
+        """字符串表示."""
+        return f"{self.user_id} {self.message_type}: {self.unread}/{self.total}"
+
+    @classmethod
+    def adjust(cls, user_ids, message_type, total=0, unread=0):
+        """以 F() 增量调整计数, 缺失的计数行先按 0 补建."""
+        if not user_ids or not (total or unread):
+            return
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, message_type=message_type) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        cls.objects.filter(user_id__in=user_ids, message_type=message_type).update(
+            total=F("total") + total,
+            unread=F("unread") + unread,
+            updated_at=timezone.now(),
+        )
@@ -1,9 +1,24 @@
 """消息服务层."""
 
+from collections import Counter, defaultdict
+from collections.abc import Sized
+from datetime import timedelta
+from itertools import islice
+
 from django.contrib.auth import get_user_model
 from django.db import transaction
-
-from .models import Message, UserMessage
+from django.db.models import Count, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .events import publish_on_commit
+from .models import (
+    ArchivedUserMessage,
+    BroadcastWatermark,
+    InboxCounter,
+    Message,
+    UserMessage,
+)
 
 User = get_user_model()
 
@@ -12,10 +27,100 @@ class MessageError(Exception):
     """消息操作异常基类."""
 
 
-BROADCAST_BATCH_SIZE = 1000
+SEND_CHUNK_SIZE = 1000
+RECONCILE_BATCH_SIZE = 500
+ARCHIVE_BATCH_SIZE = 1000
+
+# 已读消息在收件箱 (热表) 中的保留天数, 到期后归档; None 表示不归档
+READ_RETENTION_DAYS = {
+    Message.MessageType.SYSTEM: 180,
+    Message.MessageType.PERSONAL: None,
+    Message.MessageType.PAYMENT: 365,
+    Message.MessageType.SHIPPING: 365,
+    Message.MessageType.ACTIVITY: 90,
+    Message.MessageType.ANNOUNCEMENT: 180,
+    Message.MessageType.POINTS: 90,
+    Message.MessageType.ORDER: 365,
+    Message.MessageType.SECURITY: 365,
+    Message.MessageType.WITHDRAWAL: 365,
+    Message.MessageType.OUTREACH: 180,
+}
+# 用户已删除的消息 (任意类型) 在热表中的保留天数
+DELETED_RETENTION_DAYS = 30
+ARCHIVED_FIELDS = (
+    "id",
+    "user_id",
+    "message_id",
+    "is_read",
+    "read_at",
+    "is_deleted",
+    "created_at",
+)
+
+
+def _lock_counters(user):
+    """锁定用户的计数行, 串行化同一用户的状态变更."""
+    list(
+        InboxCounter.objects.select_for_update()
+        .filter(user=user)
+        .values_list("pk", flat=True)
+    )
+
+
+def _count_by_type(queryset):
+    """按消息类型统计 (条数, 未读条数)."""
+    rows = (
+        queryset.order_by()
+        .values_list("message__message_type")
+        .annotate(count=Count("id"), unread=Count("id", filter=Q(is_read=False)))
+    )
+    return {message_type: (count, unread) for message_type, count, unread in rows}
+
+
+def _publish_unread_delta(user, event_type, delta):
+    """推送未读数变化给用户的实时连接."""
+    if delta:
+        publish_on_commit([user.pk], {"type": event_type, "unread_delta": delta})
+
+
+def _message_event(message):
+    return {
+        "type": "message",
+        "message_id": message.id,
+        "message_type": message.message_type,
+        "unread_delta": 1,
+    }
+
+
+def _has_recipients(recipients):
+    """判断是否指定了接收者, 不加载 queryset 或迭代器的内容."""
+    if recipients is None:
+        return False
+    if isinstance(recipients, QuerySet):
+        return recipients.exists()
+    if isinstance(recipients, Sized):
+        return len(recipients) > 0
+    return True
+
+
+def _iter_recipient_ids(recipients, chunk_size):
+    """把 User 对象 / 用户 ID / queryset 统一为用户 ID 流."""
+    if isinstance(recipients, QuerySet):
+        return recipients.values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+    return (getattr(recipient, "pk", recipient) for recipient in recipients)
+
+
+def _iter_recipient_chunks(recipients, chunk_size):
+    """按块产出去重后的用户 ID 列表, 跳过去重后为空的块."""
+    seen = set()
+    recipient_ids = _iter_recipient_ids(recipients, chunk_size)
+    while chunk := list(islice(recipient_ids, chunk_size)):
+        user_ids = [user_id for user_id in dict.fromkeys(chunk) if user_id not in seen]
+        if user_ids:
+            seen.update(user_ids)
+            yield user_ids
 
 
-@transaction.atomic
 def send_message(  # noqa: PLR0913
     title,
     content,
@@ -23,23 +128,32 @@ def send_message(  # noqa: PLR0913
     sender=None,
     recipients=None,
     is_broadcast=False,
+    chunk_size=SEND_CHUNK_SIZE,
+    on_progress=None,
 ):
     """
     发送站内信.
 
+    定向消息按 chunk_size 分块写入, 每块单独提交 (在外层事务中调用时随外层提交),
+    中途失败时已提交的块保持送达. 消息与第一块接收者在同一事务中创建,
+    第一块失败时不会留下无人接收的消息.
+
     Args:
         title: 消息标题
         content: 消息内容 (支持 Markdown)
         message_type: 消息类型
         sender: 发送者 (User 对象, 可为 None)
-        recipients: 接收者列表 (User 对象列表或 queryset)
+        recipients: 接收者 (User 对象或用户 ID 的可迭代对象, 或 User queryset)
         is_broadcast: 是否广播消息 (发送给全站用户)
+        chunk_size: 每块写入的接收者数量
+        on_progress: 每块提交后回调 ``on_progress(message, delivered)``,
+            delivered 为累计送达人数
 
     Returns:
         Message: 创建的消息对象
 
     Raises:
-        MessageError: 当参数无效时
+        MessageError: 当参数无效或定向消息没有任何接收者时
 
     """
     if not title:
@@ -50,47 +164,154 @@ def send_message(  # noqa: PLR0913
         msg = "消息内容不能为空"
         raise MessageError(msg)
 
-    if is_broadcast and recipients:
+    has_recipients = _has_recipients(recipients)
+    if is_broadcast and has_recipients:
         msg = "广播消息不能同时指定接收者"
         raise MessageError(msg)
 
-    if not is_broadcast and not recipients:
+    if not is_broadcast and not has_recipients:
         msg = "非广播消息必须指定接收者"
         raise MessageError(msg)
 
-    # 创建消息
-    message = Message.objects.create(
-        title=title,
-        content=content,
-        message_type=message_type,
-        sender=sender,
-        is_broadcast=is_broadcast,
-    )
+    fields = {
+        "title": title,
+        "content": content,
+        "message_type": message_type,
+        "sender": sender,
+        "is_broadcast": is_broadcast,
+    }
 
-    # 创建用户消息关联
+    # 广播消息只存一份, 由 sync_broadcasts 在用户读取收件箱时并入
     if is_broadcast:
-        # 广播消息发送给所有用户（分批处理避免内存耗尽）
-        batch_size = BROADCAST_BATCH_SIZE
-        user_messages = []
-        users = User.objects.filter(is_active=True).iterator(chunk_size=batch_size)
-
-        for user in users:
-            user_messages.append(UserMessage(user=user, message=message))
-            if len(user_messages) >= batch_size:
-                UserMessage.objects.bulk_create(user_messages, ignore_conflicts=True)
-                user_messages = []
-
-        # 插入剩余的消息
-        if user_messages:
-            UserMessage.objects.bulk_create(user_messages, ignore_conflicts=True)
-    else:
-        # 发送给指定用户
-        user_messages = [UserMessage(user=user, message=message) for user in recipients]
-        UserMessage.objects.bulk_create(user_messages, ignore_conflicts=True)
+        message = Message.objects.create(**fields)
+        publish_on_commit(None, _message_event(message))
+        return message
+
+    # 迭代器无法预先判断是否为空, 先取出第一块再创建消息
+    chunks = _iter_recipient_chunks(recipients, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        msg = "非广播消息必须指定接收者"
+        raise MessageError(msg)
+
+    with transaction.atomic():
+        message = Message.objects.create(**fields)
+        delivered = deliver_message(message, first)
+    if on_progress is not None:
+        on_progress(message, delivered)
+
+    for user_ids in chunks:
+        delivered += deliver_message(message, user_ids)
+        if on_progress is not None:
+            on_progress(message, delivered)
 
     return message
 
 
+@transaction.atomic
+def deliver_message(message, user_ids):
+    """
+    把已创建的定向消息投递给一批用户.
+
+    调用方负责去重; 同一批用户重复投递会被忽略, 但计数会重复增加.
+
+    Args:
+        message: 消息对象
+        user_ids: 用户 ID 列表
+
+    Returns:
+        int: 本批用户数量
+
+    """
+    UserMessage.objects.bulk_create(
+        [UserMessage(user_id=user_id, message=message) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    InboxCounter.adjust(user_ids, message.message_type, total=1, unread=1)
+    publish_on_commit(user_ids, _message_event(message))
+    return len(user_ids)
+
+
+def _pending_broadcasts(user, after):
+    return Message.objects.filter(
+        is_broadcast=True, created_at__gte=user.date_joined, id__gt=after
+    )
+
+
+def sync_broadcasts(user):
+    """
+    将水位之后的广播消息并入用户收件箱.
+
+    仅为注册时间早于广播的激活用户补建 UserMessage, 并把水位推进到最新广播;
+    已删除或已读状态保存在补建的行上, 之后不会被覆盖.
+    水位行加锁后重新读取待同步广播, 并跳过用户已有的行 (历史逐人投递的广播),
+    计数只按实际插入的行调整, 与水位更新在同一事务内完成.
+
+    Args:
+        user: 用户对象
+
+    Returns:
+        int: 本次补建的广播数量
+
+    """
+    if not user.is_active:
+        return 0
+
+    watermark = BroadcastWatermark.objects.filter(user=user).values(
+        "last_broadcast_id"
+    )[:1]
+    if not _pending_broadcasts(user, Coalesce(Subquery(watermark), Value(0))).exists():
+        return 0
+
+    with transaction.atomic():
+        _lock_counters(user)
+        BroadcastWatermark.objects.get_or_create(user=user)
+        last_broadcast_id = (
+            BroadcastWatermark.objects.select_for_update()
+            .filter(user=user)
+            .values_list("last_broadcast_id", flat=True)
+            .get()
+        )
+        pending = list(
+            _pending_broadcasts(user, last_broadcast_id)
+            .order_by("id")
+            .values_list("id", "message_type")
+        )
+        if not pending:
+            return 0
+        existing = set(
+            UserMessage.objects.filter(
+                user=user, message_id__in=[message_id for message_id, _ in pending]
+            ).values_list("message_id", flat=True)
+        )
+        inserted = [
+            (message_id, message_type)
+            for message_id, message_type in pending
+            if message_id not in existing
+        ]
+        inserted_ids = [message_id for message_id, _ in inserted]
+        UserMessage.objects.bulk_create(
+            [
+                UserMessage(user=user, message_id=message_id)
+                for message_id in inserted_ids
+            ]
+        )
+        # 接收时间与广播发送时间对齐, 保持收件箱排序
+        UserMessage.objects.filter(user=user, message_id__in=inserted_ids).update(
+            created_at=Subquery(
+                Message.objects.filter(pk=OuterRef("message_id")).values("created_at")[
+                    :1
+                ]
+            )
+        )
+        BroadcastWatermark.objects.filter(user=user).update(
+            last_broadcast_id=pending[-1][0]
+        )
+        for message_type, count in Counter(t for _, t in inserted).items():
+            InboxCounter.adjust([user.pk], message_type, total=count, unread=count)
+    return len(inserted)
+
+
 def get_user_messages(
     user, include_deleted=False, only_unread=False, message_type=None
 ):
@@ -107,6 +328,7 @@ def get_user_messages(
         QuerySet: UserMessage 查询集
 
     """
+    sync_broadcasts(user)
     queryset = UserMessage.objects.filter(user=user).select_related(
         "message", "message__sender"
     )
@@ -135,12 +357,12 @@ def get_unread_count(user, message_type=None):
         int: 未读消息数量
 
     """
-    queryset = UserMessage.objects.filter(user=user, is_read=False, is_deleted=False)
-
+    sync_broadcasts(user)
+    counters = InboxCounter.objects.filter(user=user)
     if message_type:
-        queryset = queryset.filter(message__message_type=message_type)
-
-    return queryset.count()
+        counters = counters.filter(message_type=message_type)
+    unread = counters.aggregate(unread=Sum("unread"))["unread"] or 0
+    return max(unread, 0)
 
 
 @transaction.atomic
@@ -156,13 +378,17 @@ def mark_as_read(user, message_ids=None):
         int: 标记的消息数量
 
     """
+    sync_broadcasts(user)
     queryset = UserMessage.objects.filter(user=user, is_read=False, is_deleted=False)
     if message_ids is not None:
         queryset = queryset.filter(message_id__in=message_ids)
 
-    from django.utils import timezone
-
+    _lock_counters(user)
+    changes = _count_by_type(queryset)
     updated = queryset.update(is_read=True, read_at=timezone.now())
+    for message_type, (count, _) in changes.items():
+        InboxCounter.adjust([user.pk], message_type, unread=-count)
+    _publish_unread_delta(user, "read", -updated)
 
     return updated
 
@@ -186,11 +412,17 @@ def mark_as_unread(user, message_ids):
         int: 标记的消息数量
 
     """
+    sync_broadcasts(user)
     queryset = UserMessage.objects.filter(
         user=user, is_read=True, is_deleted=False, message_id__in=message_ids
     )
 
+    _lock_counters(user)
+    changes = _count_by_type(queryset)
     updated = queryset.update(is_read=False, read_at=None)
+    for message_type, (count, _) in changes.items():
+        InboxCounter.adjust([user.pk], message_type, unread=count)
+    _publish_unread_delta(user, "unread", updated)
 
     return updated
 
@@ -208,11 +440,17 @@ def delete_messages(user, message_ids):
         int: 删除的消息数量
 
     """
+    sync_broadcasts(user)
     queryset = UserMessage.objects.filter(
         user=user, is_deleted=False, message_id__in=message_ids
     )
 
+    _lock_counters(user)
+    changes = _count_by_type(queryset)
     updated = queryset.update(is_deleted=True)
+    for message_type, (count, unread) in changes.items():
+        InboxCounter.adjust([user.pk], message_type, total=-count, unread=-unread)
+    _publish_unread_delta(user, "deleted", -sum(u for _, u in changes.values()))
 
     return updated
 
@@ -228,21 +466,19 @@ def get_message_stats(user):
         dict: 统计信息
 
     """
-    total = UserMessage.objects.filter(user=user, is_deleted=False).count()
-    unread = UserMessage.objects.filter(
-        user=user, is_deleted=False, is_read=False
-    ).count()
-
-    # 按类型统计未读消息
-    from django.db.models import Count
-
-    type_stats = (
-        UserMessage.objects.filter(user=user, is_deleted=False, is_read=False)
-        .values("message__message_type")
-        .annotate(count=Count("id"))
+    sync_broadcasts(user)
+    counters = list(
+        InboxCounter.objects.filter(user=user).values_list(
+            "message_type", "total", "unread"
+        )
     )
+    total = max(sum(row[1] for row in counters), 0)
+    unread = max(sum(row[2] for row in counters), 0)
 
-    type_counts = {stat["message__message_type"]: stat["count"] for stat in type_stats}
+    # 按类型统计未读消息
+    type_counts = {
+        message_type: count for message_type, _, count in counters if count > 0
+    }
 
     return {
         "total": total,
@@ -250,3 +486,200 @@ def get_message_stats(user):
         "read": total - unread,
         "type_counts": type_counts,
     }
+
+
+def reconcile_inbox_counters(user_ids=None):
+    """
+    按 UserMessage 重新计算收件箱计数, 修正增量维护产生的偏差.
+
+    Args:
+        user_ids: 需要校准的用户 ID 列表, 为空时校准全部用户
+
+    Returns:
+        int: 被修正的计数行数量
+
+    """
+    if user_ids is None:
+        user_ids = User.objects.order_by("pk").values_list("pk", flat=True)
+    user_ids = list(user_ids)
+
+    fixed = 0
+    for start in range(0, len(user_ids), RECONCILE_BATCH_SIZE):
+        batch = user_ids[start : start + RECONCILE_BATCH_SIZE]
+        with transaction.atomic():
+            stored = {
+                (row.user_id, row.message_type): row
+                for row in InboxCounter.objects.select_for_update().filter(
+                    user_id__in=batch
+                )
+            }
+            actual = {
+                (user_id, message_type): (count, unread)
+                for user_id, message_type, count, unread in UserMessage.objects.filter(
+                    user_id__in=batch, is_deleted=False
+                )
+                .order_by()
+                .values_list("user_id", "message__message_type")
+                .annotate(
+                    count=Count("id"), unread=Count("id", filter=Q(is_read=False))
+                )
+            }
+            created, updated = [], []
+            for key in stored.keys() | actual.keys():
+                count, unread = actual.get(key, (0, 0))
+                row = stored.get(key)
+                if row is None:
+                    created.append(
+                        InboxCounter(
+                            user_id=key[0],
+                            message_type=key[1],
+                            total=count,
+                            unread=unread,
+                        )
+                    )
+                elif (row.total, row.unread) != (count, unread):
+                    row.total, row.unread = count, unread
+                    row.updated_at = timezone.now()
+                    updated.append(row)
+            InboxCounter.objects.bulk_create(created, ignore_conflicts=True)
+            InboxCounter.objects.bulk_update(updated, ["total", "unread", "updated_at"])
+            fixed += len(created) + len(updated)
+    return fixed
+
+
+def get_message_history(user, message_type=None):
+    """
+    获取用户已归档的历史消息 (不含用户已删除的).
+
+    收件箱接口只查询热表, 仅在用户主动查看历史时使用.
+    """
+    queryset = ArchivedUserMessage.objects.filter(
+        user=user, is_deleted=False
+    ).select_related("message", "message__sender")
+    if message_type:
+        queryset = queryset.filter(message__message_type=message_type)
+    return queryset
+
+
+def _retention_filter(now):
+    """返回超过保留期限、可归档的 UserMessage 条件."""
+    condition = Q(
+        is_deleted=True, created_at__lt=now - timedelta(days=DELETED_RETENTION_DAYS)
+    )
+    for message_type, days in READ_RETENTION_DAYS.items():
+        if days is not None:
+            condition |= Q(
+                is_read=True,
+                message__message_type=message_type,
+                created_at__lt=now - timedelta(days=days),
+            )
+    return condition
+
+
+def archive_user_messages(*, now=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    按保留策略将旧的已读或已删除 UserMessage 移入 ArchivedUserMessage.
+
+    按主键键集分批扫描, 每批单独提交; 未读且未删除的消息始终留在热表.
+
+    Returns:
+        dict: 包含 batches, archived 的统计信息
+
+    """
+    now = now or timezone.now()
+    condition = _retention_filter(now)
+    stats = {"batches": 0, "archived": 0}
+    last_id = 0
+
+    while True:
+        message_ids = list(
+            UserMessage.objects.filter(condition, id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not message_ids:
+            break
+
+        last_id = message_ids[-1]
+        stats["batches"] += 1
+        stats["archived"] += _archive_message_batch(message_ids, condition)
+
+        if len(message_ids) < batch_size:
+            break
+
+    return stats
+
+
+@transaction.atomic
+def _raise_broadcast_watermarks(broadcast_ids):
+    """
+    确保水位不低于即将归档的广播 ID.
+
+    否则没有水位 (历史逐人投递) 的用户在行被移出热表后, 会被 sync_broadcasts
+    当作未同步的广播重新插入为未读.
+    """
+    if not broadcast_ids:
+        return
+    watermarks = BroadcastWatermark.objects.select_for_update().in_bulk(
+        list(broadcast_ids)
+    )
+    BroadcastWatermark.objects.bulk_create(
+        [
+            BroadcastWatermark(user_id=user_id, last_broadcast_id=message_id)
+            for user_id, message_id in broadcast_ids.items()
+            if user_id not in watermarks
+        ],
+        ignore_conflicts=True,
+    )
+    behind = []
+    for user_id, watermark in watermarks.items():
+        if watermark.last_broadcast_id < broadcast_ids[user_id]:
+            watermark.last_broadcast_id = broadcast_ids[user_id]
+            behind.append(watermark)
+    BroadcastWatermark.objects.bulk_update(behind, ["last_broadcast_id"])
+
+
+@transaction.atomic
+def _archive_message_batch(message_ids, condition):
+    user_ids = set(
+        UserMessage.objects.filter(id__in=message_ids).values_list("user_id", flat=True)
+    )
+    # 与已读/删除等服务相同, 先锁计数行再锁消息行
+    list(
+        InboxCounter.objects.select_for_update()
+        .filter(user_id__in=user_ids)
+        .values_list("pk", flat=True)
+    )
+    rows = list(
+        UserMessage.objects.select_for_update(of=("self",))
+        .filter(condition, id__in=message_ids)
+        .values(*ARCHIVED_FIELDS, "message__message_type", "message__is_broadcast")
+    )
+    if not rows:
+        return 0
+
+    broadcast_ids = defaultdict(int)
+    for row in rows:
+        if row["message__is_broadcast"]:
+            user_id = row["user_id"]
+            broadcast_ids[user_id] = max(broadcast_ids[user_id], row["message_id"])
+    _raise_broadcast_watermarks(broadcast_ids)
+
+    ArchivedUserMessage.objects.bulk_create(
+        [ArchivedUserMessage(**{f: row[f] for f in ARCHIVED_FIELDS}) for row in rows],
+        ignore_conflicts=True,
+    )
+    # 已删除的行早已从计数中扣除, 仅扣减仍在收件箱中的已读行
+    live = Counter(
+        (row["user_id"], row["message__message_type"])
+        for row in rows
+        if not row["is_deleted"]
+    )
+    users_by_change = defaultdict(list)
+    for (user_id, message_type), count in live.items():
+        users_by_change[message_type, count].append(user_id)
+    for (message_type, count), changed_user_ids in users_by_change.items():
+        InboxCounter.adjust(changed_user_ids, message_type, total=-count)
+
+    UserMessage.objects.filter(id__in=[row["id"] for row in rows]).delete()
+    return len(rows)
@@ -0,0 +1,18 @@
+"""Signal handlers to keep inbox counters consistent."""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import InboxCounter, UserMessage
+
+
+@receiver(post_save, sender=UserMessage)
+def count_created_user_message(sender, instance, created, **kwargs):
+    """Count user messages created one at a time (bulk paths adjust explicitly)."""
+    if created and not instance.is_deleted:
+        InboxCounter.adjust(
+            [instance.user_id],
+            instance.message.message_type,
+            total=1,
+            unread=0 if instance.is_read else 1,
+        )
@@ -1,11 +1,14 @@
 """Tests for message API endpoints."""
 
+from datetime import timedelta
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 
 from accounts.services.jwt_tokens import create_access_token
 from messages.models import Message, UserMessage
-from messages.services import send_message
+from messages.services import archive_user_messages, mark_as_read, send_message
 
 
 class MessagesApiV1Tests(TestCase):
@@ -49,6 +52,27 @@ class MessagesApiV1Tests(TestCase):
             recipients=[self.other_user],
         )
 
+    def test_history_lists_archived_messages_only(self):
+        """Archived messages leave the inbox and show up in history."""
+        mark_as_read(self.user, [self.system_message.id])
+        UserMessage.objects.filter(message=self.system_message).update(
+            created_at=timezone.now() - timedelta(days=365)
+        )
+        archive_user_messages()
+
+        inbox = self.client.get("/api/v1/messages/", **self.headers).json()
+        history = self.client.get(
+            "/api/v1/messages/history", {"cursor": ""}, **self.headers
+        ).json()
+
+        self.assertEqual(
+            [item["id"] for item in inbox["items"]], [self.payment_message.id]
+        )
+        self.assertEqual(
+            [item["id"] for item in history["items"]], [self.system_message.id]
+        )
+        self.assertEqual(history["pagination"]["mode"], "cursor")
+
     def test_list_and_detail_do_not_mark_message_as_read(self):
         """Listing and reading message detail should not mutate read state."""
         list_response = self.client.get("/api/v1/messages/", **self.headers)
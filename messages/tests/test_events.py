@@ -0,0 +1,194 @@
+"""Tests for live inbox events."""
+
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from accounts.services.jwt_tokens import create_access_token
+from messages.events import (
+    InboxEventHub,
+    get_user_from_stream_ticket,
+    inbox_events,
+    issue_stream_ticket,
+)
+from messages.services import mark_as_read, send_message
+
+User = get_user_model()
+
+
+def _split_id(block: bytes) -> tuple[str, bytes]:
+    """Split the leading ``id:`` line off an SSE block."""
+    first, _, rest = block.decode().partition("\n")
+    field, _, value = first.partition(": ")
+    assert field == "id", block
+    return value, rest.encode()
+
+
+class InboxEventHubTests(SimpleTestCase):
+    """In-memory fan-out without Redis."""
+
+    def test_dispatches_to_target_users_and_broadcasts(self):
+        """Targeted events reach their users; broadcasts reach everyone."""
+        # A stub loop that runs callbacks inline keeps the fan-out synchronous,
+        # so the test does not depend on any event loop state left by others
+        loop = mock.Mock()
+        loop.call_soon_threadsafe.side_effect = lambda callback, *args: callback(*args)
+        hub = InboxEventHub()
+        with mock.patch("messages.events.asyncio.get_running_loop", return_value=loop):
+            alice = hub.subscribe(1)
+            bob = hub.subscribe(2)
+
+        hub.publish([1], {"type": "read", "unread_delta": -1})
+        hub.publish(None, {"type": "message", "message_id": 7})
+
+        self.assertEqual(alice.queue.qsize(), 2)
+        self.assertEqual(bob.queue.qsize(), 1)
+        self.assertEqual(bob.queue.get_nowait()["message_id"], 7)
+
+        hub.unsubscribe(bob)
+        metrics = hub.metrics()
+        self.assertEqual(metrics["active_connections"], 1)
+        self.assertEqual(metrics["events_delivered"], 3)
+        self.assertEqual(metrics["backend"], "memory")
+
+
+class InboxEventPublishingTests(TestCase):
+    """Services publish inbox events after commit."""
+
+    def setUp(self):
+        """Create a recipient."""
+        self.user = User.objects.create_user(username="live", email="l@example.com")
+
+    def test_send_and_read_publish_unread_deltas(self):
+        """send_message announces the id; mark_as_read publishes the delta."""
+        with (
+            mock.patch.object(inbox_events, "publish") as publish,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            message = send_message(title="标题", content="内容", recipients=[self.user])
+            mark_as_read(self.user, [message.id])
+
+        self.assertEqual(
+            publish.call_args_list,
+            [
+                mock.call(
+                    [self.user.pk],
+                    {
+                        "type": "message",
+                        "message_id": message.id,
+                        "message_type": "system",
+                        "unread_delta": 1,
+                    },
+                ),
+                mock.call([self.user.pk], {"type": "read", "unread_delta": -1}),
+            ],
+        )
+
+
+TICKET_URL = "/api/v1/messages/events/ticket"
+
+
+class MessageEventsViewTests(TestCase):
+    """Tests for the SSE endpoint."""
+
+    def setUp(self):
+        """Create a user with one unread message."""
+        self.user = User.objects.create_user(username="sse", email="s@example.com")
+        send_message(title="标题", content="内容", recipients=[self.user])
+        self.token = create_access_token(self.user)
+
+    async def test_rejects_missing_token(self):
+        """Anonymous connections are refused."""
+        response = await self.async_client.get("/api/v1/messages/events")
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_rejects_access_token_in_query_string(self):
+        """JWTs are never accepted from the URL."""
+        response = await self.async_client.get(
+            "/api/v1/messages/events", {"access_token": self.token}
+        )
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_is_short_lived_and_stream_only(self):
+        """Tickets expire quickly and do not authenticate other endpoints."""
+        self.assertEqual(self.client.post(TICKET_URL).status_code, 401)
+        response = self.client.post(
+            TICKET_URL, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        ticket = response.json()["ticket"]
+
+        self.assertEqual(get_user_from_stream_ticket(ticket), self.user)
+        self.assertEqual(
+            self.client.get(
+                "/api/v1/messages/unread-count", HTTP_AUTHORIZATION=f"Bearer {ticket}"
+            ).status_code,
+            401,
+        )
+        with mock.patch("messages.events.STREAM_TICKET_MAX_AGE_SECONDS", -1):
+            self.assertIsNone(get_user_from_stream_ticket(ticket))
+
+    async def test_streams_initial_count_events_and_heartbeats(self):
+        """The stream starts with the unread count, then relays events."""
+        ticket = await sync_to_async(issue_stream_ticket)(self.user)
+        with mock.patch("messages.views.HEARTBEAT_SECONDS", 0.01):
+            response = await self.async_client.get(
+                "/api/v1/messages/events", {"ticket": ticket}
+            )
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            stream = aiter(response.streaming_content)
+
+            self.assertTrue((await anext(stream)).startswith(b"retry:"))
+            stream_id, block = _split_id(await anext(stream))
+            self.assertEqual(block, b'event: unread\ndata: {"count": 1}\n\n')
+            inbox_events.publish([self.user.pk], {"type": "read", "unread_delta": -1})
+            _, block = _split_id(await anext(stream))
+            self.assertEqual(
+                block, b'event: read\ndata: {"type": "read", "unread_delta": -1}\n\n'
+            )
+            _, block = _split_id(await anext(stream))
+            self.assertEqual(block, b"\n")
+            await stream.aclose()
+
+        self.assertEqual(
+            await sync_to_async(get_user_from_stream_ticket)(stream_id), self.user
+        )
+
+        self.assertGreaterEqual(inbox_events.metrics()["heartbeats_sent"], 1)
+
+    async def test_reconnect_authenticates_with_last_event_id(self):
+        """EventSource reconnects with a stale URL ticket but a fresh event id."""
+        with mock.patch(
+            "django.core.signing.time.time", return_value=time.time() - 120
+        ):
+            stale = await sync_to_async(issue_stream_ticket)(self.user)
+        fresh = await sync_to_async(issue_stream_ticket)(self.user)
+
+        expired = await self.async_client.get(
+            "/api/v1/messages/events", {"ticket": stale}
+        )
+        self.assertEqual(expired.status_code, 401)
+
+        response = await self.async_client.get(
+            "/api/v1/messages/events",
+            {"ticket": stale},
+            headers={"Last-Event-ID": fresh},
+        )
+        self.assertEqual(response.status_code, 200)
+        await aiter(response.streaming_content).aclose()
+
+    def test_metrics_endpoint_is_staff_only(self):
+        """Connection metrics are visible to staff only."""
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {self.token}"}
+        url = "/api/v1/messages/events/metrics"
+
+        self.assertEqual(self.client.get(url, **headers).status_code, 403)
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("active_connections", response.json())
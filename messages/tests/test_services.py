@@ -1,20 +1,33 @@
 """消息服务层测试."""
 
-from unittest import mock
+from datetime import timedelta
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-
-from messages.models import Message, UserMessage
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from messages.models import (
+    ArchivedUserMessage,
+    BroadcastWatermark,
+    InboxCounter,
+    Message,
+    UserMessage,
+)
 from messages.services import (
     MessageError,
+    archive_user_messages,
     delete_messages,
+    get_message_history,
     get_message_stats,
     get_unread_count,
     get_user_messages,
     mark_as_read,
     mark_as_unread,
+    reconcile_inbox_counters,
     send_message,
+    sync_broadcasts,
 )
 
 User = get_user_model()
@@ -71,6 +84,7 @@ class SendMessageTests(TestCase):
         self.assertTrue(message.is_broadcast)
         # 应该发送给所有激活的用户（user1, user2, user3, sender）
         self.assertEqual(message.get_recipient_count(), 4)
+        self.assertEqual(get_unread_count(self.user1), 1)
 
     def test_send_message_with_sender(self):
         """测试发送带发送者的消息."""
@@ -106,33 +120,85 @@ class SendMessageTests(TestCase):
         with self.assertRaises(MessageError):
             send_message(title="测试", content="内容", is_broadcast=False)
 
-    def test_send_broadcast_uses_batches(self):
-        """测试广播消息按批次写入，触发循环中的批处理逻辑。"""
-        # 创建多一些用户以确保达到批处理阈值
-        extra_users = [
-            User.objects.create_user(
-                username=f"user_batch_{i}", email=f"batch{i}@example.com"
-            )
-            for i in range(3)
-        ]
+    def test_send_broadcast_stores_message_once(self):
+        """测试广播消息只写入一条 Message, 读取收件箱时才并入."""
+        message = send_message(title="广播", content="只存一份", is_broadcast=True)
+
+        self.assertFalse(UserMessage.objects.filter(message=message).exists())
+
+        inbox = get_user_messages(self.user1)
+        self.assertEqual([um.message_id for um in inbox], [message.id])
+        self.assertEqual(UserMessage.objects.filter(message=message).count(), 1)
+
+    def test_send_message_streams_ids_in_chunks(self):
+        """测试按块写入用户 ID 流并回调进度, 重复 ID 只送达一次."""
+        progress = []
+        ids = iter([self.user1.pk, self.user2.pk, self.user1.pk, self.sender.pk])
+
+        message = send_message(
+            title="分块",
+            content="内容",
+            recipients=ids,
+            chunk_size=2,
+            on_progress=lambda message, delivered: progress.append(delivered),
+        )
+
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(message.get_recipient_count(), 3)
+        self.assertEqual(get_unread_count(self.user1), 1)
 
-        with mock.patch("messages.services.BROADCAST_BATCH_SIZE", 1):
-            message = send_message(title="广播", content="批处理", is_broadcast=True)
+    def test_send_message_accepts_queryset_and_keeps_committed_chunks(self):
+        """测试 queryset 接收者按块提交, 失败前的块保持送达."""
+        recipients = User.objects.order_by("pk")
 
-        # 所有激活用户都应收到消息
-        expected_count = 3 + len(extra_users)  # user1,user2,sender plus extras
-        self.assertEqual(message.get_recipient_count(), expected_count)
-        # 确保最后一个批次的 bulk_create 也执行了
+        def fail_after_first_chunk(message, delivered):
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            send_message(
+                title="部分送达",
+                content="内容",
+                recipients=recipients,
+                chunk_size=2,
+                on_progress=fail_after_first_chunk,
+            )
+
+        message = Message.objects.get(title="部分送达")
         self.assertEqual(
-            UserMessage.objects.filter(message=message).count(), expected_count
+            list(
+                message.user_messages.order_by("user_id").values_list(
+                    "user_id", flat=True
+                )
+            ),
+            [self.user1.pk, self.user2.pk],
         )
 
+    def test_send_message_rejects_empty_iterator(self):
+        """测试空的接收者迭代器被拒绝且不创建消息."""
+        with self.assertRaises(MessageError):
+            send_message(title="无人", content="内容", recipients=iter([]))
+
+        self.assertFalse(Message.objects.filter(title="无人").exists())
+
+    def test_send_message_rolls_back_message_when_first_chunk_fails(self):
+        """测试第一块写入失败时消息随之回滚."""
+        with (
+            patch.object(
+                InboxCounter, "adjust", side_effect=RuntimeError("counter down")
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            send_message(title="孤儿", content="内容", recipients=[self.user1])
+
+        self.assertFalse(Message.objects.filter(title="孤儿").exists())
+
     def test_send_message_ignores_inactive_users_in_broadcast(self):
         """测试广播消息不会发送给未激活的用户."""
         self.user2.is_active = False
         self.user2.save()
 
         message = send_message(title="广播", content="内容", is_broadcast=True)
+        get_user_messages(self.user2)
 
         # 只应该发送给激活用户
         self.assertFalse(
@@ -423,3 +489,259 @@ class GetMessageStatsTests(TestCase):
 
         stats = get_message_stats(self.user)
         self.assertEqual(stats["total"], 4)
+
+
+class SyncBroadcastsTests(TestCase):
+    """广播消息读时合并测试."""
+
+    def setUp(self):
+        """设置测试数据."""
+        self.user = User.objects.create_user(username="reader", email="r@example.com")
+        self.user.date_joined = timezone.now() - timedelta(days=1)
+        self.user.save(update_fields=["date_joined"])
+
+    def test_merges_new_broadcasts_and_advances_watermark(self):
+        """测试补建的行沿用广播发送时间并推进水位."""
+        first = send_message(title="公告1", content="内容", is_broadcast=True)
+        personal = send_message(title="私信", content="内容", recipients=[self.user])
+        second = send_message(title="公告2", content="内容", is_broadcast=True)
+        Message.objects.filter(pk=first.pk).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(sync_broadcasts(self.user), 2)
+
+        inbox = list(get_user_messages(self.user))
+        self.assertEqual(
+            [um.message_id for um in inbox], [second.id, personal.id, first.id]
+        )
+        self.assertEqual(
+            inbox[-1].created_at, Message.objects.get(pk=first.pk).created_at
+        )
+        self.assertEqual(
+            BroadcastWatermark.objects.get(user=self.user).last_broadcast_id, second.id
+        )
+
+    def test_synced_inbox_costs_one_query(self):
+        """测试水位已是最新时只多一次查询."""
+        send_message(title="公告", content="内容", is_broadcast=True)
+        sync_broadcasts(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(sync_broadcasts(self.user), 0)
+
+    def test_legacy_fanned_out_rows_are_not_counted_twice(self):
+        """测试历史逐人投递的广播只推进水位, 不重复计数."""
+        legacy = Message.objects.create(
+            title="历史公告", content="内容", is_broadcast=True
+        )
+        UserMessage.objects.create(user=self.user, message=legacy)
+        reconcile_inbox_counters()
+        fresh = send_message(title="新公告", content="内容", is_broadcast=True)
+
+        self.assertEqual(sync_broadcasts(self.user), 1)
+
+        self.assertEqual(
+            BroadcastWatermark.objects.get(user=self.user).last_broadcast_id, fresh.id
+        )
+        self.assertEqual(get_message_stats(self.user)["unread"], 2)
+        self.assertEqual(reconcile_inbox_counters(), 0)
+
+    def test_read_and_deleted_state_is_preserved(self):
+        """测试已读与删除状态不会被重新同步覆盖."""
+        read = send_message(title="已读", content="内容", is_broadcast=True)
+        deleted = send_message(title="删除", content="内容", is_broadcast=True)
+
+        self.assertEqual(mark_as_read(self.user, [read.id]), 1)
+        self.assertEqual(delete_messages(self.user, [deleted.id]), 1)
+        send_message(title="新公告", content="内容", is_broadcast=True)
+
+        stats = get_message_stats(self.user)
+        self.assertEqual((stats["total"], stats["unread"]), (2, 1))
+        self.assertTrue(UserMessage.objects.get(user=self.user, message=read).is_read)
+
+    def test_users_joined_after_broadcast_do_not_receive_it(self):
+        """测试广播之后注册的用户不会收到旧广播."""
+        message = send_message(title="旧公告", content="内容", is_broadcast=True)
+        Message.objects.filter(pk=message.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+
+        self.assertEqual(get_unread_count(self.user), 0)
+        self.assertEqual(Message.objects.get(pk=message.pk).get_recipient_count(), 0)
+
+
+class InboxCounterTests(TestCase):
+    """收件箱计数测试."""
+
+    def setUp(self):
+        """设置测试数据."""
+        self.user = User.objects.create_user(username="badge", email="b@example.com")
+        self.other = User.objects.create_user(username="other", email="o@example.com")
+        self.system = [
+            send_message(title=f"系统{i}", content="内容", recipients=[self.user])
+            for i in range(3)
+        ]
+        self.payment = send_message(
+            title="支付",
+            content="内容",
+            message_type=Message.MessageType.PAYMENT,
+            recipients=[self.user, self.other, self.user],
+        )
+
+    def test_stats_read_counters_without_scanning_messages(self):
+        """测试统计只读取计数行."""
+        with self.assertNumQueries(2):
+            stats = get_message_stats(self.user)
+
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["unread"], 4)
+        self.assertEqual(stats["type_counts"], {"system": 3, "payment": 1})
+        self.assertEqual(get_unread_count(self.other), 1)
+
+    def test_state_changes_keep_counters_exact(self):
+        """测试已读/未读/删除的增量与重新计算一致."""
+        mark_as_read(self.user, [self.system[0].id, self.payment.id])
+        mark_as_unread(self.user, [self.payment.id])
+        delete_messages(self.user, [self.system[1].id, self.system[0].id])
+
+        stats = get_message_stats(self.user)
+        self.assertEqual((stats["total"], stats["unread"]), (2, 2))
+        self.assertEqual(get_unread_count(self.user, Message.MessageType.SYSTEM), 1)
+        self.assertEqual(reconcile_inbox_counters(), 0)
+
+    def test_reconcile_repairs_drift(self):
+        """测试校准任务修正绕过服务层的修改."""
+        UserMessage.objects.filter(user=self.user).update(is_read=True)
+        InboxCounter.objects.filter(user=self.other).delete()
+
+        self.assertEqual(reconcile_inbox_counters(), 3)
+        self.assertEqual(get_unread_count(self.user), 0)
+        self.assertEqual(get_message_stats(self.other)["total"], 1)
+
+
+class ArchiveUserMessagesTests(TestCase):
+    """归档保留期外的消息测试."""
+
+    def setUp(self):
+        """创建不同类型与状态的旧消息."""
+        self.user = User.objects.create_user(username="archiver")
+        self.messages = {
+            name: send_message(
+                title=name,
+                content="内容",
+                message_type=message_type,
+                recipients=[self.user],
+            )
+            for name, message_type in [
+                ("old_read_points", Message.MessageType.POINTS),
+                ("old_unread_points", Message.MessageType.POINTS),
+                ("old_read_personal", Message.MessageType.PERSONAL),
+                ("old_deleted_system", Message.MessageType.SYSTEM),
+                ("recent_read_points", Message.MessageType.POINTS),
+            ]
+        }
+        ids = {name: message.id for name, message in self.messages.items()}
+        mark_as_read(
+            self.user,
+            [
+                ids["old_read_points"],
+                ids["old_read_personal"],
+                ids["recent_read_points"],
+            ],
+        )
+        delete_messages(self.user, [ids["old_deleted_system"]])
+        UserMessage.objects.exclude(message_id=ids["recent_read_points"]).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+
+    def test_archives_per_retention_policy(self):
+        """只归档过期的已读/已删除消息, 计数与收件箱随之更新."""
+        result = archive_user_messages(batch_size=1)
+
+        self.assertEqual(result, {"batches": 2, "archived": 2})
+        self.assertEqual(
+            set(ArchivedUserMessage.objects.values_list("message__title", flat=True)),
+            {"old_read_points", "old_deleted_system"},
+        )
+        self.assertEqual(
+            {um.message.title for um in get_user_messages(self.user)},
+            {"old_unread_points", "old_read_personal", "recent_read_points"},
+        )
+        self.assertEqual(
+            [um.message.title for um in get_message_history(self.user)],
+            ["old_read_points"],
+        )
+        stats = get_message_stats(self.user)
+        self.assertEqual((stats["total"], stats["unread"]), (3, 1))
+        self.assertEqual(reconcile_inbox_counters([self.user.pk]), 0)
+        self.assertEqual(archive_user_messages()["archived"], 0)
+
+    def test_archived_legacy_broadcast_is_not_resynced(self):
+        """归档历史逐人投递的广播时推进水位, 同步不会把它重新插入为未读."""
+        legacy = Message.objects.create(
+            title="历史公告", content="内容", is_broadcast=True
+        )
+        Message.objects.filter(pk=legacy.pk).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        self.user.date_joined = timezone.now() - timedelta(days=500)
+        self.user.save(update_fields=["date_joined"])
+        UserMessage.objects.create(user=self.user, message=legacy, is_read=True)
+        UserMessage.objects.filter(message=legacy).update(
+            created_at=timezone.now() - timedelta(days=400)
+        )
+        reconcile_inbox_counters([self.user.pk])
+
+        archive_user_messages()
+
+        self.assertTrue(
+            ArchivedUserMessage.objects.filter(message=legacy, user=self.user).exists()
+        )
+        self.assertEqual(
+            BroadcastWatermark.objects.get(user=self.user).last_broadcast_id, legacy.id
+        )
+        self.assertEqual(sync_broadcasts(self.user), 0)
+        self.assertFalse(UserMessage.objects.filter(message=legacy).exists())
+
+
+class ArchiveUserMessagesTransactionTests(TransactionTestCase):
+    """不包裹测试事务时的归档测试, 行锁与原子性依赖批次自身的事务."""
+
+    def setUp(self):
+        """创建一条过期的已读消息."""
+        self.user = User.objects.create_user(username="archiver")
+        message = send_message(title="old_read", content="内容", recipients=[self.user])
+        mark_as_read(self.user, [message.id])
+        UserMessage.objects.update(created_at=timezone.now() - timedelta(days=400))
+
+    def test_archives_outside_wrapping_transaction(self):
+        """每个批次在自己的事务中完成复制, 扣减与删除."""
+        self.assertFalse(connection.in_atomic_block)
+
+        self.assertEqual(archive_user_messages()["archived"], 1)
+
+        self.assertFalse(UserMessage.objects.exists())
+        self.assertEqual(ArchivedUserMessage.objects.count(), 1)
+        self.assertEqual(get_message_stats(self.user)["total"], 0)
+        self.assertEqual(reconcile_inbox_counters([self.user.pk]), 0)
+
+    def test_failed_batch_rolls_back(self):
+        """批次中途失败时, 归档副本与计数扣减一并回滚."""
+        adjust = InboxCounter.adjust
+
+        def adjust_then_fail(*args, **kwargs):
+            adjust(*args, **kwargs)
+            msg = "boom"
+            raise RuntimeError(msg)
+
+        with (
+            patch.object(InboxCounter, "adjust", side_effect=adjust_then_fail),
+            self.assertRaises(RuntimeError),
+        ):
+            archive_user_messages()
+
+        self.assertEqual(UserMessage.objects.count(), 1)
+        self.assertFalse(ArchivedUserMessage.objects.exists())
+        self.assertEqual(get_message_stats(self.user)["total"], 1)
+        self.assertEqual(reconcile_inbox_counters([self.user.pk]), 0)
@@ -0,0 +1,104 @@
+"""
+站内信实时推送视图 (Server-Sent Events).
+
+认证约定: 非浏览器客户端使用 Authorization 请求头; 浏览器先调用
+POST /api/v1/messages/events/ticket 获取短期票据, 以 ``?ticket=`` 建立连接.
+票据只用于建立连接, 连接期间不再校验. 服务端发送的每个块都带有新签发的票据
+作为 SSE ``id``, EventSource 断线或到期重连时会以 Last-Event-ID 请求头带回,
+因此原生自动重连无需客户端刷新票据; 只有重连失败 (401) 时才需重新申请.
+"""
+
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+
+from accounts.services.jwt_tokens import get_user_from_access_token
+
+from .events import get_user_from_stream_ticket, inbox_events, issue_stream_ticket
+from .services import get_unread_count
+
+# 心跳间隔, 需小于反向代理的空闲超时
+HEARTBEAT_SECONDS = 15
+# 单个连接的最长时长, 到期后由客户端 (EventSource) 自动重连, 避免长期占用 worker;
+# 重连凭最近一次 id 中的票据认证, 见模块说明
+MAX_STREAM_SECONDS = 300
+# 断线后客户端的重连等待 (毫秒)
+RETRY_MILLISECONDS = 3000
+
+
+def _format_event(event_type: str, data: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_id(user) -> str:
+    """以新票据作为 SSE id, 供重连时经 Last-Event-ID 带回."""
+    return f"id: {issue_stream_ticket(user)}\n"
+
+
+def _authenticate(request):
+    """依次尝试 Authorization 请求头, Last-Event-ID 与 ``ticket`` 查询参数."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return get_user_from_access_token(token)
+    return get_user_from_stream_ticket(
+        request.headers.get("Last-Event-ID", "")
+    ) or get_user_from_stream_ticket(request.GET.get("ticket", ""))
+
+
+async def _event_stream(user, unread):
+    subscription = inbox_events.subscribe(user.pk)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n"
+        yield _stream_id(user) + _format_event("unread", {"count": unread})
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(HEARTBEAT_SECONDS, remaining)
+                )
+            except TimeoutError:
+                inbox_events.record_heartbeat()
+                # 仅含 id 的块不会触发客户端事件, 但会刷新重连票据
+                yield _stream_id(user) + "\n"
+                continue
+            yield _stream_id(user) + _format_event(event["type"], event)
+        yield _stream_id(user) + "\n"
+    finally:
+        inbox_events.unsubscribe(subscription)
+
+
+async def message_events_view(request):
+    """
+    推送当前用户的未读数变化与新消息 ID.
+
+    需经 config.asgi 提供服务 (生产环境为 gunicorn + uvicorn worker);
+    首个事件为当前未读数, 之后为增量事件. 认证与重连约定见模块说明.
+    """
+    if request.method != "GET":
+        return JsonResponse(
+            {"code": "method_not_allowed", "message": "Only GET is allowed."},
+            status=405,
+        )
+
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse(
+            {
+                "code": "invalid_token",
+                "message": "The token is invalid or has expired.",
+            },
+            status=401,
+        )
+
+    unread = await sync_to_async(get_unread_count)(user)
+    response = StreamingHttpResponse(
+        _event_stream(user, unread), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # 跳过 GZipMiddleware 与 nginx 缓冲, 事件才能即时到达客户端
+    response["Content-Encoding"] = "identity"
+    response["X-Accel-Buffering"] = "no"
+    return response
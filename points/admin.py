@@ -6,9 +6,13 @@ from django.shortcuts import redirect, render
 from django.urls import path
 from django.utils.html import format_html
 
+from common.pagination import EstimatedCountPaginator
+
 from . import services
+from .exports import build_statement_response, filter_statement_queryset
 from .forms import GrantPointsForm
 from .models import (
+    ArchivedPointSource,
     ContributionCache,
     PendingPointGrant,
     PointAllocation,
@@ -20,9 +24,20 @@ from .models import (
     TransactionType,
     WithdrawalRequest,
     WithdrawalStatus,
+    annotate_wallet_balances,
 )
 
 
+class GenericPrefetchAdminMixin:
+    """列表页按 content type 批量加载 GenericForeignKey, 避免逐行查询所有者."""
+
+    generic_prefetch: tuple[str, ...] = ()
+
+    def get_queryset(self, request):
+        """Prefetch generic relations shown in the changelist."""
+        return super().get_queryset(request).prefetch_related(*self.generic_prefetch)
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     """Admin for Tag model."""
@@ -138,9 +153,11 @@ class WithdrawalInline(admin.TabularInline):
 
 
 @admin.register(PointWallet)
-class PointWalletAdmin(admin.ModelAdmin):
+class PointWalletAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for PointWallet model."""
 
+    generic_prefetch = ("owner",)
+
     list_display = (
         "id",
         "owner_display",
@@ -151,6 +168,8 @@ class PointWalletAdmin(admin.ModelAdmin):
     )
     list_filter = ("content_type", "created_at")
     search_fields = ("id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = (
         "content_type",
         "object_id",
@@ -162,6 +181,7 @@ class PointWalletAdmin(admin.ModelAdmin):
         "updated_at",
     )
     inlines = [PointSourceInline, PointTransactionInline, WithdrawalInline]
+    actions = ["export_statements"]
 
     fieldsets = (
         (
@@ -204,33 +224,60 @@ class PointWalletAdmin(admin.ModelAdmin):
 
     owner_display.short_description = "所有者"
 
+    def get_queryset(self, request):
+        """Annotate live balances so the changelist needs no per-row aggregates."""
+        return annotate_wallet_balances(super().get_queryset(request))
+
     def cash_balance(self, obj):
         """Display cash balance."""
+        if hasattr(obj, "cash_total"):
+            return obj.cash_total
         return obj.get_cash_balance()
 
     cash_balance.short_description = "现金积分"
+    cash_balance.admin_order_field = "cash_total"
 
     def gift_balance(self, obj):
         """Display gift balance."""
+        if hasattr(obj, "gift_total"):
+            return obj.gift_total
         return obj.get_gift_balance()
 
     gift_balance.short_description = "礼物积分"
+    gift_balance.admin_order_field = "gift_total"
 
     def total_balance(self, obj):
         """Display total balance."""
+        if hasattr(obj, "balance_total"):
+            return obj.balance_total
         return obj.get_total_balance()
 
     total_balance.short_description = "总积分"
+    total_balance.admin_order_field = "balance_total"
 
     def has_add_permission(self, request):
         """Disable add permission - wallets are created automatically."""
         return False
 
+    @admin.action(description="导出选中钱包的积分流水 (CSV)")
+    def export_statements(self, request, queryset):
+        """Stream the transactions of the selected wallets as CSV."""
+        transactions = filter_statement_queryset(
+            PointTransaction.objects.filter(wallet__in=queryset)
+        )
+        return build_statement_response(transactions, "csv", "wallet-statements")
+
 
 @admin.register(PointSource)
-class PointSourceAdmin(admin.ModelAdmin):
+class PointSourceAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for PointSource model."""
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    list_select_related = ("wallet", "tag")
+    generic_prefetch = ("wallet__owner",)
+
     list_display = (
         "id",
         "wallet_owner",
@@ -241,7 +288,7 @@ class PointSourceAdmin(admin.ModelAdmin):
         "reason",
         "created_at",
     )
-    list_filter = ("point_type", "tag", "created_at")
+    list_filter = ("point_type", "reference_type", "tag", "created_at")
     search_fields = ("reason", "reference_id", "wallet__id")
     readonly_fields = (
         "wallet",
@@ -251,6 +298,8 @@ class PointSourceAdmin(admin.ModelAdmin):
         "remaining_amount",
         "reason",
         "reference_id",
+        "reference_type",
+        "reference_pk",
         "expires_at",
         "created_by",
         "created_at",
@@ -275,10 +324,43 @@ class PointSourceAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(ArchivedPointSource)
+class ArchivedPointSourceAdmin(admin.ModelAdmin):
+    """Admin for ArchivedPointSource model (read-only)."""
+
+    list_display = (
+        "id",
+        "wallet",
+        "point_type",
+        "tag",
+        "original_amount",
+        "reason",
+        "created_at",
+        "archived_at",
+    )
+    list_filter = ("point_type", "archived_at")
+    search_fields = ("reason", "reference_id", "wallet__id")
+    ordering = ("-archived_at",)
+
+    def has_add_permission(self, request):
+        """Disable add permission - sources are archived by compaction."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Disable change permission."""
+        return False
+
+
 @admin.register(PointTransaction)
-class PointTransactionAdmin(admin.ModelAdmin):
+class PointTransactionAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for PointTransaction model."""
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    list_select_related = ("wallet",)
+    generic_prefetch = ("wallet__owner",)
+
     list_display = (
         "id",
         "wallet_owner",
@@ -289,7 +371,13 @@ class PointTransactionAdmin(admin.ModelAdmin):
         "description",
         "created_at",
     )
-    list_filter = ("transaction_type", "point_type", "tag", "created_at")
+    list_filter = (
+        "transaction_type",
+        "point_type",
+        "reference_type",
+        "tag",
+        "created_at",
+    )
     search_fields = ("description", "reference_id", "wallet__id")
     readonly_fields = (
         "wallet",
@@ -299,7 +387,10 @@ class PointTransactionAdmin(admin.ModelAdmin):
         "balance_after",
         "description",
         "reference_id",
+        "reference_type",
+        "reference_pk",
         "source",
+        "archived_source_id",
         "tag",
         "created_by",
         "created_at",
@@ -354,9 +445,12 @@ class PointTransactionAdmin(admin.ModelAdmin):
 
 
 @admin.register(WithdrawalRequest)
-class WithdrawalRequestAdmin(admin.ModelAdmin):
+class WithdrawalRequestAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for WithdrawalRequest model."""
 
+    list_select_related = ("wallet", "withdrawal_account")
+    generic_prefetch = ("wallet__owner",)
+
     list_display = (
         "id",
         "wallet_owner",
@@ -489,19 +583,20 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     @admin.action(description="批准选中的提现申请")
     def approve_selected(self, request, queryset):
         """Approve selected withdrawal requests."""
-        success_count = 0
-        for obj in queryset.filter(status=WithdrawalStatus.PENDING):
-            try:
-                services.approve_withdrawal(obj.id, request.user)
-                success_count += 1
-            except (services.WithdrawalError, services.InsufficientPointsError) as e:
-                self.message_user(
-                    request,
-                    f"提现申请 #{obj.id} 批准失败: {e}",
-                    level="error",
-                )
-        if success_count:
-            self.message_user(request, f"成功批准 {success_count} 个提现申请")
+        approved, errors = services.approve_withdrawals(
+            queryset.filter(status=WithdrawalStatus.PENDING).values_list(
+                "id", flat=True
+            ),
+            request.user,
+        )
+        for withdrawal_id, error in errors.items():
+            self.message_user(
+                request,
+                f"提现申请 #{withdrawal_id} 批准失败: {error}",
+                level="error",
+            )
+        if approved:
+            self.message_user(request, f"成功批准 {len(approved)} 个提现申请")
 
     @admin.action(description="拒绝选中的提现申请")
     def reject_selected(self, request, queryset):
@@ -523,19 +618,20 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     @admin.action(description="完成选中的提现申请")
     def complete_selected(self, request, queryset):
         """Complete selected withdrawal requests."""
-        success_count = 0
-        for obj in queryset.filter(status=WithdrawalStatus.APPROVED):
-            try:
-                services.complete_withdrawal(obj.id, request.user)
-                success_count += 1
-            except services.WithdrawalError as e:
-                self.message_user(
-                    request,
-                    f"提现申请 #{obj.id} 完成失败: {e}",
-                    level="error",
-                )
-        if success_count:
-            self.message_user(request, f"成功完成 {success_count} 个提现申请")
+        completed, errors = services.complete_withdrawals(
+            queryset.filter(status=WithdrawalStatus.APPROVED).values_list(
+                "id", flat=True
+            ),
+            request.user,
+        )
+        for withdrawal_id, error in errors.items():
+            self.message_user(
+                request,
+                f"提现申请 #{withdrawal_id} 完成失败: {error}",
+                level="error",
+            )
+        if completed:
+            self.message_user(request, f"成功完成 {len(completed)} 个提现申请")
 
 
 def grant_points_to_users_view(request):
@@ -705,9 +801,11 @@ admin_site.get_urls = get_urls
 
 
 @admin.register(PointAllocation)
-class PointAllocationAdmin(admin.ModelAdmin):
+class PointAllocationAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for PointAllocation model."""
 
+    generic_prefetch = ("initiator",)
+
     list_display = (
         "id",
         "initiator_display",
@@ -823,9 +921,14 @@ class PointAllocationAdmin(admin.ModelAdmin):
 
 
 @admin.register(PendingPointGrant)
-class PendingPointGrantAdmin(admin.ModelAdmin):
+class PendingPointGrantAdmin(GenericPrefetchAdminMixin, admin.ModelAdmin):
     """Admin for PendingPointGrant model."""
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    generic_prefetch = ("granter",)
+
     list_display = (
         "platform",
         "actor_login",
@@ -16,7 +16,10 @@ from .models import (
     PointAllocation,
     PointSource,
     PointType,
+    ReferenceType,
+    unexpired_sources_q,
 )
+from .references import format_reference_id
 from .services import (
     InsufficientPointsError,
     get_wallet_or_none,
@@ -24,6 +27,7 @@ from .services import (
     spend_points,
 )
 from .tag_operations import TagOperation
+from .tag_registry import filter_by_tag_slug
 
 logger = logging.getLogger(__name__)
 
@@ -413,8 +417,13 @@ class AllocationService:
             ),
             tag_slug=tag_slug,
             tag_is_null=tag_is_null,
-            reference_id=f"allocation_{allocation.id}",
+            reference_type=ReferenceType.ALLOCATION,
+            reference_pk=allocation.id,
             created_by=None,
+            optimistic=True,
+            idempotency_key=format_reference_id(
+                ReferenceType.ALLOCATION, allocation.id
+            ),
         )
 
     @staticmethod
@@ -437,7 +446,8 @@ class AllocationService:
                     if allocation.source_pool.tag
                     else None
                 ),
-                reference_id=f"allocation_{allocation.id}",
+                reference_type=ReferenceType.ALLOCATION,
+                reference_pk=allocation.id,
                 created_by=None,
             )
         except Exception:
@@ -471,7 +481,7 @@ class AllocationService:
             point_type=allocation.source_pool.point_type,
             reason=(f"贡献度奖励 ({allocation.start_month} - {allocation.end_month})"),
             tag=allocation.source_pool.tag,
-            reference_id=f"allocation_{allocation.id}",
+            reference_id=format_reference_id(ReferenceType.ALLOCATION, allocation.id),
             granter_type=allocation.initiator_type,
             granter_id=allocation.initiator_id,
             allocation=allocation,
@@ -769,6 +779,7 @@ class AllocationService:
             return 0
 
         sources_queryset = PointSource.objects.filter(
+            unexpired_sources_q(),
             wallet=wallet,
             point_type=point_type,
             remaining_amount__gt=0,
@@ -776,7 +787,7 @@ class AllocationService:
 
         if point_type == PointType.GIFT:
             if tag_slug:
-                sources_queryset = sources_queryset.filter(tag__slug=tag_slug)
+                sources_queryset = filter_by_tag_slug(sources_queryset, tag_slug)
             elif tag_is_null:
                 sources_queryset = sources_queryset.filter(tag__isnull=True)
 
@@ -794,7 +805,8 @@ class AllocationService:
             description=f"回退待领取积分 #{grant.id}",
             tag_slug=grant.tag.slug if grant.tag else None,
             tag_is_null=(grant.point_type == PointType.GIFT and grant.tag is None),
-            reference_id=f"pending_grant_rollback:{grant.id}",
+            reference_type=ReferenceType.PENDING_GRANT_ROLLBACK,
+            reference_pk=grant.id,
             created_by=None,
         )
 
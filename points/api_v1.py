@@ -10,9 +10,8 @@ from decimal import Decimal
 from json import JSONDecodeError
 
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Min, Sum
 from django.shortcuts import get_object_or_404
-from ninja import Router, Schema
+from ninja import Query, Router, Schema
 
 from accounts.api_v1 import jwt_bearer_auth
 from accounts.models import Organization, OrganizationMembership, User
@@ -29,16 +28,23 @@ from contributions.services import ContributionDataUnavailableError
 
 from . import services
 from .allocation_services import AllocationService
+from .exports import EXPORT_FORMATS, build_statement_response, filter_statement_queryset
 from .forms import WithdrawalRequestForm
 from .models import (
     PointAllocation,
     PointSource,
     PointTransaction,
     PointType,
+    ReferenceType,
     Tag,
     TransactionType,
     WithdrawalRequest,
+    unexpired_sources_q,
 )
+from .pools import get_user_pools
+from .prefetch import prefetch_generic
+from .rollups import STATS_GRANULARITIES, get_wallet_stats
+from .tag_registry import filter_by_tag_slug
 
 router = Router(tags=["points"], auth=jwt_bearer_auth)
 
@@ -93,6 +99,44 @@ def _validation_detail(field: str, message: str, code: str = "invalid") -> dict:
     return {field: [{"message": message, "code": code}]}
 
 
+def _wallet_stats_response(wallet, granularity: str, filters: dict) -> dict:
+    if granularity not in STATS_GRANULARITIES:
+        raise ApiError(
+            "validation_error",
+            422,
+            "Request validation failed.",
+            _validation_detail("granularity", 'Granularity must be "day" or "month".'),
+        )
+    response = get_wallet_stats(wallet, granularity=granularity, **filters)
+    response["granularity"] = granularity
+    return response
+
+
+def _statement_export_response(
+    wallet,
+    filename: str,
+    export_format: str,
+    filters: dict,
+):
+    if export_format not in EXPORT_FORMATS:
+        raise ApiError(
+            "validation_error",
+            422,
+            "Request validation failed.",
+            _validation_detail("format", 'Format must be "csv" or "jsonl".'),
+        )
+    transactions = (
+        wallet.transactions.all()
+        if wallet is not None
+        else PointTransaction.objects.none()
+    )
+    return build_statement_response(
+        filter_statement_queryset(transactions, **filters),
+        export_format,
+        filename,
+    )
+
+
 def _serialize_transaction(transaction: PointTransaction) -> dict:
     return {
         "id": transaction.id,
@@ -102,7 +146,9 @@ def _serialize_transaction(transaction: PointTransaction) -> dict:
         "balance_after": transaction.balance_after,
         "description": transaction.description,
         "reference_id": transaction.reference_id,
-        "source_id": transaction.source_id,
+        "reference_type": transaction.reference_type,
+        "reference_pk": transaction.reference_pk,
+        "source_id": transaction.resolved_source_id,
         "tag": (
             {
                 "id": transaction.tag_id,
@@ -171,31 +217,6 @@ def _build_source_selector(owner, point_type: str, tag_slug: str | None) -> dict
     }
 
 
-def _serialize_pool(
-    owner,
-    point_type: str,
-    tag_slug: str | None,
-    tag_name: str | None,
-    available_balance: int,
-) -> dict:
-    return {
-        "owner_type": "organization" if isinstance(owner, Organization) else "user",
-        "owner_slug": owner.slug if isinstance(owner, Organization) else None,
-        "owner_name": owner.name if isinstance(owner, Organization) else owner.username,
-        "point_type": point_type,
-        "tag": (
-            {
-                "slug": tag_slug,
-                "name": tag_name,
-            }
-            if point_type == PointType.GIFT
-            else None
-        ),
-        "available_balance": available_balance,
-        "source_selector": _build_source_selector(owner, point_type, tag_slug),
-    }
-
-
 def _serialize_allocation(allocation: PointAllocation) -> dict:
     source_owner = allocation.source_pool.wallet.owner
     pending_grants = list(allocation.pending_grants.select_related("tag").all())
@@ -369,6 +390,7 @@ def _resolve_source_pool(
             "The requested point pool was not found.",
         )
     sources = PointSource.objects.filter(
+        unexpired_sources_q(),
         wallet=wallet,
         point_type=selector.point_type,
         remaining_amount__gt=0,
@@ -378,7 +400,7 @@ def _resolve_source_pool(
         if selector.tag_slug is None:
             sources = sources.filter(tag__isnull=True)
         else:
-            sources = sources.filter(tag__slug=selector.tag_slug)
+            sources = filter_by_tag_slug(sources, selector.tag_slug)
 
     representative_source = sources.order_by("created_at", "id").first()
     available_balance = sum(source.remaining_amount for source in sources)
@@ -615,7 +637,7 @@ def _wallet_response(owner) -> dict:
             )[:10]
         )
     return {
-        "balance": services.get_detailed_balance_or_zero(owner),
+        "balance": services.get_wallet_detailed_balance(wallet),
         "wallet_id": wallet_id,
         "recent_transactions": [
             _serialize_transaction(txn) for txn in recent_transactions
@@ -636,6 +658,8 @@ def current_user_transactions_endpoint(
     transaction_type: str = "",
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
 ):
     """List the current user's points transactions."""
     wallet = services.get_wallet_or_none(request.auth)
@@ -649,7 +673,12 @@ def current_user_transactions_endpoint(
     if transaction_type:
         transactions = transactions.filter(transaction_type=transaction_type)
     page_obj = paginate_queryset(
-        transactions, page=page, page_size=page_size, max_page_size=100
+        transactions,
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     response = build_paginated_response(
         page_obj,
@@ -662,24 +691,106 @@ def current_user_transactions_endpoint(
     return response
 
 
+@router.get("/me/transactions/export")
+def current_user_transactions_export_endpoint(
+    request,
+    export_format: str = Query("csv", alias="format"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    point_type: str = "",
+    transaction_type: str = "",
+):
+    """Stream the current user's full statement as CSV or JSONL."""
+    return _statement_export_response(
+        services.get_wallet_or_none(request.auth),
+        f"statement-user-{request.auth.id}",
+        export_format,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "point_type": point_type,
+            "transaction_type": transaction_type,
+        },
+    )
+
+
+@router.get("/me/stats")
+def current_user_stats_endpoint(
+    request,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    granularity: str = "month",
+    point_type: str = "",
+    tag_slug: str = "",
+):
+    """Return earned/spent statistics from the daily ledger rollups."""
+    return _wallet_stats_response(
+        services.get_wallet_or_none(request.auth),
+        granularity,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "point_type": point_type,
+            "tag_slug": tag_slug,
+        },
+    )
+
+
 @router.get("/me/withdrawals")
-def current_user_withdrawals_endpoint(request, page: int = 1, page_size: int = 20):
+def current_user_withdrawals_endpoint(
+    request,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
+):
     """List the current user's withdrawal requests."""
     wallet = services.get_wallet_or_none(request.auth)
     withdrawals = (
-        wallet.withdrawals.select_related("withdrawal_account").order_by("-created_at")
+        wallet.withdrawals.select_related("wallet", "withdrawal_account").order_by(
+            "-created_at"
+        )
         if wallet is not None
         else WithdrawalRequest.objects.none()
     )
     page_obj = paginate_queryset(
-        withdrawals, page=page, page_size=page_size, max_page_size=100
+        withdrawals,
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     return build_paginated_response(
         page_obj,
-        [_serialize_withdrawal(item) for item in page_obj.object_list],
+        [
+            _serialize_withdrawal(item)
+            for item in prefetch_generic(page_obj.object_list, "wallet__owner")
+        ],
     )
 
 
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+
+
+def _idempotency_key(request, scope: str) -> str:
+    """Namespace the client ``Idempotency-Key`` header for the service layer."""
+    key = request.headers.get("Idempotency-Key", "").strip()
+    if not key:
+        return ""
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ApiError(
+            "validation_error",
+            422,
+            "Request validation failed.",
+            _validation_detail(
+                "Idempotency-Key",
+                f"Ensure this value has at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters.",
+            ),
+        )
+    return f"api:{scope}:{key}"
+
+
 @router.post(
     "/me/withdrawals",
     response={
@@ -712,6 +823,9 @@ def current_user_withdrawal_create_endpoint(request):
                 amount=amount,
                 invoice_file=invoice_file,
                 withdrawal_account_id=int(withdrawal_account_id),
+                idempotency_key=_idempotency_key(
+                    request, f"withdrawal:user:{request.auth.pk}"
+                ),
             )
         except ValueError as exc:
             raise ApiError("validation_error", 422, str(exc))
@@ -739,6 +853,9 @@ def current_user_withdrawal_create_endpoint(request):
             bank_name=form.cleaned_data["bank_name"],
             bank_account=form.cleaned_data["bank_account"],
             invoice_file=invoice_file or form.cleaned_data.get("invoice_file"),
+            idempotency_key=_idempotency_key(
+                request, f"withdrawal:user:{request.auth.pk}"
+            ),
         )
     except (services.InsufficientPointsError, services.WithdrawalError) as exc:
         _raise_points_service_error(str(exc))
@@ -793,6 +910,8 @@ def organization_transactions_endpoint(
     transaction_type: str = "",
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
 ):
     """List organization transactions for current members."""
     organization, membership = _get_org_member_or_error(request.auth, slug)
@@ -807,7 +926,12 @@ def organization_transactions_endpoint(
     if transaction_type:
         transactions = transactions.filter(transaction_type=transaction_type)
     page_obj = paginate_queryset(
-        transactions, page=page, page_size=page_size, max_page_size=100
+        transactions,
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     response = build_paginated_response(
         page_obj,
@@ -826,24 +950,87 @@ def organization_transactions_endpoint(
     return response
 
 
+@router.get("/organizations/{slug}/transactions/export")
+def organization_transactions_export_endpoint(
+    request,
+    slug: str,
+    export_format: str = Query("csv", alias="format"),
+    start_date: date | None = None,
+    end_date: date | None = None,
+    point_type: str = "",
+    transaction_type: str = "",
+):
+    """Stream an organization's full statement for admins."""
+    organization, _membership = _get_org_admin_or_error(request.auth, slug)
+    return _statement_export_response(
+        services.get_wallet_or_none(organization),
+        f"statement-{organization.slug}",
+        export_format,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "point_type": point_type,
+            "transaction_type": transaction_type,
+        },
+    )
+
+
+@router.get("/organizations/{slug}/stats")
+def organization_stats_endpoint(
+    request,
+    slug: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    granularity: str = "month",
+    point_type: str = "",
+    tag_slug: str = "",
+):
+    """Return organization pool statistics from the daily ledger rollups."""
+    organization, _membership = _get_org_member_or_error(request.auth, slug)
+    response = _wallet_stats_response(
+        services.get_wallet_or_none(organization),
+        granularity,
+        {
+            "start_date": start_date,
+            "end_date": end_date,
+            "point_type": point_type,
+            "tag_slug": tag_slug,
+        },
+    )
+    response["organization"] = {"slug": organization.slug, "name": organization.name}
+    return response
+
+
 @router.get("/organizations/{slug}/withdrawals")
 def organization_withdrawals_endpoint(
-    request, slug: str, page: int = 1, page_size: int = 20
+    request,
+    slug: str,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
 ):
     """List withdrawal requests for an organization."""
     organization, membership = _get_org_admin_or_error(request.auth, slug)
     wallet = services.get_wallet_or_none(organization)
     page_obj = paginate_queryset(
-        wallet.withdrawals.order_by("-created_at")
+        wallet.withdrawals.select_related("wallet", "withdrawal_account").order_by(
+            "-created_at"
+        )
         if wallet is not None
         else WithdrawalRequest.objects.none(),
         page=page,
         page_size=page_size,
         max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     response = build_paginated_response(
         page_obj,
-        [_serialize_withdrawal(item) for item in page_obj.object_list],
+        [
+            _serialize_withdrawal(item)
+            for item in prefetch_generic(page_obj.object_list, "wallet__owner")
+        ],
     )
     response["organization"] = {"slug": organization.slug, "name": organization.name}
     response["membership"] = {
@@ -887,6 +1074,9 @@ def organization_withdrawal_create_endpoint(request, slug: str):
             bank_name=form.cleaned_data["bank_name"],
             bank_account=form.cleaned_data["bank_account"],
             invoice_file=invoice_file or form.cleaned_data.get("invoice_file"),
+            idempotency_key=_idempotency_key(
+                request, f"withdrawal:org:{organization.pk}"
+            ),
         )
     except (services.InsufficientPointsError, services.WithdrawalError) as exc:
         _raise_points_service_error(str(exc))
@@ -920,36 +1110,7 @@ def organization_withdrawal_cancel_endpoint(request, slug: str, withdrawal_id: i
 @router.get("/pools")
 def point_pools_endpoint(request):
     """List aggregated point pools available to the current user."""
-    owners = [request.auth]
-    owners.extend(
-        membership.organization
-        for membership in request.auth.organization_memberships.filter(
-            role__in=["owner", "admin"]
-        ).select_related("organization")
-    )
-
-    items = []
-    for owner in owners:
-        wallet = services.get_wallet_or_none(owner)
-        if wallet is None:
-            continue
-        rows = (
-            PointSource.objects.filter(wallet=wallet, remaining_amount__gt=0)
-            .values("point_type", "tag__slug", "tag__name")
-            .annotate(available_balance=Sum("remaining_amount"), first_id=Min("id"))
-            .order_by("point_type", "tag__slug")
-        )
-        for row in rows:
-            items.append(
-                _serialize_pool(
-                    owner,
-                    row["point_type"],
-                    row["tag__slug"],
-                    row["tag__name"],
-                    row["available_balance"],
-                )
-            )
-    return {"items": items}
+    return {"items": get_user_pools(request.auth)}
 
 
 @router.get("/tags")
@@ -1119,17 +1280,19 @@ def _user_is_allocation_beneficiary(user, allocation: PointAllocation) -> bool:
     """
     判断 user 是否为该次分配的受益人.
 
-    依据当前用户钱包中是否存在 reference_id=allocation_{id} 的 EARN 类型交易,
+    依据当前用户钱包中是否存在关联该分配的 EARN 类型交易,
     覆盖以下两种场景:
     1. 分配执行时即被直接发放积分的已注册受益人
     2. 分配生成的待领取记录被该用户后续认领后发放的积分
     """
-    user_ct = ContentType.objects.get_for_model(user)
+    wallet = services.get_wallet_or_none(user)
+    if wallet is None:
+        return False
     return PointTransaction.objects.filter(
-        wallet__content_type=user_ct,
-        wallet__object_id=user.id,
+        wallet=wallet,
+        reference_type=ReferenceType.ALLOCATION,
+        reference_pk=allocation.id,
         transaction_type=TransactionType.EARN,
-        reference_id=f"allocation_{allocation.id}",
     ).exists()
 
 
@@ -1204,7 +1367,7 @@ def allocation_summary_endpoint(request, allocation_id: int):
 
     访问条件 (满足任一):
     1. 该用户为分配发起者 / 积分池所有者 / 组织 OWNER|ADMIN (复用 _user_can_access_allocation)
-    2. 该用户为该次分配的受益人 (拥有 reference_id=allocation_{id} 的 EARN 交易)
+    2. 该用户为该次分配的受益人 (拥有关联该分配的 EARN 交易)
 
     返回字段刻意精简, 避免受益人看到他人收入或本次分配总额.
     """
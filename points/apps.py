@@ -8,3 +8,8 @@ class PointsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "points"
+
+    def ready(self):
+        """Import signal handlers when app is ready."""
+        super().ready()
+        import points.signals  # noqa: F401
@@ -0,0 +1,117 @@
+"""Benchmark concurrent spends against a single pool wallet."""
+
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+
+from accounts.models import Organization
+from points import services
+from points.models import PointType
+
+MODES = ("optimistic", "locking")
+
+
+class Command(BaseCommand):
+    """Benchmark concurrent spends against a single pool wallet."""
+
+    help = "并发消费压测: N 个线程同时消费同一组织积分池, 对比乐观扣减与行锁扣减"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument("--workers", type=int, default=8, help="并发线程数")
+        parser.add_argument("--spends", type=int, default=50, help="每个线程的消费次数")
+        parser.add_argument("--amount", type=int, default=1, help="每次消费数量")
+        parser.add_argument(
+            "--sources", type=int, default=20, help="积分池中的积分来源数量"
+        )
+        parser.add_argument(
+            "--mode",
+            choices=[*MODES, "both"],
+            default="both",
+            help="扣减模式",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        workers = options["workers"]
+        spends = options["spends"]
+        amount = options["amount"]
+        sources = options["sources"]
+        if min(workers, spends, amount, sources) <= 0:
+            msg = "workers/spends/amount/sources 必须大于 0"
+            raise CommandError(msg)
+
+        modes = MODES if options["mode"] == "both" else (options["mode"],)
+        for mode in modes:
+            result = self._run(mode, workers, spends, amount, sources)
+            self.stdout.write(
+                f"[{mode}] workers={workers} spends={result['succeeded']}"
+                f" failed={result['failed']} elapsed={result['elapsed']:.3f}s"
+                f" throughput={result['throughput']:.1f}/s"
+            )
+            if not result["consistent"]:
+                msg = f"[{mode}] 余额校验失败: {result}"
+                raise CommandError(msg)
+
+    def _run(self, mode, workers, spends, amount, sources):
+        organization = Organization.objects.create(
+            name="Spend benchmark", slug=f"bench-spend-{uuid.uuid4().hex[:12]}"
+        )
+        total_spend = workers * spends * amount
+        per_source = -(-total_spend // sources)
+        for _ in range(sources):
+            services.grant_points(organization, per_source, PointType.CASH, "压测")
+        wallet = services.get_wallet_or_none(organization)
+
+        def worker():
+            succeeded = failed = 0
+            try:
+                for _ in range(spends):
+                    try:
+                        services.spend_points(
+                            organization,
+                            amount,
+                            PointType.CASH,
+                            "压测消费",
+                            optimistic=mode == "optimistic",
+                        )
+                        succeeded += 1
+                    except services.InsufficientPointsError:
+                        failed += 1
+            finally:
+                connection.close()
+            return succeeded, failed
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = [executor.submit(worker) for _ in range(workers)]
+                outcomes = [future.result() for future in results]
+            elapsed = time.perf_counter() - started
+
+            succeeded = sum(outcome[0] for outcome in outcomes)
+            remaining = (
+                wallet.sources.aggregate(total=Sum("remaining_amount"))["total"] or 0
+            )
+            spends_total = wallet.transactions.filter(amount__lt=0).aggregate(
+                total=Sum("amount")
+            )["total"]
+            spent = -(spends_total or 0)
+            return {
+                "succeeded": succeeded,
+                "failed": sum(outcome[1] for outcome in outcomes),
+                "elapsed": elapsed,
+                "throughput": succeeded / elapsed if elapsed else 0.0,
+                "consistent": (
+                    spent == succeeded * amount
+                    and remaining == per_source * sources - spent
+                    and not wallet.sources.filter(remaining_amount__lt=0).exists()
+                ),
+            }
+        finally:
+            wallet.delete()
+            organization.delete()
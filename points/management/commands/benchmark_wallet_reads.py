@@ -0,0 +1,95 @@
+"""Benchmark wallet read endpoints with and without the wallet id cache."""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from points import services
+from points.api_v1 import current_user_wallet_endpoint
+from points.models import PointType
+from points.wallet_ids import clear_wallet_ids, wallet_id_scope
+from shop.api_v1 import shop_item_list_endpoint
+
+MODES = ("uncached", "cached")
+ENDPOINTS = {
+    "/api/v1/points/me/wallet": current_user_wallet_endpoint,
+    "/api/v1/shop/items": shop_item_list_endpoint,
+}
+
+
+class Command(BaseCommand):
+    """Benchmark wallet read endpoints with and without the wallet id cache."""
+
+    help = "钱包读接口压测: 对比关闭与开启进程级钱包 id 缓存时的查询数与耗时"
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument(
+            "--requests", type=int, default=200, help="每个接口的请求次数"
+        )
+        parser.add_argument(
+            "--cache-size", type=int, default=10000, help="cached 模式的缓存条目上限"
+        )
+        parser.add_argument(
+            "--mode",
+            choices=[*MODES, "both"],
+            default="both",
+            help="缓存模式",
+        )
+
+    def handle(self, *args, **options):
+        """Execute the command."""
+        requests = options["requests"]
+        if requests <= 0 or options["cache_size"] <= 0:
+            msg = "requests/cache-size 必须大于 0"
+            raise CommandError(msg)
+
+        user = User.objects.create_user(
+            username=f"bench-wallet-{uuid.uuid4().hex[:12]}"
+        )
+        services.grant_points(user, 100, PointType.CASH, "压测")
+        services.grant_points(user, 50, PointType.GIFT, "压测")
+        modes = MODES if options["mode"] == "both" else (options["mode"],)
+        try:
+            for mode in modes:
+                cache_size = options["cache_size"] if mode == "cached" else 0
+                with override_settings(POINTS_WALLET_ID_CACHE_SIZE=cache_size):
+                    clear_wallet_ids()
+                    for path, endpoint in ENDPOINTS.items():
+                        result = self._run(user, path, endpoint, requests)
+                        self.stdout.write(
+                            f"[{mode}] {path} requests={requests}"
+                            f" queries/req={result['queries']:.2f}"
+                            f" avg={result['avg_ms']:.2f}ms"
+                        )
+        finally:
+            clear_wallet_ids()
+            services.get_wallet_or_none(user).delete()
+            user.delete()
+
+    def _run(self, user, path, endpoint, requests):
+        factory = RequestFactory()
+        # 预热一次, 使 ContentType 与钱包 id 缓存进入稳定状态
+        self._call(factory, user, path, endpoint)
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(requests):
+                self._call(factory, user, path, endpoint)
+        elapsed = time.perf_counter() - started
+        return {
+            "queries": len(ctx) / requests,
+            "avg_ms": elapsed * 1000 / requests,
+        }
+
+    @staticmethod
+    def _call(factory, user, path, endpoint):
+        request = factory.get(path)
+        request.auth = user
+        with wallet_id_scope():
+            endpoint(request)
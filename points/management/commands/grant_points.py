@@ -78,6 +78,12 @@ class Command(BaseCommand):
             default="",
             help="关联 ID",
         )
+        parser.add_argument(
+            "--idempotency-key",
+            type=str,
+            default="",
+            help="幂等键, 重复执行同一键不会重复发放",
+        )
 
     def handle(self, *args, **options):
         """Execute the command."""
@@ -123,6 +129,7 @@ class Command(BaseCommand):
                 tag_slug=tag_slug,
                 expires_at=expires_at,
                 reference_id=reference_id,
+                idempotency_key=self._idempotency_key(options),
             )
         except services.InvalidPointOperationError as e:
             raise CommandError(str(e)) from e
@@ -150,6 +157,12 @@ class Command(BaseCommand):
         self.stdout.write(f"    - 现金积分: {balance['cash']}")
         self.stdout.write(f"    - 礼物积分: {balance['gift']}")
 
+    @staticmethod
+    def _idempotency_key(options) -> str:
+        # 与 API 的 "api:{scope}:" 前缀区分, 避免命令行键与请求头键冲突
+        key = (options.get("idempotency_key") or "").strip()
+        return f"cli:grant:{key}" if key else ""
+
     def _get_owner(self, options):
         """Get owner (User or Organization) from options."""
         if options.get("user"):
@@ -0,0 +1,16 @@
+"""Middleware for the points application."""
+
+from .wallet_ids import wallet_id_scope
+
+
+class WalletIdCacheMiddleware:
+    """Scope the owner to wallet id cache to a single request."""
+
+    def __init__(self, get_response):
+        """Initialize the middleware with the given get_response callable."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Run the request inside a fresh wallet id scope."""
+        with wallet_id_scope():
+            return self.get_response(request)
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.9 on 2026-10-18 21:48
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+# 历史 reference_id 字符串格式 -> reference_type (迁移内联, 不依赖应用代码)
+LEGACY_REFERENCE_PATTERNS = [
+    ("allocation", re.compile(r"^allocation_(\d+)$")),
+    ("withdrawal", re.compile(r"^withdrawal:(\d+)$")),
+    ("withdrawal_refund", re.compile(r"^refund:withdrawal:(\d+)$")),
+    ("shop_item", re.compile(r"^shop:item:(\d+)$")),
+    ("outreach", re.compile(r"^outreach_(\d+)$")),
+    ("outreach_reward", re.compile(r"^outreach_reward_(\d+)$")),
+    ("pending_grant_rollback", re.compile(r"^pending_grant_rollback:(\d+)$")),
+]
+
+
+def _parse_legacy_reference(reference_id):
+    for reference_type, pattern in LEGACY_REFERENCE_PATTERNS:
+        match = pattern.match(reference_id)
+        if match:
+            return reference_type, int(match.group(1))
+    return None
+
+
+def backfill_typed_references(apps, schema_editor):
+    for model_name in ("PointSource", "PointTransaction"):
+        model = apps.get_model("points", model_name)
+        queryset = (
+            model.objects.exclude(reference_id="")
+            .filter(reference_type="")
+            .only("id", "reference_id")
+        )
+        batch = []
+        for row in queryset.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+            parsed = _parse_legacy_reference(row.reference_id)
+            if parsed is None:
+                continue
+            row.reference_type, row.reference_pk = parsed
+            batch.append(row)
+            if len(batch) >= BACKFILL_BATCH_SIZE:
+                model.objects.bulk_update(batch, ["reference_type", "reference_pk"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["reference_type", "reference_pk"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0007_add_refund_transaction_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pointsource',
+            name='reference_pk',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='关联对象ID'),
+        ),
+        migrations.AddField(
+            model_name='pointsource',
+            name='reference_type',
+            field=models.CharField(blank=True, choices=[('allocation', '积分分配'), ('withdrawal', '提现申请'), ('withdrawal_refund', '提现退回'), ('shop_item', '商城商品'), ('outreach', '人才触达'), ('outreach_reward', '触达阅读奖励'), ('pending_grant_rollback', '待领取回退')], max_length=30, verbose_name='关联类型'),
+        ),
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='reference_pk',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='关联对象ID'),
+        ),
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='reference_type',
+            field=models.CharField(blank=True, choices=[('allocation', '积分分配'), ('withdrawal', '提现申请'), ('withdrawal_refund', '提现退回'), ('shop_item', '商城商品'), ('outreach', '人才触达'), ('outreach_reward', '触达阅读奖励'), ('pending_grant_rollback', '待领取回退')], max_length=30, verbose_name='关联类型'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsource',
+            index=models.Index(fields=['wallet', 'reference_type', 'reference_pk'], name='idx_source_wallet_reference'),
+        ),
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['wallet', 'reference_type', 'reference_pk'], name='idx_txn_wallet_reference'),
+        ),
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['reference_type', 'reference_pk'], name='idx_txn_reference'),
+        ),
+        migrations.RunPython(
+            backfill_typed_references, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0008_typed_references'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPointSource',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='原积分来源ID')),
+                ('point_type', models.CharField(choices=[('cash', '现金积分'), ('gift', '礼物积分')], max_length=10, verbose_name='积分类型')),
+                ('original_amount', models.PositiveIntegerField(verbose_name='原始金额')),
+                ('reason', models.CharField(max_length=200, verbose_name='发放原因')),
+                ('reference_id', models.CharField(blank=True, max_length=100, verbose_name='关联ID')),
+                ('reference_type', models.CharField(blank=True, choices=[('allocation', '积分分配'), ('withdrawal', '提现申请'), ('withdrawal_refund', '提现退回'), ('shop_item', '商城商品'), ('outreach', '人才触达'), ('outreach_reward', '触达阅读奖励'), ('pending_grant_rollback', '待领取回退')], max_length=30, verbose_name='关联类型')),
+                ('reference_pk', models.PositiveBigIntegerField(blank=True, null=True, verbose_name='关联对象ID')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='过期时间')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+            ],
+            options={
+                'verbose_name': '归档积分来源',
+                'verbose_name_plural': '归档积分来源',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='pointsource',
+            name='points_poin_wallet__e9c576_idx',
+        ),
+        migrations.AddField(
+            model_name='pointtransaction',
+            name='archived_source_id',
+            field=models.BigIntegerField(blank=True, db_index=True, help_text='来源被归档后保留的原 PointSource ID', null=True, verbose_name='归档积分来源ID'),
+        ),
+        migrations.AddIndex(
+            model_name='pointsource',
+            index=models.Index(condition=models.Q(('remaining_amount__gt', 0)), fields=['wallet', 'point_type', 'created_at', 'id'], name='idx_source_live_fifo'),
+        ),
+        migrations.AddField(
+            model_name='archivedpointsource',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='创建者'),
+        ),
+        migrations.AddField(
+            model_name='archivedpointsource',
+            name='tag',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='points.tag', verbose_name='积分标签'),
+        ),
+        migrations.AddField(
+            model_name='archivedpointsource',
+            name='wallet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sources', to='points.pointwallet', verbose_name='所属钱包'),
+        ),
+    ]
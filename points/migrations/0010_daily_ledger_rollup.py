@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0009_archived_point_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_transaction_id', models.BigIntegerField(default=0, verbose_name='已汇总交易ID高水位')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '积分日报进度',
+                'verbose_name_plural': '积分日报进度',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyLedgerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='日期')),
+                ('transaction_type', models.CharField(choices=[('earn', '获取'), ('spend', '消费'), ('refund', '退回'), ('withdraw', '提现'), ('expire', '过期')], max_length=10, verbose_name='交易类型')),
+                ('point_type', models.CharField(choices=[('cash', '现金积分'), ('gift', '礼物积分')], max_length=10, verbose_name='积分类型')),
+                ('amount', models.BigIntegerField(default=0, verbose_name='金额合计')),
+                ('transaction_count', models.PositiveIntegerField(default=0, verbose_name='交易笔数')),
+                ('tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='points.tag', verbose_name='积分标签')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='points.pointwallet', verbose_name='所属钱包')),
+            ],
+            options={
+                'verbose_name': '积分流水日报',
+                'verbose_name_plural': '积分流水日报',
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tag__isnull', False)), fields=('wallet', 'day', 'transaction_type', 'point_type', 'tag'), name='unique_rollup_with_tag'), models.UniqueConstraint(condition=models.Q(('tag__isnull', True)), fields=('wallet', 'day', 'transaction_type', 'point_type'), name='unique_rollup_without_tag')],
+            },
+        ),
+    ]
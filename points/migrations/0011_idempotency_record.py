@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-18 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0010_daily_ledger_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=150, unique=True, verbose_name='幂等键')),
+                ('operation', models.CharField(choices=[('grant', '发放积分'), ('spend', '消费积分'), ('withdrawal', '提现申请'), ('withdrawal_refund', '提现退款')], max_length=20, verbose_name='操作')),
+                ('result_ids', models.JSONField(default=list, verbose_name='结果记录ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '积分幂等记录',
+                'verbose_name_plural': '积分幂等记录',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0011_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='ledgerrollupstate',
+            name='last_transaction_id',
+        ),
+        migrations.AddField(
+            model_name='ledgerrollupstate',
+            name='rolled_up_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='已汇总截止时间'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyledgerrollup',
+            index=models.Index(fields=['day'], name='points_rollup_day_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0012_rollup_by_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='参数指纹'),
+        ),
+        migrations.AlterField(
+            model_name='idempotencyrecord',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='创建时间'),
+        ),
+    ]
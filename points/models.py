@@ -4,6 +4,8 @@ from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class PointType(models.TextChoices):
@@ -42,6 +44,27 @@ class TransactionType(models.TextChoices):
     EXPIRE = "expire", "过期"
 
 
+class ReferenceType(models.TextChoices):
+    """Typed reference choices for ledger rows."""
+
+    ALLOCATION = "allocation", "积分分配"
+    WITHDRAWAL = "withdrawal", "提现申请"
+    WITHDRAWAL_REFUND = "withdrawal_refund", "提现退回"
+    SHOP_ITEM = "shop_item", "商城商品"
+    OUTREACH = "outreach", "人才触达"
+    OUTREACH_REWARD = "outreach_reward", "触达阅读奖励"
+    PENDING_GRANT_ROLLBACK = "pending_grant_rollback", "待领取回退"
+
+
+class IdempotentOperation(models.TextChoices):
+    """支持幂等键的积分操作."""
+
+    GRANT = "grant", "发放积分"
+    SPEND = "spend", "消费积分"
+    WITHDRAWAL = "withdrawal", "提现申请"
+    WITHDRAWAL_REFUND = "withdrawal_refund", "提现退款"
+
+
 class WithdrawalStatus(models.TextChoices):
     """Withdrawal status choices."""
 
@@ -52,6 +75,13 @@ class WithdrawalStatus(models.TextChoices):
     CANCELLED = "cancelled", "已取消"
 
 
+def unexpired_sources_q(now=None) -> models.Q:
+    """返回未过期积分来源的筛选条件 (可走 expires_at 索引)."""
+    return models.Q(expires_at__isnull=True) | models.Q(
+        expires_at__gt=now or timezone.now()
+    )
+
+
 class Tag(models.Model):
     """积分标签模型, 用于分类礼物积分来源和项目/用户范围筛选."""
 
@@ -148,6 +178,7 @@ class PointWallet(models.Model):
         """获取现金积分余额."""
         return (
             self.sources.filter(
+                unexpired_sources_q(),
                 point_type=PointType.CASH,
                 remaining_amount__gt=0,
             ).aggregate(total=models.Sum("remaining_amount"))["total"]
@@ -157,11 +188,14 @@ class PointWallet(models.Model):
     def get_gift_balance(self, tag_slug=None):
         """获取礼物积分余额, 可按标签筛选."""
         queryset = self.sources.filter(
+            unexpired_sources_q(),
             point_type=PointType.GIFT,
             remaining_amount__gt=0,
         )
         if tag_slug:
-            queryset = queryset.filter(tag__slug=tag_slug)
+            from .tag_registry import filter_by_tag_slug
+
+            queryset = filter_by_tag_slug(queryset, tag_slug)
         return queryset.aggregate(total=models.Sum("remaining_amount"))["total"] or 0
 
     def get_total_balance(self):
@@ -203,6 +237,17 @@ class PointSource(models.Model):
         help_text="用于关联外部系统的ID",
         db_index=True,
     )
+    reference_type = models.CharField(
+        max_length=30,
+        choices=ReferenceType.choices,
+        blank=True,
+        verbose_name="关联类型",
+    )
+    reference_pk = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="关联对象ID",
+    )
     expires_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -225,8 +270,17 @@ class PointSource(models.Model):
         verbose_name_plural = verbose_name
         ordering = ["created_at"]
         indexes = [
-            models.Index(fields=["wallet", "point_type", "remaining_amount"]),
+            # 仅索引仍有余额的来源, 按 FIFO 顺序; 已耗尽来源不再拖慢扫描
+            models.Index(
+                fields=["wallet", "point_type", "created_at", "id"],
+                condition=models.Q(remaining_amount__gt=0),
+                name="idx_source_live_fifo",
+            ),
             models.Index(fields=["expires_at"]),
+            models.Index(
+                fields=["wallet", "reference_type", "reference_pk"],
+                name="idx_source_wallet_reference",
+            ),
         ]
 
     def __str__(self):
@@ -238,6 +292,100 @@ class PointSource(models.Model):
         )
 
 
+def annotate_wallet_balances(queryset, now=None):
+    """
+    为钱包 queryset 标注 cash_total / gift_total / balance_total.
+
+    每个余额是一条按钱包关联的 Sum 子查询 (走 idx_source_live_fifo 部分索引),
+    列表页一次查询即可取得全部余额, 且可按余额排序.
+    """
+    live_sources = (
+        PointSource.objects.filter(
+            unexpired_sources_q(now),
+            wallet=models.OuterRef("pk"),
+            remaining_amount__gt=0,
+        )
+        .order_by()
+        .values("wallet")
+    )
+
+    def _sum(point_type):
+        return Coalesce(
+            models.Subquery(
+                live_sources.filter(point_type=point_type)
+                .annotate(total=models.Sum("remaining_amount"))
+                .values("total")
+            ),
+            0,
+        )
+
+    return queryset.annotate(
+        cash_total=_sum(PointType.CASH),
+        gift_total=_sum(PointType.GIFT),
+    ).annotate(balance_total=models.F("cash_total") + models.F("gift_total"))
+
+
+class ArchivedPointSource(models.Model):
+    """已耗尽积分来源的冷归档, 主键沿用原 PointSource ID."""
+
+    id = models.BigIntegerField(primary_key=True, verbose_name="原积分来源ID")
+    wallet = models.ForeignKey(
+        PointWallet,
+        on_delete=models.CASCADE,
+        related_name="archived_sources",
+        verbose_name="所属钱包",
+    )
+    point_type = models.CharField(
+        max_length=10,
+        choices=PointType.choices,
+        verbose_name="积分类型",
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="积分标签",
+    )
+    original_amount = models.PositiveIntegerField(verbose_name="原始金额")
+    reason = models.CharField(max_length=200, verbose_name="发放原因")
+    reference_id = models.CharField(max_length=100, blank=True, verbose_name="关联ID")
+    reference_type = models.CharField(
+        max_length=30,
+        choices=ReferenceType.choices,
+        blank=True,
+        verbose_name="关联类型",
+    )
+    reference_pk = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="关联对象ID",
+    )
+    expires_at = models.DateTimeField(null=True, blank=True, verbose_name="过期时间")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="创建者",
+    )
+    created_at = models.DateTimeField(verbose_name="创建时间")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="归档时间")
+
+    class Meta:
+        """Model metadata."""
+
+        verbose_name = "归档积分来源"
+        verbose_name_plural = verbose_name
+        ordering = ["created_at"]
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.get_point_type_display()} (归档): {self.original_amount}"
+
+
 class PointTransaction(models.Model):
     """积分交易记录模型, 不可变账本."""
 
@@ -267,6 +415,17 @@ class PointTransaction(models.Model):
         verbose_name="关联ID",
         db_index=True,
     )
+    reference_type = models.CharField(
+        max_length=30,
+        choices=ReferenceType.choices,
+        blank=True,
+        verbose_name="关联类型",
+    )
+    reference_pk = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="关联对象ID",
+    )
     source = models.ForeignKey(
         PointSource,
         on_delete=models.SET_NULL,
@@ -275,6 +434,13 @@ class PointTransaction(models.Model):
         related_name="transactions",
         verbose_name="积分来源",
     )
+    archived_source_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name="归档积分来源ID",
+        help_text="来源被归档后保留的原 PointSource ID",
+    )
     tag = models.ForeignKey(
         Tag,
         on_delete=models.SET_NULL,
@@ -303,6 +469,14 @@ class PointTransaction(models.Model):
             models.Index(fields=["wallet", "transaction_type"]),
             models.Index(fields=["wallet", "point_type"]),
             models.Index(fields=["created_at"]),
+            models.Index(
+                fields=["wallet", "reference_type", "reference_pk"],
+                name="idx_txn_wallet_reference",
+            ),
+            models.Index(
+                fields=["reference_type", "reference_pk"],
+                name="idx_txn_reference",
+            ),
         ]
 
     def __str__(self):
@@ -310,6 +484,21 @@ class PointTransaction(models.Model):
         sign = "+" if self.amount > 0 else ""
         return f"{self.get_transaction_type_display()}: {sign}{self.amount}"
 
+    @property
+    def resolved_source_id(self):
+        """返回来源 ID, 来源已归档时回退到归档 ID."""
+        return self.source_id or self.archived_source_id
+
+    def get_source(self):
+        """返回积分来源, 来源已归档时回退查询归档表."""
+        if self.source_id:
+            return self.source
+        if self.archived_source_id:
+            return ArchivedPointSource.objects.filter(
+                pk=self.archived_source_id
+            ).first()
+        return None
+
 
 class WithdrawalRequest(models.Model):
     """提现申请模型."""
@@ -710,3 +899,104 @@ class ContributionCache(models.Model):
     def __str__(self):
         """Return string representation."""
         return f"{self.github_login} @ {self.project_identifier}: {self.contribution_score}"
+
+
+class DailyLedgerRollup(models.Model):
+    """按钱包/日期/交易类型/积分类型/标签汇总的积分流水日报."""
+
+    wallet = models.ForeignKey(
+        PointWallet,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+        verbose_name="所属钱包",
+    )
+    day = models.DateField(verbose_name="日期")
+    transaction_type = models.CharField(
+        max_length=10,
+        choices=TransactionType.choices,
+        verbose_name="交易类型",
+    )
+    point_type = models.CharField(
+        max_length=10,
+        choices=PointType.choices,
+        verbose_name="积分类型",
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="积分标签",
+    )
+    amount = models.BigIntegerField(default=0, verbose_name="金额合计")
+    transaction_count = models.PositiveIntegerField(default=0, verbose_name="交易笔数")
+
+    class Meta:
+        """Model metadata."""
+
+        verbose_name = "积分流水日报"
+        verbose_name_plural = verbose_name
+        ordering = ["day"]
+        indexes = [models.Index(fields=["day"], name="points_rollup_day_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "day", "transaction_type", "point_type", "tag"],
+                condition=models.Q(tag__isnull=False),
+                name="unique_rollup_with_tag",
+            ),
+            models.UniqueConstraint(
+                fields=["wallet", "day", "transaction_type", "point_type"],
+                condition=models.Q(tag__isnull=True),
+                name="unique_rollup_without_tag",
+            ),
+        ]
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.day} {self.transaction_type}/{self.point_type}: {self.amount}"
+
+
+class LedgerRollupState(models.Model):
+    """日报汇总进度 (单行), 记录上次汇总的截止时间."""
+
+    rolled_up_until = models.DateTimeField(
+        null=True, blank=True, verbose_name="已汇总截止时间"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+
+    class Meta:
+        """Model metadata."""
+
+        verbose_name = "积分日报进度"
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        """Return string representation."""
+        return f"积分日报汇总至 {self.rolled_up_until}"
+
+
+class IdempotencyRecord(models.Model):
+    """积分操作幂等记录: 键唯一, 重放时直接返回首次执行的结果."""
+
+    key = models.CharField(max_length=150, unique=True, verbose_name="幂等键")
+    operation = models.CharField(
+        max_length=20, choices=IdempotentOperation.choices, verbose_name="操作"
+    )
+    fingerprint = models.CharField(
+        max_length=64, blank=True, default="", verbose_name="参数指纹"
+    )
+    result_ids = models.JSONField(default=list, verbose_name="结果记录ID")
+    created_at = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="创建时间"
+    )
+
+    class Meta:
+        """Model metadata."""
+
+        verbose_name = "积分幂等记录"
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        """Return string representation."""
+        return f"{self.get_operation_display()} {self.key}"
@@ -0,0 +1,166 @@
+"""Aggregated point pools available to a user, with a per-user cache."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils.crypto import get_random_string
+
+from accounts.models import Organization, OrganizationMembership, User
+
+from .models import PointSource, PointType, unexpired_sources_q
+
+POOLS_CACHE_KEY = "points:pools:user:{user_id}"
+POOLS_VERSION_KEY = "points:pools:owner:{content_type_id}:{object_id}"
+# 来源按时间自然过期不会主动失效缓存, 由较短的 TTL 兜底
+POOLS_CACHE_TIMEOUT = 60
+POOLS_VERSION_TIMEOUT = None
+
+POOL_ADMIN_ROLES = (
+    OrganizationMembership.Role.OWNER,
+    OrganizationMembership.Role.ADMIN,
+)
+
+
+def _version_key(content_type_id: int, object_id: int) -> str:
+    return POOLS_VERSION_KEY.format(
+        content_type_id=content_type_id, object_id=object_id
+    )
+
+
+def bump_pools_version(content_type_id: int, object_id: int) -> None:
+    """Invalidate cached pools of every user that can see the given owner."""
+    cache.set(
+        _version_key(content_type_id, object_id),
+        get_random_string(12),
+        POOLS_VERSION_TIMEOUT,
+    )
+
+
+def invalidate_owner_pools(content_type_id: int, object_id: int) -> None:
+    """在事务提交后使该所有者相关的积分池缓存失效."""
+    transaction.on_commit(lambda: bump_pools_version(content_type_id, object_id))
+
+
+def invalidate_wallet_pools(wallet) -> None:
+    """在事务提交后使钱包所有者相关的积分池缓存失效."""
+    invalidate_owner_pools(wallet.content_type_id, wallet.object_id)
+
+
+def _serialize_pool(  # noqa: PLR0913
+    owner_type: str,
+    owner_slug: str | None,
+    owner_name: str,
+    point_type: str,
+    tag_slug: str | None,
+    tag_name: str | None,
+    available_balance: int,
+) -> dict:
+    return {
+        "owner_type": owner_type,
+        "owner_slug": owner_slug,
+        "owner_name": owner_name,
+        "point_type": point_type,
+        "tag": (
+            {"slug": tag_slug, "name": tag_name}
+            if point_type == PointType.GIFT
+            else None
+        ),
+        "available_balance": available_balance,
+        "source_selector": {
+            "owner_type": owner_type,
+            "owner_slug": owner_slug,
+            "point_type": point_type,
+            "tag_slug": tag_slug,
+        },
+    }
+
+
+def _compute_pools(user: User, orgs: list[dict], user_ct: int, org_ct: int) -> list:
+    owners_q = Q(wallet__content_type_id=user_ct, wallet__object_id=user.id)
+    if orgs:
+        owners_q |= Q(
+            wallet__content_type_id=org_ct,
+            wallet__object_id__in=[org["organization_id"] for org in orgs],
+        )
+    rows = (
+        PointSource.objects.filter(
+            owners_q, unexpired_sources_q(), remaining_amount__gt=0
+        )
+        .values(
+            "wallet__content_type_id",
+            "wallet__object_id",
+            "point_type",
+            "tag__slug",
+            "tag__name",
+        )
+        .annotate(available_balance=Sum("remaining_amount"))
+        .order_by("point_type", "tag__slug")
+    )
+    grouped: dict[tuple[int, int], list] = {}
+    for row in rows:
+        key = (row["wallet__content_type_id"], row["wallet__object_id"])
+        grouped.setdefault(key, []).append(row)
+
+    owners = [((user_ct, user.id), "user", None, user.username)]
+    owners.extend(
+        (
+            (org_ct, org["organization_id"]),
+            "organization",
+            org["organization__slug"],
+            org["organization__name"],
+        )
+        for org in orgs
+    )
+    return [
+        _serialize_pool(
+            owner_type,
+            owner_slug,
+            owner_name,
+            row["point_type"],
+            row["tag__slug"],
+            row["tag__name"],
+            row["available_balance"],
+        )
+        for key, owner_type, owner_slug, owner_name in owners
+        for row in grouped.get(key, [])
+    ]
+
+
+def get_user_pools(user: User) -> list[dict]:
+    """
+    返回用户可支配的积分池 (本人钱包及其担任 owner/admin 的组织钱包).
+
+    所有候选所有者的积分来源通过一次分组查询聚合; 结果按用户缓存,
+    缓存中记录各所有者的版本号, 发放、消费、过期、退款或成员角色变化后版本变化即失效.
+    """
+    cache_key = POOLS_CACHE_KEY.format(user_id=user.id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        versions = cache.get_many(list(cached["versions"]))
+        if all(versions.get(key) == value for key, value in cached["versions"].items()):
+            return cached["items"]
+
+    orgs = list(
+        OrganizationMembership.objects.filter(user=user, role__in=POOL_ADMIN_ROLES)
+        .values("organization_id", "organization__slug", "organization__name")
+        .order_by("-joined_at")
+    )
+    user_ct = ContentType.objects.get_for_model(User).id
+    org_ct = ContentType.objects.get_for_model(Organization).id
+    owner_keys = [(user_ct, user.id)]
+    owner_keys.extend((org_ct, org["organization_id"]) for org in orgs)
+    version_keys = [_version_key(*key) for key in owner_keys]
+    # 版本号须在查询前读取, 避免覆盖查询期间发生的失效
+    current = cache.get_many(version_keys)
+
+    items = _compute_pools(user, orgs, user_ct, org_ct)
+    cache.set(
+        cache_key,
+        {
+            "versions": {key: current.get(key) for key in version_keys},
+            "items": items,
+        },
+        POOLS_CACHE_TIMEOUT,
+    )
+    return items
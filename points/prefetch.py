@@ -0,0 +1,17 @@
+"""Batch loading helpers for generic owner relations."""
+
+from django.db.models import prefetch_related_objects
+
+
+def prefetch_generic(objects, *lookups) -> list:
+    """
+    批量加载 GenericForeignKey (如 ``owner``, ``wallet__owner``, ``initiator``).
+
+    对象按 content type 分组, 每种类型只查询一次, 之后 ``obj.owner`` 等访问不再触发查询.
+    适用于已取出的对象列表 (如分页后的 ``page.object_list``);
+    queryset 可直接使用 ``prefetch_related(*lookups)``.
+    """
+    objects = list(objects)
+    if objects:
+        prefetch_related_objects(objects, *lookups)
+    return objects
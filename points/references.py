@@ -0,0 +1,69 @@
+"""
+Typed reference helpers for point ledger rows.
+
+``reference_id`` 曾是唯一的关联字段, 各业务以不同格式拼接字符串.
+新写入同时记录 ``reference_type`` + ``reference_pk``, 以便走索引精确查询;
+``reference_id`` 仍按旧格式写入, 保持对外展示与历史数据兼容.
+"""
+
+import re
+
+from .models import ReferenceType
+
+REFERENCE_ID_FORMATS = {
+    ReferenceType.ALLOCATION: "allocation_{pk}",
+    ReferenceType.WITHDRAWAL: "withdrawal:{pk}",
+    ReferenceType.WITHDRAWAL_REFUND: "refund:withdrawal:{pk}",
+    ReferenceType.SHOP_ITEM: "shop:item:{pk}",
+    ReferenceType.OUTREACH: "outreach_{pk}",
+    ReferenceType.OUTREACH_REWARD: "outreach_reward_{pk}",
+    ReferenceType.PENDING_GRANT_ROLLBACK: "pending_grant_rollback:{pk}",
+}
+
+_REFERENCE_ID_PATTERNS = [
+    (
+        reference_type,
+        re.compile("^" + re.escape(template).replace(r"\{pk\}", r"(\d+)") + "$"),
+    )
+    for reference_type, template in REFERENCE_ID_FORMATS.items()
+]
+
+
+def format_reference_id(reference_type, reference_pk) -> str:
+    """Build the legacy ``reference_id`` string for a typed reference."""
+    template = REFERENCE_ID_FORMATS.get(reference_type)
+    if template is None or reference_pk is None:
+        return ""
+    return template.format(pk=reference_pk)
+
+
+def parse_reference_id(reference_id) -> tuple[str, int | None]:
+    """
+    Parse a legacy ``reference_id`` into ``(reference_type, reference_pk)``.
+
+    无法识别的格式返回 ``("", None)``.
+    """
+    if not reference_id:
+        return "", None
+    for reference_type, pattern in _REFERENCE_ID_PATTERNS:
+        match = pattern.match(reference_id)
+        if match:
+            return reference_type.value, int(match.group(1))
+    return "", None
+
+
+def resolve_reference(
+    reference_id="", reference_type="", reference_pk=None
+) -> tuple[str, str, int | None]:
+    """
+    Normalize reference arguments into ``(reference_id, type, pk)``.
+
+    传入类型化引用时补全旧格式 ``reference_id``; 只传 ``reference_id`` 时
+    尝试解析出类型化引用.
+    """
+    if reference_type:
+        if not reference_id:
+            reference_id = format_reference_id(reference_type, reference_pk)
+        return reference_id, str(reference_type), reference_pk
+    parsed_type, parsed_pk = parse_reference_id(reference_id)
+    return reference_id or "", parsed_type, parsed_pk
@@ -1,25 +1,39 @@
 """Service layer for points application business logic."""
 
+import functools
+import hashlib
+import inspect
+import json
 import logging
 from collections import defaultdict
+from datetime import timedelta
 
 from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, Model, OuterRef, Q, Sum
 from django.utils import timezone
 
 from accounts.models import Organization, User, WithdrawalAccount
 
 from .models import (
+    ArchivedPointSource,
+    IdempotencyRecord,
+    IdempotentOperation,
+    PointAllocation,
     PointSource,
     PointTransaction,
     PointType,
     PointWallet,
-    Tag,
+    ReferenceType,
     TransactionType,
     WithdrawalRequest,
     WithdrawalStatus,
+    unexpired_sources_q,
 )
+from .pools import invalidate_owner_pools, invalidate_wallet_pools
+from .references import format_reference_id, resolve_reference
+from .tag_registry import filter_by_tag_slug, resolve_tag_id, tag_registry
+from .wallet_ids import get_cached_wallet_id, remember_wallet_id
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +50,166 @@ class WithdrawalError(Exception):
     """提现错误异常."""
 
 
+# 客户端传入的幂等键前缀 (API 请求头 / 管理命令); 仅这类记录按保留期清理,
+# 内部以业务关联 ID 为键的记录 (提现扣款/退款, 分配) 长期保留
+CLIENT_IDEMPOTENCY_PREFIXES = ("api:", "cli:")
+IDEMPOTENCY_RETENTION_DAYS = 30
+IDEMPOTENCY_PURGE_BATCH_SIZE = 1000
+
+
+def _fingerprint_value(value):
+    if isinstance(value, Model):
+        return f"{value._meta.label}:{value.pk}"
+    return str(value)
+
+
+def _idempotent(operation: str, *, dump, load, ignore: tuple[str, ...] = ()):
+    """
+    为积分操作增加可选的 ``idempotency_key`` 关键字参数.
+
+    首次执行时在同一事务内写入 IdempotencyRecord (key 唯一索引) 及参数指纹;
+    重放时不再校验余额或写入流水, 直接按记录加载首次结果.
+    并发重复请求由唯一索引拦截, 失败方回滚后同样返回首次结果.
+    同一键携带不同参数 (``ignore`` 中的参数除外) 重放时抛出异常.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def fingerprint(args, kwargs) -> str:
+            arguments = signature.bind(*args, **kwargs).arguments
+            payload = json.dumps(
+                {name: v for name, v in arguments.items() if name not in ignore},
+                sort_keys=True,
+                default=_fingerprint_value,
+            )
+            return hashlib.sha256(payload.encode()).hexdigest()
+
+        @functools.wraps(func)
+        def wrapper(*args, idempotency_key: str = "", **kwargs):
+            if not idempotency_key:
+                return func(*args, **kwargs)
+
+            digest = fingerprint(args, kwargs)
+            record = IdempotencyRecord.objects.filter(key=idempotency_key).first()
+            if record is None:
+                try:
+                    with transaction.atomic():
+                        result = func(*args, **kwargs)
+                        IdempotencyRecord.objects.create(
+                            key=idempotency_key,
+                            operation=operation,
+                            fingerprint=digest,
+                            result_ids=dump(result),
+                        )
+                except IntegrityError:
+                    record = IdempotencyRecord.objects.filter(
+                        key=idempotency_key
+                    ).first()
+                    if record is None:
+                        raise
+                else:
+                    return result
+
+            if record.operation != operation:
+                msg = f"幂等键已用于其他操作: {idempotency_key}"
+                raise InvalidPointOperationError(msg)
+            # 旧记录没有指纹, 跳过校验
+            if record.fingerprint and record.fingerprint != digest:
+                msg = f"幂等键已用于参数不同的请求: {idempotency_key}"
+                raise InvalidPointOperationError(msg)
+            logger.info("幂等重放: key=%s, operation=%s", idempotency_key, operation)
+            return load(record.result_ids)
+
+        return wrapper
+
+    return decorator
+
+
+def purge_idempotency_records(
+    *,
+    older_than_days: int = IDEMPOTENCY_RETENTION_DAYS,
+    batch_size: int = IDEMPOTENCY_PURGE_BATCH_SIZE,
+) -> int:
+    """
+    分批删除超过保留期的客户端幂等记录.
+
+    只清理 ``CLIENT_IDEMPOTENCY_PREFIXES`` 前缀的键; 超过保留期后同一键的
+    重试会被当作新请求执行, 保留期应远大于客户端的重试窗口.
+
+    Returns:
+        int: 删除的记录数
+
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    client_keys = Q()
+    for prefix in CLIENT_IDEMPOTENCY_PREFIXES:
+        client_keys |= Q(key__startswith=prefix)
+
+    deleted = 0
+    while True:
+        record_ids = list(
+            IdempotencyRecord.objects.filter(client_keys, created_at__lt=cutoff)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not record_ids:
+            break
+        deleted += IdempotencyRecord.objects.filter(id__in=record_ids).delete()[0]
+        if len(record_ids) < batch_size:
+            break
+
+    if deleted:
+        logger.info("幂等记录清理完成: deleted=%s", deleted)
+    return deleted
+
+
+def _load_source(ids: list[int]):
+    # 来源可能已被归档, 此时返回归档记录
+    return (
+        PointSource.objects.filter(pk=ids[0]).first()
+        or ArchivedPointSource.objects.filter(pk=ids[0]).first()
+    )
+
+
+def _load_transactions(ids: list[int]) -> list[PointTransaction]:
+    return list(PointTransaction.objects.filter(id__in=ids).order_by("id"))
+
+
+def _load_withdrawal(ids: list[int]) -> WithdrawalRequest:
+    return WithdrawalRequest.objects.get(pk=ids[0])
+
+
+def _wallet_key(owner: User | Organization) -> tuple[int, int]:
+    return ContentType.objects.get_for_model(owner).id, owner.pk
+
+
+def _wallet_exists(wallet_id: int) -> bool:
+    return PointWallet.objects.filter(pk=wallet_id).exists()
+
+
+def _cached_wallet(
+    key: tuple[int, int], *, for_write: bool = False
+) -> PointWallet | None:
+    # 写路径按主键确认进程缓存的钱包仍存在, 避免向其他进程已删除的钱包写入
+    wallet_id = get_cached_wallet_id(
+        key, validate=_wallet_exists if for_write else None
+    )
+    if wallet_id is None:
+        return None
+    # 仅填充主键与所有者字段, 其余字段在访问时延迟加载
+    return PointWallet.from_db(
+        PointWallet.objects.db,
+        ["id", "content_type_id", "object_id"],
+        [wallet_id, *key],
+    )
+
+
+def _remember_wallet(key: tuple[int, int], wallet: PointWallet) -> None:
+    # 提交后才写入缓存, 回滚的钱包不会被记住
+    transaction.on_commit(lambda: remember_wallet_id(key, wallet.id))
+
+
 def get_or_create_wallet(owner: User | Organization) -> PointWallet:
     """
     获取或创建积分钱包.
@@ -47,28 +221,40 @@ def get_or_create_wallet(owner: User | Organization) -> PointWallet:
         PointWallet: 积分钱包实例
 
     """
-    content_type = ContentType.objects.get_for_model(owner)
+    key = _wallet_key(owner)
+    wallet = _cached_wallet(key, for_write=True)
+    if wallet is not None:
+        return wallet
+
     wallet, created = PointWallet.objects.get_or_create(
-        content_type=content_type,
+        content_type_id=key[0],
         object_id=owner.pk,
     )
     if created:
         logger.info(
             "创建积分钱包: owner_type=%s, owner_id=%s, wallet_id=%s",
-            content_type.model,
+            owner._meta.model_name,
             owner.pk,
             wallet.id,
         )
+    _remember_wallet(key, wallet)
     return wallet
 
 
 def get_wallet_or_none(owner: User | Organization) -> PointWallet | None:
     """只读获取积分钱包, 不存在时返回 None."""
-    content_type = ContentType.objects.get_for_model(owner)
-    return PointWallet.objects.filter(
-        content_type=content_type,
+    key = _wallet_key(owner)
+    wallet = _cached_wallet(key)
+    if wallet is not None:
+        return wallet
+
+    wallet = PointWallet.objects.filter(
+        content_type_id=key[0],
         object_id=owner.pk,
     ).first()
+    if wallet is not None:
+        _remember_wallet(key, wallet)
+    return wallet
 
 
 def get_balance(
@@ -77,7 +263,7 @@ def get_balance(
     tag_slug: str | None = None,
 ) -> int:
     """
-    获取积分余额.
+    获取积分余额 (只读, 不会创建钱包).
 
     Args:
         owner: User 或 Organization 实例
@@ -88,53 +274,75 @@ def get_balance(
         int: 积分余额
 
     """
-    wallet = get_or_create_wallet(owner)
+    if point_type not in (None, PointType.CASH, PointType.GIFT):
+        msg = f"无效的积分类型: {point_type}"
+        raise InvalidPointOperationError(msg)
 
+    wallet = get_wallet_or_none(owner)
+    if wallet is None:
+        return 0
     if point_type is None:
         return wallet.get_total_balance()
-    elif point_type == PointType.CASH:
+    if point_type == PointType.CASH:
         return wallet.get_cash_balance()
-    elif point_type == PointType.GIFT:
-        return wallet.get_gift_balance(tag_slug=tag_slug)
-    else:
-        msg = f"无效的积分类型: {point_type}"
-        raise InvalidPointOperationError(msg)
-
+    return wallet.get_gift_balance(tag_slug=tag_slug)
 
-def get_detailed_balance(owner: User | Organization) -> dict:
-    """
-    获取详细的积分余额信息.
 
-    Args:
-        owner: User 或 Organization 实例
+def get_gift_balances_by_tag(owner: User | Organization, tag_ids) -> dict[int, int]:
+    """按标签 id 批量获取礼物积分余额 (一次分组查询), 无余额的标签不出现在结果中."""
+    wallet = get_wallet_or_none(owner)
+    if wallet is None or not tag_ids:
+        return {}
+    return dict(
+        wallet.sources.filter(
+            unexpired_sources_q(),
+            point_type=PointType.GIFT,
+            remaining_amount__gt=0,
+            tag_id__in=tag_ids,
+        )
+        .order_by()
+        .values("tag_id")
+        .annotate(total=Sum("remaining_amount"))
+        .values_list("tag_id", "total")
+    )
 
-    Returns:
-        dict: 包含 cash, gift, by_tag 的详细余额信息
 
+def get_wallet_detailed_balance(wallet: PointWallet | None) -> dict:
     """
-    wallet = get_or_create_wallet(owner)
+    汇总钱包的详细余额 (一次按类型与标签分组的查询), 钱包为 None 时返回全零.
 
-    # 获取现金积分
-    cash_balance = wallet.get_cash_balance()
+    Returns:
+        dict: 包含 total, cash, gift, gift_no_tag, by_tag, by_tag_names
 
-    # 获取礼物积分（按标签分组）
-    gift_sources = wallet.sources.filter(
-        point_type=PointType.GIFT,
-        remaining_amount__gt=0,
-    ).select_related("tag")
+    """
+    rows = []
+    if wallet is not None:
+        rows = list(
+            wallet.sources.filter(unexpired_sources_q(), remaining_amount__gt=0)
+            .order_by()
+            .values("point_type", "tag_id")
+            .annotate(total=Sum("remaining_amount"))
+        )
+    tags = tag_registry.get_by_ids(
+        row["tag_id"]
+        for row in rows
+        if row["point_type"] == PointType.GIFT and row["tag_id"] is not None
+    )
 
-    gift_total = 0
+    cash_balance = gift_total = no_tag_total = 0
     by_tag = defaultdict(int)
     by_tag_names: dict[str, str] = {}
-    no_tag_total = 0
-
-    for source in gift_sources:
-        gift_total += source.remaining_amount
-        if source.tag:
-            by_tag[source.tag.slug] += source.remaining_amount
-            by_tag_names.setdefault(source.tag.slug, source.tag.name)
+    for row in rows:
+        if row["point_type"] == PointType.CASH:
+            cash_balance += row["total"]
+            continue
+        gift_total += row["total"]
+        tag = tags.get(row["tag_id"])
+        if tag is None:
+            no_tag_total += row["total"]
         else:
-            no_tag_total += source.remaining_amount
+            by_tag[tag.slug] += row["total"]
+            by_tag_names.setdefault(tag.slug, tag.name)
 
     return {
         "total": cash_balance + gift_total,
@@ -146,49 +354,23 @@ def get_detailed_balance(owner: User | Organization) -> dict:
     }
 
 
-def get_detailed_balance_or_zero(owner: User | Organization) -> dict:
-    """Return detailed balance without implicitly creating a wallet."""
-    wallet = get_wallet_or_none(owner)
-    if wallet is None:
-        return {
-            "total": 0,
-            "cash": 0,
-            "gift": 0,
-            "gift_no_tag": 0,
-            "by_tag": {},
-            "by_tag_names": {},
-        }
-
-    # Mirror get_detailed_balance while keeping the call read-only.
-    cash_balance = wallet.get_cash_balance()
-    gift_sources = wallet.sources.filter(
-        point_type=PointType.GIFT,
-        remaining_amount__gt=0,
-    ).select_related("tag")
+def get_detailed_balance(owner: User | Organization) -> dict:
+    """
+    获取详细的积分余额信息 (只读, 不会创建钱包).
 
-    gift_total = 0
-    by_tag = defaultdict(int)
-    by_tag_names: dict[str, str] = {}
-    no_tag_total = 0
+    Args:
+        owner: User 或 Organization 实例
 
-    for source in gift_sources:
-        gift_total += source.remaining_amount
-        if source.tag:
-            by_tag[source.tag.slug] += source.remaining_amount
-            by_tag_names.setdefault(source.tag.slug, source.tag.name)
-        else:
-            no_tag_total += source.remaining_amount
+    Returns:
+        dict: 包含 cash, gift, by_tag 的详细余额信息
 
-    return {
-        "total": cash_balance + gift_total,
-        "cash": cash_balance,
-        "gift": gift_total,
-        "gift_no_tag": no_tag_total,
-        "by_tag": dict(by_tag),
-        "by_tag_names": by_tag_names,
-    }
+    """
+    return get_wallet_detailed_balance(get_wallet_or_none(owner))
 
 
+@_idempotent(
+    IdempotentOperation.GRANT, dump=lambda source: [source.id], load=_load_source
+)
 @transaction.atomic
 def grant_points(  # noqa: PLR0913
     owner: User | Organization,
@@ -199,6 +381,8 @@ def grant_points(  # noqa: PLR0913
     tag_slug: str | None = None,
     expires_at=None,
     reference_id: str = "",
+    reference_type: str = "",
+    reference_pk: int | None = None,
     created_by: User | None = None,
 ) -> PointSource:
     """
@@ -211,8 +395,11 @@ def grant_points(  # noqa: PLR0913
         reason: 发放原因
         tag_slug: 标签别名(仅 gift 类型可用)
         expires_at: 过期时间
-        reference_id: 关联ID
+        reference_id: 关联ID(未传入时由 reference_type/reference_pk 生成)
+        reference_type: 关联类型 (ReferenceType)
+        reference_pk: 关联对象主键
         created_by: 创建者
+        idempotency_key: 幂等键(可选), 重复调用返回首次创建的积分来源
 
     Returns:
         PointSource: 积分来源记录
@@ -234,25 +421,29 @@ def grant_points(  # noqa: PLR0913
         raise InvalidPointOperationError(msg)
 
     wallet = get_or_create_wallet(owner)
+    reference_id, reference_type, reference_pk = resolve_reference(
+        reference_id, reference_type, reference_pk
+    )
 
     # 获取标签
-    tag = None
+    tag_id = None
     if tag_slug:
-        try:
-            tag = Tag.objects.get(slug=tag_slug)
-        except Tag.DoesNotExist as err:
+        tag_id = resolve_tag_id(tag_slug)
+        if tag_id is None:
             msg = f"标签不存在: {tag_slug}"
-            raise InvalidPointOperationError(msg) from err
+            raise InvalidPointOperationError(msg)
 
     # 创建积分来源
     source = PointSource.objects.create(
         wallet=wallet,
         point_type=point_type,
-        tag=tag,
+        tag_id=tag_id,
         original_amount=amount,
         remaining_amount=amount,
         reason=reason,
         reference_id=reference_id,
+        reference_type=reference_type,
+        reference_pk=reference_pk,
         expires_at=expires_at,
         created_by=created_by,
     )
@@ -272,11 +463,15 @@ def grant_points(  # noqa: PLR0913
         balance_after=balance_after,
         description=reason,
         reference_id=reference_id,
+        reference_type=reference_type,
+        reference_pk=reference_pk,
         source=source,
-        tag=tag,
+        tag_id=tag_id,
         created_by=created_by,
     )
 
+    invalidate_wallet_pools(wallet)
+
     logger.info(
         "发放积分成功: wallet_id=%s, type=%s, amount=%s, tag=%s, reason=%s",
         wallet.id,
@@ -300,6 +495,7 @@ def _get_available_balance(
     if point_type == PointType.GIFT and tag_is_null:
         return (
             wallet.sources.filter(
+                unexpired_sources_q(),
                 point_type=PointType.GIFT,
                 remaining_amount__gt=0,
                 tag__isnull=True,
@@ -318,17 +514,92 @@ def _get_spend_sources_queryset(
     tag_is_null: bool,
 ):
     sources_queryset = wallet.sources.filter(
+        unexpired_sources_q(),
         point_type=point_type,
         remaining_amount__gt=0,
-    ).order_by("created_at")
+    ).order_by("created_at", "id")
 
     if tag_slug:
-        return sources_queryset.filter(tag__slug=tag_slug)
+        return filter_by_tag_slug(sources_queryset, tag_slug)
     if tag_is_null:
         return sources_queryset.filter(tag__isnull=True)
     return sources_queryset
 
 
+# 乐观扣减允许的条件更新未命中次数, 超过后退回行锁路径
+OPTIMISTIC_SPEND_MAX_MISSES = 3
+
+
+def _decrement_sources_optimistically(
+    sources_queryset, amount: int
+) -> tuple[list[tuple[PointSource, int]], int]:
+    """
+    不预先锁定来源集合, 逐个用条件 UPDATE 扣减.
+
+    只有实际扣减的来源行被加锁, 且锁持有到外层事务提交; 并发消费同一来源的
+    请求会等待该行锁, 随后按最新余额重新判断条件, 不满足时 (未命中) 跳到下一个
+    来源. 相比行锁路径, 它避免锁住整个 FIFO 集合, 但不是无锁的.
+
+    Returns:
+        tuple: ([(来源, 扣减数量)], 未扣完的数量)
+
+    """
+    spent = []
+    remaining = amount
+    misses = 0
+    for source in sources_queryset:
+        if remaining <= 0 or misses > OPTIMISTIC_SPEND_MAX_MISSES:
+            break
+        take = min(source.remaining_amount, remaining)
+        updated = PointSource.objects.filter(
+            id=source.id, remaining_amount__gte=take
+        ).update(remaining_amount=F("remaining_amount") - take)
+        if not updated:
+            misses += 1
+            continue
+        source.remaining_amount -= take
+        spent.append((source, take))
+        remaining -= take
+    return spent, remaining
+
+
+def _merge_spent(
+    spent: list[tuple[PointSource, int]],
+) -> list[tuple[PointSource, int]]:
+    """合并同一来源的多次扣减, 保持首次出现的顺序, 每个来源只记一条流水."""
+    merged: dict[int, tuple[PointSource, int]] = {}
+    for source, take in spent:
+        _, previous = merged.get(source.id, (source, 0))
+        merged[source.id] = (source, previous + take)
+    return list(merged.values())
+
+
+def _decrement_sources_locked(
+    sources_queryset, amount: int
+) -> list[tuple[PointSource, int]]:
+    """锁定全部可用来源后按 FIFO 扣减."""
+    spent = []
+    remaining = amount
+    for source in sources_queryset.select_for_update():
+        if remaining <= 0:
+            break
+        take = min(source.remaining_amount, remaining)
+        source.remaining_amount -= take
+        source.save(update_fields=["remaining_amount"])
+        spent.append((source, take))
+        remaining -= take
+
+    if remaining > 0:
+        msg = f"积分不足：需要 {amount}，可用 {amount - remaining}"
+        raise InsufficientPointsError(msg)
+    return spent
+
+
+@_idempotent(
+    IdempotentOperation.SPEND,
+    dump=lambda transactions: [txn.id for txn in transactions],
+    load=_load_transactions,
+)
 @transaction.atomic
 def spend_points(  # noqa: PLR0913
     owner: User | Organization,
@@ -339,7 +610,10 @@ def spend_points(  # noqa: PLR0913
     tag_slug: str | None = None,
     tag_is_null: bool = False,
     reference_id: str = "",
+    reference_type: str = "",
+    reference_pk: int | None = None,
     created_by: User | None = None,
+    optimistic: bool = False,
 ) -> list[PointTransaction]:
     """
     消费积分(FIFO 方式).
@@ -351,8 +625,14 @@ def spend_points(  # noqa: PLR0913
         description: 消费描述
         tag_slug: 标签别名(仅限使用特定标签的积分)
         tag_is_null: 仅消费无标签礼物积分
-        reference_id: 关联ID
+        reference_id: 关联ID(未传入时由 reference_type/reference_pk 生成)
+        reference_type: 关联类型 (ReferenceType)
+        reference_pk: 关联对象主键
         created_by: 创建者
+        optimistic: 使用条件 UPDATE 扣减, 不预先锁定整个来源集合 (被扣减的
+            来源行仍锁至提交); 适用于被并发消费的组织积分池, 未命中过多或未扣完
+            时退回行锁路径
+        idempotency_key: 幂等键(可选), 重复调用返回首次生成的交易记录
 
     Returns:
         list[PointTransaction]: 交易记录列表
@@ -387,47 +667,60 @@ def spend_points(  # noqa: PLR0913
         msg = f"积分不足：需要 {amount}，可用 {available}"
         raise InsufficientPointsError(msg)
 
-    # 获取可消费的积分来源（FIFO）
-    sources = list(
-        _get_spend_sources_queryset(
-            wallet, point_type, tag_slug, tag_is_null
-        ).select_for_update()
+    reference_id, reference_type, reference_pk = resolve_reference(
+        reference_id, reference_type, reference_pk
     )
 
-    # 消费积分
-    remaining_to_spend = amount
-    transactions = []
-
-    for source in sources:
-        if remaining_to_spend <= 0:
-            break
-
-        spend_from_source = min(source.remaining_amount, remaining_to_spend)
-        source.remaining_amount -= spend_from_source
-        source.save(update_fields=["remaining_amount"])
+    # 获取可消费的积分来源（FIFO）并扣减
+    sources_queryset = _get_spend_sources_queryset(
+        wallet, point_type, tag_slug, tag_is_null
+    )
+    if optimistic:
+        spent, remaining = _decrement_sources_optimistically(sources_queryset, amount)
+        if remaining > 0:
+            logger.info(
+                "乐观扣减未完成, 退回行锁路径: wallet_id=%s, remaining=%s",
+                wallet.id,
+                remaining,
+            )
+            spent = _merge_spent(
+                spent + _decrement_sources_locked(sources_queryset, remaining)
+            )
+    else:
+        spent = _decrement_sources_locked(sources_queryset, amount)
 
-        remaining_to_spend -= spend_from_source
+    # 扣减完成后只聚合一次余额, 逐笔倒推每条流水的 balance_after
+    if point_type == PointType.CASH:
+        balance_after = wallet.get_cash_balance()
+    else:
+        balance_after = wallet.get_gift_balance()
+    balances = []
+    for _source, take in reversed(spent):
+        balances.append(balance_after)
+        balance_after += take
+    balances.reverse()
+
+    transactions = PointTransaction.objects.bulk_create(
+        [
+            PointTransaction(
+                wallet=wallet,
+                transaction_type=TransactionType.SPEND,
+                point_type=point_type,
+                amount=-take,
+                balance_after=balance,
+                description=description,
+                reference_id=reference_id,
+                reference_type=reference_type,
+                reference_pk=reference_pk,
+                source=source,
+                tag_id=source.tag_id,
+                created_by=created_by,
+            )
+            for (source, take), balance in zip(spent, balances, strict=True)
+        ]
+    )
 
-        # 获取当前余额
-        if point_type == PointType.CASH:
-            balance_after = wallet.get_cash_balance()
-        else:
-            balance_after = wallet.get_gift_balance()
-
-        # 创建交易记录
-        txn = PointTransaction.objects.create(
-            wallet=wallet,
-            transaction_type=TransactionType.SPEND,
-            point_type=point_type,
-            amount=-spend_from_source,
-            balance_after=balance_after,
-            description=description,
-            reference_id=reference_id,
-            source=source,
-            tag=source.tag,
-            created_by=created_by,
-        )
-        transactions.append(txn)
+    invalidate_wallet_pools(wallet)
 
     logger.info(
         "消费积分成功: wallet_id=%s, type=%s, amount=%s, tag=%s, description=%s",
@@ -441,11 +734,225 @@ def spend_points(  # noqa: PLR0913
     return transactions
 
 
+# 过期扫描每批处理的积分来源数量
+EXPIRE_BATCH_SIZE = 500
+
+
+def expire_points(*, now=None, batch_size: int = EXPIRE_BATCH_SIZE) -> dict:
+    """
+    清理已过期的积分来源.
+
+    按 (expires_at, id) 键集分批扫描到期且仍有余额的 PointSource,
+    将剩余金额清零并批量写入 EXPIRE 交易. 每批独立事务, 单批失败不影响已完成批次.
+
+    Args:
+        now: 判定过期的时间点, 默认当前时间
+        batch_size: 每批处理的来源数量
+
+    Returns:
+        dict: 包含 batches, sources, amount 的统计信息
+
+    """
+    now = now or timezone.now()
+    stats = {"batches": 0, "sources": 0, "amount": 0}
+    cursor = None
+
+    while True:
+        queryset = PointSource.objects.filter(
+            expires_at__lte=now,
+            remaining_amount__gt=0,
+        )
+        if cursor is not None:
+            last_expires_at, last_id = cursor
+            queryset = queryset.filter(
+                Q(expires_at__gt=last_expires_at)
+                | Q(expires_at=last_expires_at, id__gt=last_id)
+            )
+        keys = list(
+            queryset.order_by("expires_at", "id").values_list("expires_at", "id")[
+                :batch_size
+            ]
+        )
+        if not keys:
+            break
+
+        cursor = keys[-1]
+        expired_count, expired_amount = _expire_source_batch(
+            [source_id for _, source_id in keys], now
+        )
+        stats["batches"] += 1
+        stats["sources"] += expired_count
+        stats["amount"] += expired_amount
+
+        if len(keys) < batch_size:
+            break
+
+    if stats["sources"]:
+        logger.info(
+            "积分过期处理完成: batches=%s, sources=%s, amount=%s",
+            stats["batches"],
+            stats["sources"],
+            stats["amount"],
+        )
+    return stats
+
+
+@transaction.atomic
+def _expire_source_batch(source_ids: list[int], now) -> tuple[int, int]:
+    sources = list(
+        PointSource.objects.select_for_update()
+        .filter(id__in=source_ids, expires_at__lte=now, remaining_amount__gt=0)
+        .order_by("id")
+    )
+    if not sources:
+        return 0, 0
+
+    # 余额查询已排除过期来源, 过期前后可用余额不变
+    balances = {
+        (row["wallet_id"], row["point_type"]): row["total"]
+        for row in PointSource.objects.filter(
+            unexpired_sources_q(now),
+            wallet_id__in={source.wallet_id for source in sources},
+            remaining_amount__gt=0,
+        )
+        .values("wallet_id", "point_type")
+        .annotate(total=Sum("remaining_amount"))
+    }
+
+    transactions = []
+    expired_amount = 0
+    for source in sources:
+        amount = source.remaining_amount
+        expired_amount += amount
+        source.remaining_amount = 0
+        transactions.append(
+            PointTransaction(
+                wallet_id=source.wallet_id,
+                transaction_type=TransactionType.EXPIRE,
+                point_type=source.point_type,
+                amount=-amount,
+                balance_after=balances.get((source.wallet_id, source.point_type), 0),
+                description=f"积分过期: {source.reason}"[:200],
+                source=source,
+                tag_id=source.tag_id,
+            )
+        )
+
+    PointSource.objects.bulk_update(sources, ["remaining_amount"])
+    PointTransaction.objects.bulk_create(transactions)
+    for content_type_id, object_id in PointWallet.objects.filter(
+        id__in={source.wallet_id for source in sources}
+    ).values_list("content_type_id", "object_id"):
+        invalidate_owner_pools(content_type_id, object_id)
+    return len(sources), expired_amount
+
+
+# 已耗尽积分来源保留在热表中的最短天数
+COMPACTION_MIN_AGE_DAYS = 90
+COMPACTION_BATCH_SIZE = 500
+
+
+def compact_exhausted_sources(
+    *,
+    older_than_days: int = COMPACTION_MIN_AGE_DAYS,
+    batch_size: int = COMPACTION_BATCH_SIZE,
+) -> dict:
+    """
+    将已耗尽的积分来源归档到 ArchivedPointSource.
+
+    仅处理 remaining_amount=0 且创建时间早于 ``older_than_days`` 天的来源;
+    被积分分配引用的来源 (PROTECT) 保留在热表. 关联交易的原来源 ID 写入
+    ``archived_source_id``, 通过 ``PointTransaction.get_source`` 回退查询.
+
+    Returns:
+        dict: 包含 batches, archived 的统计信息
+
+    """
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    stats = {"batches": 0, "archived": 0}
+    last_id = 0
+
+    while True:
+        source_ids = list(
+            PointSource.objects.filter(
+                id__gt=last_id,
+                remaining_amount=0,
+                created_at__lt=cutoff,
+                allocations__isnull=True,
+            )
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not source_ids:
+            break
+
+        last_id = source_ids[-1]
+        stats["batches"] += 1
+        stats["archived"] += _archive_source_batch(source_ids)
+
+        if len(source_ids) < batch_size:
+            break
+
+    if stats["archived"]:
+        logger.info(
+            "积分来源归档完成: batches=%s, archived=%s",
+            stats["batches"],
+            stats["archived"],
+        )
+    return stats
+
+
+@transaction.atomic
+def _archive_source_batch(source_ids: list[int]) -> int:
+    # 重新校验扫描条件: 扫描后新增的分配会让 delete() 触发 ProtectedError;
+    # 用 NOT EXISTS 而非 allocations__isnull, 避免对外连接的可空侧加锁
+    sources = list(
+        PointSource.objects.select_for_update().filter(
+            ~Exists(PointAllocation.objects.filter(source_pool=OuterRef("pk"))),
+            id__in=source_ids,
+            remaining_amount=0,
+        )
+    )
+    if not sources:
+        return 0
+
+    locked_ids = [source.id for source in sources]
+    ArchivedPointSource.objects.bulk_create(
+        [
+            ArchivedPointSource(
+                id=source.id,
+                wallet_id=source.wallet_id,
+                point_type=source.point_type,
+                tag_id=source.tag_id,
+                original_amount=source.original_amount,
+                reason=source.reason,
+                reference_id=source.reference_id,
+                reference_type=source.reference_type,
+                reference_pk=source.reference_pk,
+                expires_at=source.expires_at,
+                created_by_id=source.created_by_id,
+                created_at=source.created_at,
+            )
+            for source in sources
+        ]
+    )
+    PointTransaction.objects.filter(source_id__in=locked_ids).update(
+        archived_source_id=F("source_id")
+    )
+    PointSource.objects.filter(id__in=locked_ids).delete()
+    return len(locked_ids)
+
+
 # 最低提现积分数量
 MINIMUM_WITHDRAWAL_AMOUNT = 200
 
 
 @transaction.atomic
+@_idempotent(
+    IdempotentOperation.WITHDRAWAL,
+    dump=lambda withdrawal: [withdrawal.id],
+    load=_load_withdrawal,
+)
 def create_withdrawal_request(  # noqa: PLR0913
     owner: User | Organization,
     amount: int,
@@ -470,6 +977,7 @@ def create_withdrawal_request(  # noqa: PLR0913
         bank_account: 银行账号 (直接传参方式)
         invoice_file: 发票文件
         withdrawal_account_id: 提现账号 ID (新流程)
+        idempotency_key: 幂等键(可选), 重复调用返回首次创建的提现申请
 
     Returns:
         WithdrawalRequest: 提现申请记录
@@ -568,7 +1076,11 @@ def approve_withdrawal(
 
     """
     try:
-        withdrawal = WithdrawalRequest.objects.select_for_update().get(id=withdrawal_id)
+        withdrawal = (
+            WithdrawalRequest.objects.select_for_update(of=("self",))
+            .select_related("wallet")
+            .get(id=withdrawal_id)
+        )
     except WithdrawalRequest.DoesNotExist as err:
         msg = f"提现申请不存在: {withdrawal_id}"
         raise WithdrawalError(msg) from err
@@ -591,8 +1103,10 @@ def approve_withdrawal(
         amount=withdrawal.amount,
         point_type=PointType.CASH,
         description=f"提现申请 #{withdrawal.id}",
-        reference_id=f"withdrawal:{withdrawal.id}",
+        reference_type=ReferenceType.WITHDRAWAL,
+        reference_pk=withdrawal.id,
         created_by=admin_user,
+        idempotency_key=format_reference_id(ReferenceType.WITHDRAWAL, withdrawal.id),
     )
 
     # 更新提现申请状态
@@ -659,6 +1173,217 @@ def complete_withdrawal(
     return withdrawal
 
 
+def _fail_locked_withdrawals(
+    withdrawal_ids, withdrawals: dict, expected_status: str, errors: dict
+) -> list[WithdrawalRequest]:
+    """Record errors for missing or wrong-status requests; return the valid ones."""
+    valid = []
+    for withdrawal_id in withdrawal_ids:
+        withdrawal = withdrawals.get(withdrawal_id)
+        if withdrawal is None:
+            errors[withdrawal_id] = f"提现申请不存在: {withdrawal_id}"
+        elif withdrawal.status != expected_status:
+            errors[withdrawal_id] = (
+                f"提现申请状态无效: {withdrawal.get_status_display()}"
+            )
+        else:
+            valid.append(withdrawal)
+    return valid
+
+
+@transaction.atomic
+def approve_withdrawals(
+    withdrawal_ids,
+    admin_user: User,
+    note: str = "",
+) -> tuple[list[WithdrawalRequest], dict[int, str]]:
+    """
+    批量批准提现申请并扣除现金积分.
+
+    在一个事务内按 id 顺序锁定提现申请与钱包, 一次查询锁定并汇总所有钱包的可用现金来源,
+    在内存中按 FIFO 扣减后批量写回来源、消费流水与申请状态. 单个申请失败
+    (状态无效、余额不足) 记入错误并跳过, 不影响其他申请.
+
+    Args:
+        withdrawal_ids: 提现申请 ID 列表
+        admin_user: 管理员用户
+        note: 管理员备注
+
+    Returns:
+        tuple: (已批准的提现申请列表, {提现申请 ID: 错误信息})
+
+    """
+    withdrawal_ids = sorted(set(withdrawal_ids))
+    errors: dict[int, str] = {}
+    locked = WithdrawalRequest.objects.select_for_update().filter(id__in=withdrawal_ids)
+    pending = _fail_locked_withdrawals(
+        withdrawal_ids,
+        {withdrawal.id: withdrawal for withdrawal in locked.order_by("id")},
+        WithdrawalStatus.PENDING,
+        errors,
+    )
+    if not pending:
+        return [], errors
+
+    wallet_ids = sorted({withdrawal.wallet_id for withdrawal in pending})
+    wallets = {
+        wallet.id: wallet
+        for wallet in PointWallet.objects.select_for_update()
+        .filter(id__in=wallet_ids)
+        .order_by("id")
+    }
+    sources_by_wallet = defaultdict(list)
+    for source in (
+        PointSource.objects.select_for_update()
+        .filter(
+            unexpired_sources_q(),
+            wallet_id__in=wallet_ids,
+            point_type=PointType.CASH,
+            remaining_amount__gt=0,
+        )
+        .order_by("wallet_id", "created_at", "id")
+    ):
+        sources_by_wallet[source.wallet_id].append(source)
+    balances = {
+        wallet_id: sum(source.remaining_amount for source in sources)
+        for wallet_id, sources in sources_by_wallet.items()
+    }
+
+    now = timezone.now()
+    approved = []
+    touched_sources = {}
+    transactions = []
+    first_transaction_index = {}
+    for withdrawal in pending:
+        available = balances.get(withdrawal.wallet_id, 0)
+        if available < withdrawal.amount:
+            errors[withdrawal.id] = (
+                f"现金积分不足：需要 {withdrawal.amount}，可用 {available}"
+            )
+            continue
+
+        reference_id, reference_type, reference_pk = resolve_reference(
+            reference_type=ReferenceType.WITHDRAWAL, reference_pk=withdrawal.id
+        )
+        first_transaction_index[withdrawal.id] = len(transactions)
+        needed = withdrawal.amount
+        for source in sources_by_wallet[withdrawal.wallet_id]:
+            if needed == 0:
+                break
+            take = min(source.remaining_amount, needed)
+            if take == 0:
+                continue
+            source.remaining_amount -= take
+            touched_sources[source.id] = source
+            needed -= take
+            available -= take
+            transactions.append(
+                PointTransaction(
+                    wallet_id=withdrawal.wallet_id,
+                    transaction_type=TransactionType.SPEND,
+                    point_type=PointType.CASH,
+                    amount=-take,
+                    balance_after=available,
+                    description=f"提现申请 #{withdrawal.id}",
+                    reference_id=reference_id,
+                    reference_type=reference_type,
+                    reference_pk=reference_pk,
+                    source=source,
+                    tag_id=source.tag_id,
+                    created_by=admin_user,
+                )
+            )
+        balances[withdrawal.wallet_id] = available
+
+        withdrawal.status = WithdrawalStatus.APPROVED
+        withdrawal.admin_note = note
+        withdrawal.processed_by = admin_user
+        withdrawal.processed_at = now
+        withdrawal.updated_at = now
+        approved.append(withdrawal)
+
+    if approved:
+        PointSource.objects.bulk_update(touched_sources.values(), ["remaining_amount"])
+        transactions = PointTransaction.objects.bulk_create(transactions)
+        transaction_ids = defaultdict(list)
+        for txn in transactions:
+            transaction_ids[txn.reference_pk].append(txn.id)
+        for withdrawal in approved:
+            withdrawal.transaction = transactions[
+                first_transaction_index[withdrawal.id]
+            ]
+        WithdrawalRequest.objects.bulk_update(
+            approved,
+            [
+                "status",
+                "admin_note",
+                "processed_by",
+                "processed_at",
+                "transaction",
+                "updated_at",
+            ],
+        )
+        # 与单笔批准使用相同的幂等键记录本次消费
+        IdempotencyRecord.objects.bulk_create(
+            IdempotencyRecord(
+                key=format_reference_id(ReferenceType.WITHDRAWAL, withdrawal.id),
+                operation=IdempotentOperation.SPEND,
+                result_ids=transaction_ids[withdrawal.id],
+            )
+            for withdrawal in approved
+        )
+        for wallet_id in {withdrawal.wallet_id for withdrawal in approved}:
+            invalidate_wallet_pools(wallets[wallet_id])
+
+    logger.info(
+        "批量批准提现申请: approved=%s, failed=%s, admin=%s",
+        len(approved),
+        len(errors),
+        admin_user.username,
+    )
+    return approved, errors
+
+
+@transaction.atomic
+def complete_withdrawals(
+    withdrawal_ids,
+    admin_user: User,
+) -> tuple[list[WithdrawalRequest], dict[int, str]]:
+    """
+    批量完成提现(打款后).
+
+    Returns:
+        tuple: (已完成的提现申请列表, {提现申请 ID: 错误信息})
+
+    """
+    withdrawal_ids = sorted(set(withdrawal_ids))
+    errors: dict[int, str] = {}
+    locked = WithdrawalRequest.objects.select_for_update().filter(id__in=withdrawal_ids)
+    completed = _fail_locked_withdrawals(
+        withdrawal_ids,
+        {withdrawal.id: withdrawal for withdrawal in locked.order_by("id")},
+        WithdrawalStatus.APPROVED,
+        errors,
+    )
+    now = timezone.now()
+    for withdrawal in completed:
+        withdrawal.status = WithdrawalStatus.COMPLETED
+        withdrawal.processed_by = admin_user
+        withdrawal.processed_at = now
+        withdrawal.updated_at = now
+    WithdrawalRequest.objects.bulk_update(
+        completed, ["status", "processed_by", "processed_at", "updated_at"]
+    )
+
+    logger.info(
+        "批量完成提现: completed=%s, failed=%s, admin=%s",
+        len(completed),
+        len(errors),
+        admin_user.username,
+    )
+    return completed, errors
+
+
 @transaction.atomic
 def reject_withdrawal(
     withdrawal_id: int,
@@ -706,22 +1431,46 @@ def reject_withdrawal(
     return withdrawal
 
 
-@transaction.atomic
-def refund_withdrawal(withdrawal: WithdrawalRequest, reason: str = "") -> None:
+def refund_withdrawal(withdrawal: WithdrawalRequest, reason: str = "") -> PointSource:
     """
     提现付款失败时退回已扣除的积分.
 
     仅适用于已批准(积分已扣除)但付款失败的提现申请.
     通过创建新的 PointSource 将积分退回用户钱包,并记录 REFUND 类型的交易.
+    每笔提现只会退款一次: 以退款关联 ID 作为幂等键, 重复调用直接返回首次的来源.
 
     Args:
         withdrawal: WithdrawalRequest 实例(必须是 APPROVED 状态)
         reason: 退回原因
 
+    Returns:
+        PointSource: 退回的积分来源
+
     """
+    return _refund_withdrawal(
+        withdrawal,
+        reason,
+        idempotency_key=format_reference_id(
+            ReferenceType.WITHDRAWAL_REFUND, withdrawal.id
+        ),
+    )
+
+
+@_idempotent(
+    IdempotentOperation.WITHDRAWAL_REFUND,
+    dump=lambda source: [source.id],
+    load=_load_source,
+    # 不同失败路径给出的原因不同, 但同一提现只退款一次
+    ignore=("reason",),
+)
+@transaction.atomic
+def _refund_withdrawal(withdrawal: WithdrawalRequest, reason: str) -> PointSource:
     wallet = withdrawal.wallet
     amount = withdrawal.amount
     refund_reason = reason or f"提现付款失败退回 (#{withdrawal.id})"
+    reference_id, reference_type, reference_pk = resolve_reference(
+        reference_type=ReferenceType.WITHDRAWAL_REFUND, reference_pk=withdrawal.id
+    )
 
     # 创建新的积分来源，将积分退回钱包
     source = PointSource.objects.create(
@@ -731,7 +1480,9 @@ def refund_withdrawal(withdrawal: WithdrawalRequest, reason: str = "") -> None:
         original_amount=amount,
         remaining_amount=amount,
         reason=refund_reason,
-        reference_id=f"refund:withdrawal:{withdrawal.id}",
+        reference_id=reference_id,
+        reference_type=reference_type,
+        reference_pk=reference_pk,
         expires_at=None,
         created_by=None,
     )
@@ -747,18 +1498,23 @@ def refund_withdrawal(withdrawal: WithdrawalRequest, reason: str = "") -> None:
         amount=amount,
         balance_after=balance_after,
         description=refund_reason,
-        reference_id=f"refund:withdrawal:{withdrawal.id}",
+        reference_id=reference_id,
+        reference_type=reference_type,
+        reference_pk=reference_pk,
         source=source,
         tag=None,
         created_by=None,
     )
 
+    invalidate_wallet_pools(wallet)
+
     logger.info(
         "提现退款成功: withdrawal_id=%s, amount=%s, wallet_id=%s",
         withdrawal.id,
         amount,
         wallet.id,
     )
+    return source
 
 
 @transaction.atomic
@@ -0,0 +1,34 @@
+"""Signal handlers to keep point caches consistent."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import OrganizationMembership, User
+
+from .models import PointWallet, Tag
+from .pools import invalidate_owner_pools
+from .tag_registry import bump_tag_registry_version, tag_registry
+from .wallet_ids import forget_wallet_id
+
+
+@receiver(post_save, sender=OrganizationMembership)
+@receiver(post_delete, sender=OrganizationMembership)
+def invalidate_pools_on_membership_change(sender, instance, **kwargs):
+    """Reset the member's cached pools when their organization roles change."""
+    invalidate_owner_pools(ContentType.objects.get_for_model(User).id, instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    """Drop local tag entries now and rotate the shared version after commit."""
+    tag_registry.clear()
+    transaction.on_commit(bump_tag_registry_version)
+
+
+@receiver(post_delete, sender=PointWallet)
+def forget_deleted_wallet(sender, instance, **kwargs):
+    """Drop a deleted wallet from the owner to wallet id cache."""
+    forget_wallet_id((instance.content_type_id, instance.object_id))
@@ -0,0 +1,156 @@
+"""In-process registry of point tags, invalidated through a shared version token."""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import get_random_string
+
+from .models import Tag
+
+TAG_REGISTRY_VERSION_KEY = "points:tag_registry:version"
+TAG_REGISTRY_VERSION_TIMEOUT = None
+# 进程内注册表复核共享版本号的最短间隔(秒)
+TAG_REGISTRY_RECHECK_SECONDS = 5
+# 本地条目的最长存活时间(秒), 版本号轮换丢失时也能兜底刷新
+TAG_REGISTRY_ENTRY_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True, slots=True)
+class TagEntry:
+    """A cached snapshot of the tag fields services need."""
+
+    id: int
+    slug: str
+    name: str
+    tag_type: str
+
+
+class TagRegistry:
+    """
+    按 slug 与 id 缓存标签的进程内注册表.
+
+    条目按需从数据库加载. 标签保存或删除后轮换缓存中的版本号,
+    各进程最多在 ``TAG_REGISTRY_RECHECK_SECONDS`` 秒内发现并清空本地条目;
+    条目最多保留 ``TAG_REGISTRY_ENTRY_TTL_SECONDS`` 秒.
+    未配置 REDIS_URL 时默认缓存只在进程内 (LocMem/Dummy), 版本号无法跨进程
+    传播, 此时不保留任何条目, 每次查询数据库.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+        self._by_slug: dict[str, TagEntry] = {}
+        self._by_id: dict[int, TagEntry] = {}
+
+    def clear(self) -> None:
+        """Drop every local entry and force a version check on next use."""
+        with self._lock:
+            self._version = None
+            self._by_slug.clear()
+            self._by_id.clear()
+
+    def _sync(self) -> bool:
+        if not settings.REDIS_URL:
+            return False
+        now = time.monotonic()
+        if (
+            self._version is not None
+            and now - self._checked_at < TAG_REGISTRY_RECHECK_SECONDS
+        ):
+            return True
+
+        version = cache.get(TAG_REGISTRY_VERSION_KEY)
+        if version is None:
+            cache.add(
+                TAG_REGISTRY_VERSION_KEY,
+                get_random_string(12),
+                TAG_REGISTRY_VERSION_TIMEOUT,
+            )
+            version = cache.get(TAG_REGISTRY_VERSION_KEY)
+        with self._lock:
+            expired = now - self._loaded_at >= TAG_REGISTRY_ENTRY_TTL_SECONDS
+            if version != self._version or expired:
+                self._by_slug.clear()
+                self._by_id.clear()
+                self._version = version
+                self._loaded_at = now
+            self._checked_at = now
+        return version is not None
+
+    def _load(self, **lookup) -> list[TagEntry]:
+        return [
+            TagEntry(*row)
+            for row in Tag.objects.filter(**lookup).values_list(
+                "id", "slug", "name", "tag_type"
+            )
+        ]
+
+    def _store(self, entries: list[TagEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                self._by_slug[entry.slug] = entry
+                self._by_id[entry.id] = entry
+
+    def get_by_slugs(self, slugs) -> dict[str, TagEntry]:
+        """Return entries for the known ``slugs``; unknown slugs are omitted."""
+        slugs = set(slugs)
+        if not self._sync():
+            return {entry.slug: entry for entry in self._load(slug__in=slugs)}
+        found = {slug: self._by_slug[slug] for slug in slugs if slug in self._by_slug}
+        missing = slugs - found.keys()
+        if missing:
+            entries = self._load(slug__in=missing)
+            self._store(entries)
+            found.update((entry.slug, entry) for entry in entries)
+        return found
+
+    def get_by_ids(self, ids) -> dict[int, TagEntry]:
+        """Return entries for the known ``ids``; unknown ids are omitted."""
+        ids = set(ids)
+        if not self._sync():
+            return {entry.id: entry for entry in self._load(id__in=ids)}
+        found = {tag_id: self._by_id[tag_id] for tag_id in ids if tag_id in self._by_id}
+        missing = ids - found.keys()
+        if missing:
+            entries = self._load(id__in=missing)
+            self._store(entries)
+            found.update((entry.id, entry) for entry in entries)
+        return found
+
+
+tag_registry = TagRegistry()
+
+
+def get_tag(slug: str) -> TagEntry | None:
+    """按 slug 查找标签, 不存在时返回 None."""
+    return tag_registry.get_by_slugs([slug]).get(slug)
+
+
+def resolve_tag_id(slug: str) -> int | None:
+    """按 slug 返回标签 id, 不存在时返回 None."""
+    entry = get_tag(slug)
+    return entry.id if entry else None
+
+
+def bump_tag_registry_version() -> None:
+    """Invalidate tag registries in every process by rotating the version token."""
+    cache.set(
+        TAG_REGISTRY_VERSION_KEY,
+        get_random_string(12),
+        TAG_REGISTRY_VERSION_TIMEOUT,
+    )
+    tag_registry.clear()
+
+
+def filter_by_tag_slug(queryset, tag_slug: str):
+    """按标签 slug 过滤 queryset, 直接比较 ``tag_id`` 而不联表; 未知标签返回空集."""
+    tag_id = resolve_tag_id(tag_slug)
+    if tag_id is None:
+        return queryset.none()
+    return queryset.filter(tag_id=tag_id)
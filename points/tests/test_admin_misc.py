@@ -248,17 +248,18 @@ class PointsAdminBehaviorTests(TestCase):
             )
         )
 
-    @patch("points.admin.services.approve_withdrawal")
+    @patch("points.admin.services.approve_withdrawals")
     @patch("points.admin.services.reject_withdrawal")
-    @patch("points.admin.services.complete_withdrawal")
+    @patch("points.admin.services.complete_withdrawals")
     def test_withdrawal_admin_actions_delegate_and_report_success(
         self,
-        mock_complete_withdrawal,
+        mock_complete_withdrawals,
         mock_reject_withdrawal,
-        mock_approve_withdrawal,
+        mock_approve_withdrawals,
     ):
         """Batch withdrawal actions should call services and emit summary messages."""
         self.withdrawal_admin.message_user = Mock()
+        mock_approve_withdrawals.return_value = ([self.withdrawal], {})
 
         self.withdrawal_admin.approve_selected(
             self._request(),
@@ -280,20 +281,23 @@ class PointsAdminBehaviorTests(TestCase):
             bank_name="工商银行",
             bank_account="6222000000000000001",
         )
+        mock_complete_withdrawals.return_value = ([approved], {})
         self.withdrawal_admin.complete_selected(
             self._request(),
             WithdrawalRequest.objects.filter(pk=approved.pk),
         )
 
-        mock_approve_withdrawal.assert_called_once_with(
-            self.withdrawal.id, self.admin_user
-        )
+        approve_ids, approve_admin = mock_approve_withdrawals.call_args.args
+        self.assertEqual(list(approve_ids), [self.withdrawal.id])
+        self.assertEqual(approve_admin, self.admin_user)
         mock_reject_withdrawal.assert_called_once_with(
             self.withdrawal.id,
             self.admin_user,
             "批量拒绝",
         )
-        mock_complete_withdrawal.assert_called_once_with(approved.id, self.admin_user)
+        complete_ids, complete_admin = mock_complete_withdrawals.call_args.args
+        self.assertEqual(list(complete_ids), [approved.id])
+        self.assertEqual(complete_admin, self.admin_user)
         self.assertGreaterEqual(self.withdrawal_admin.message_user.call_count, 3)
         self.assertIn(
             "orange", str(self.withdrawal_admin.status_display(self.withdrawal))
@@ -308,16 +312,16 @@ class PointsAdminBehaviorTests(TestCase):
         self.assertFalse(self.withdrawal_admin.has_add_permission(self._request()))
 
     @patch(
-        "points.admin.services.approve_withdrawal",
-        side_effect=services.InsufficientPointsError("余额不足"),
+        "points.admin.services.approve_withdrawals",
+        side_effect=lambda ids, _admin: ([], dict.fromkeys(ids, "余额不足")),
     )
     @patch(
         "points.admin.services.reject_withdrawal",
         side_effect=services.WithdrawalError("拒绝失败"),
     )
     @patch(
-        "points.admin.services.complete_withdrawal",
-        side_effect=services.WithdrawalError("完成失败"),
+        "points.admin.services.complete_withdrawals",
+        side_effect=lambda ids, _admin: ([], dict.fromkeys(ids, "完成失败")),
     )
     def test_withdrawal_admin_actions_surface_service_failures(
         self,
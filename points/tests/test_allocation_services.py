@@ -21,6 +21,7 @@ from points.models import (
     PointSource,
     PointType,
     PointWallet,
+    ReferenceType,
     Tag,
     TagType,
 )
@@ -2233,7 +2234,8 @@ class AllocationServiceThinIntegrationTests(TestCase):
             self.assertEqual(kwargs["point_type"], expected["point_type"])
             self.assertEqual(kwargs["tag_slug"], expected["tag_slug"])
             self.assertEqual(kwargs["tag_is_null"], expected["tag_is_null"])
-            self.assertEqual(kwargs["reference_id"], f"allocation_{allocation.id}")
+            self.assertEqual(kwargs["reference_type"], ReferenceType.ALLOCATION)
+            self.assertEqual(kwargs["reference_pk"], allocation.id)
 
     def test_grant_registered_points_passes_bucket_specific_parameters(self):
         """Granting to registered users should preserve source bucket metadata."""
@@ -2267,4 +2269,5 @@ class AllocationServiceThinIntegrationTests(TestCase):
             self.assertEqual(kwargs["amount"], 456)
             self.assertEqual(kwargs["point_type"], expected_point_type)
             self.assertEqual(kwargs["tag_slug"], expected_tag_slug)
-            self.assertEqual(kwargs["reference_id"], f"allocation_{allocation.id}")
+            self.assertEqual(kwargs["reference_type"], ReferenceType.ALLOCATION)
+            self.assertEqual(kwargs["reference_pk"], allocation.id)
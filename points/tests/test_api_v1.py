@@ -466,3 +466,37 @@ class PointsApiV1Tests(TestCase):
             **self.headers,
         )
         self.assertEqual(mismatch_response.status_code, 404)
+
+    def test_transactions_support_cursor_pagination(self):
+        """Cursor mode walks the ledger without page numbers."""
+        for index in range(3):
+            grant_points(
+                owner=self.user,
+                amount=10,
+                point_type=PointType.CASH,
+                reason=f"Cursor fixture {index}",
+            )
+        first = self.client.get(
+            "/api/v1/points/me/transactions?cursor=&page_size=3&include_total=true",
+            **self.headers,
+        )
+        self.assertEqual(first.status_code, 200)
+        first_payload = first.json()
+        self.assertEqual(first_payload["pagination"]["mode"], "cursor")
+        self.assertEqual(first_payload["pagination"]["total_items"], 5)
+        self.assertTrue(first_payload["pagination"]["has_next"])
+
+        second = self.client.get(
+            "/api/v1/points/me/transactions",
+            {"cursor": first_payload["pagination"]["next_cursor"], "page_size": 3},
+            **self.headers,
+        )
+        second_payload = second.json()
+        self.assertFalse(second_payload["pagination"]["has_next"])
+        ids = [item["id"] for item in first_payload["items"] + second_payload["items"]]
+        self.assertEqual(len(set(ids)), 5)
+
+        invalid = self.client.get(
+            "/api/v1/points/me/transactions?cursor=bogus", **self.headers
+        )
+        self.assertEqual(invalid.status_code, 422)
@@ -0,0 +1,110 @@
+"""Tests for exhausted-source compaction."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.contenttypes.models import ContentType
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from points import services
+from points.admin import ArchivedPointSourceAdmin
+from points.models import (
+    ArchivedPointSource,
+    PointAllocation,
+    PointSource,
+    PointTransaction,
+    PointType,
+)
+
+
+class CompactExhaustedSourcesTests(TestCase):
+    """Tests for compact_exhausted_sources."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="compact", password="pass")
+        self.old = services.grant_points(self.user, 10, PointType.CASH, "Old")
+        self.live = services.grant_points(self.user, 10, PointType.CASH, "Live")
+        services.spend_points(self.user, 15, PointType.CASH, "Spend")
+        self.recent = services.grant_points(self.user, 5, PointType.CASH, "Recent")
+        services.spend_points(self.user, 10, PointType.CASH, "Spend all")
+
+        long_ago = timezone.now() - timedelta(days=365)
+        PointSource.objects.filter(id__in=[self.old.id, self.live.id]).update(
+            created_at=long_ago
+        )
+
+    def test_archives_only_old_exhausted_sources(self):
+        """Old exhausted sources move to the archive; the rest stay."""
+        stats = services.compact_exhausted_sources(older_than_days=30)
+
+        self.assertEqual(stats, {"batches": 1, "archived": 2})
+        self.assertFalse(
+            PointSource.objects.filter(id__in=[self.old.id, self.live.id]).exists()
+        )
+        self.assertTrue(PointSource.objects.filter(id=self.recent.id).exists())
+        archived = ArchivedPointSource.objects.get(id=self.old.id)
+        self.assertEqual(archived.original_amount, 10)
+        self.assertEqual(archived.reason, "Old")
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 0)
+
+    def test_transactions_resolve_archived_source(self):
+        """Transactions fall back to the archive once their source is gone."""
+        services.compact_exhausted_sources(older_than_days=30)
+
+        txns = PointTransaction.objects.filter(archived_source_id=self.old.id)
+        self.assertEqual(txns.count(), 2)
+        for txn in txns:
+            self.assertIsNone(txn.source_id)
+            self.assertEqual(txn.resolved_source_id, self.old.id)
+            self.assertEqual(txn.get_source().pk, self.old.id)
+
+        recent_txn = PointTransaction.objects.filter(source=self.recent).first()
+        self.assertEqual(recent_txn.get_source(), self.recent)
+
+    def _allocate(self, source):
+        PointAllocation.objects.create(
+            initiator_type=ContentType.objects.get_for_model(self.user),
+            initiator_id=self.user.id,
+            source_pool=source,
+            total_amount=1,
+            project_scope={"tags": []},
+            start_month=date(2025, 1, 1),
+            end_month=date(2025, 1, 1),
+            adjustment_ratio=Decimal("1.0"),
+            individual_adjustments={},
+        )
+
+    def test_sources_referenced_by_allocations_are_kept(self):
+        """PROTECT-ed allocation pools are not archived."""
+        self._allocate(self.old)
+
+        stats = services.compact_exhausted_sources(older_than_days=30, batch_size=1)
+
+        self.assertEqual(stats["archived"], 1)
+        self.assertTrue(PointSource.objects.filter(id=self.old.id).exists())
+
+    def test_batch_skips_sources_allocated_after_scan(self):
+        """A pool allocated between scan and lock is kept, not a ProtectedError."""
+        self._allocate(self.old)
+
+        archived = services._archive_source_batch([self.old.id, self.live.id])
+
+        self.assertEqual(archived, 1)
+        self.assertTrue(PointSource.objects.filter(id=self.old.id).exists())
+
+    def test_get_source_without_any_source(self):
+        """Transactions without a source resolve to None."""
+        txn = PointTransaction.objects.filter(source=self.recent).first()
+        txn.source = None
+        self.assertIsNone(txn.get_source())
+
+    def test_archive_admin_is_read_only(self):
+        """Archive admin disallows add/change."""
+        model_admin = ArchivedPointSourceAdmin(ArchivedPointSource, AdminSite())
+        request = RequestFactory().get("/")
+        self.assertFalse(model_admin.has_add_permission(request))
+        self.assertFalse(model_admin.has_change_permission(request))
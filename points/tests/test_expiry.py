@@ -0,0 +1,101 @@
+"""Tests for point expiry."""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from points import services
+from points.models import PointSource, PointTransaction, PointType, TransactionType
+
+
+class ExpiredBalanceTests(TestCase):
+    """Expired sources are excluded from balances and spends."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="expiry", password="pass")
+        self.expired = services.grant_points(
+            self.user,
+            100,
+            PointType.GIFT,
+            "Expired",
+            expires_at=timezone.now() - timedelta(days=1),
+        )
+        self.live = services.grant_points(
+            self.user,
+            50,
+            PointType.GIFT,
+            "Live",
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+    def test_balance_excludes_expired_sources(self):
+        """Balance only counts unexpired sources."""
+        self.assertEqual(services.get_balance(self.user, PointType.GIFT), 50)
+        self.assertEqual(services.get_detailed_balance(self.user)["gift"], 50)
+
+    def test_spend_skips_expired_sources(self):
+        """FIFO spend never consumes an expired source."""
+        with self.assertRaises(services.InsufficientPointsError):
+            services.spend_points(self.user, 60, PointType.GIFT, "Too much")
+
+        services.spend_points(self.user, 30, PointType.GIFT, "Spend")
+
+        self.expired.refresh_from_db()
+        self.live.refresh_from_db()
+        self.assertEqual(self.expired.remaining_amount, 100)
+        self.assertEqual(self.live.remaining_amount, 20)
+
+
+class ExpirePointsTests(TestCase):
+    """Tests for the expire_points sweeper."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="sweeper", password="pass")
+        self.other = User.objects.create_user(username="sweeper2", password="pass")
+        past = timezone.now() - timedelta(hours=1)
+        self.due = [
+            services.grant_points(self.user, 10, PointType.CASH, "A", expires_at=past),
+            services.grant_points(self.user, 20, PointType.GIFT, "B", expires_at=past),
+            services.grant_points(self.other, 30, PointType.GIFT, "C", expires_at=past),
+        ]
+        services.grant_points(self.user, 40, PointType.GIFT, "Permanent")
+        services.grant_points(
+            self.user,
+            50,
+            PointType.GIFT,
+            "Future",
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+    def test_expire_points_zeroes_due_sources_in_batches(self):
+        """Due sources are zeroed and each gets an EXPIRE transaction."""
+        stats = services.expire_points(batch_size=2)
+
+        self.assertEqual(stats, {"batches": 2, "sources": 3, "amount": 60})
+        for source in self.due:
+            source.refresh_from_db()
+            self.assertEqual(source.remaining_amount, 0)
+
+        expire_txns = PointTransaction.objects.filter(
+            transaction_type=TransactionType.EXPIRE
+        )
+        self.assertEqual(expire_txns.count(), 3)
+        gift_txn = expire_txns.get(source=self.due[1])
+        self.assertEqual(gift_txn.amount, -20)
+        self.assertEqual(gift_txn.balance_after, 90)
+        self.assertEqual(services.get_balance(self.user, PointType.GIFT), 90)
+
+    def test_expire_points_is_idempotent(self):
+        """A second sweep finds nothing to expire."""
+        services.expire_points()
+
+        self.assertEqual(
+            services.expire_points(), {"batches": 0, "sources": 0, "amount": 0}
+        )
+        self.assertEqual(
+            PointSource.objects.filter(remaining_amount=0).count(), len(self.due)
+        )
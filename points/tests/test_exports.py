@@ -0,0 +1,221 @@
+"""Tests for streaming statement exports."""
+
+import asyncio
+import csv
+import io
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.admin.sites import AdminSite
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from accounts.models import Organization, OrganizationMembership, User
+from accounts.services.jwt_tokens import create_access_token
+from points import exports, services
+from points.admin import PointWalletAdmin
+from points.models import PointTransaction, PointType, PointWallet
+
+
+def _content(response) -> str:
+    return b"".join(response.streaming_content).decode()
+
+
+class StatementExportApiTests(TestCase):
+    """Tests for the statement export endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="exporter", password="pass")
+        self.member = User.objects.create_user(username="member", password="pass")
+        self.org = Organization.objects.create(name="Export Org", slug="export-org")
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.org,
+            role=OrganizationMembership.Role.OWNER,
+        )
+        OrganizationMembership.objects.create(
+            user=self.member,
+            organization=self.org,
+            role=OrganizationMembership.Role.MEMBER,
+        )
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"
+        }
+        services.grant_points(self.user, 100, PointType.CASH, "Cash, with comma")
+        services.grant_points(self.user, 50, PointType.GIFT, "Gift")
+        services.spend_points(self.user, 20, PointType.CASH, "Spend")
+        services.grant_points(self.org, 300, PointType.CASH, "Org cash")
+
+    def test_csv_export_streams_full_statement(self):
+        """CSV export contains a header and every transaction in order."""
+        response = self.client.get(
+            "/api/v1/points/me/transactions/export", **self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["description"], "Cash, with comma")
+        self.assertEqual([row["amount"] for row in rows], ["100", "50", "-20"])
+
+    def test_jsonl_export_applies_filters(self):
+        """JSONL export honours type and date filters."""
+        today = timezone.localdate()
+        response = self.client.get(
+            "/api/v1/points/me/transactions/export",
+            {
+                "format": "jsonl",
+                "point_type": "cash",
+                "transaction_type": "earn",
+                "start_date": today.isoformat(),
+                "end_date": today.isoformat(),
+            },
+            **self.headers,
+        )
+
+        lines = [json.loads(line) for line in _content(response).splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["amount"], 100)
+        self.assertEqual(lines[0]["tag"], "")
+
+        tomorrow = (today + timedelta(days=1)).isoformat()
+        empty = self.client.get(
+            "/api/v1/points/me/transactions/export",
+            {"format": "jsonl", "start_date": tomorrow},
+            **self.headers,
+        )
+        self.assertEqual(_content(empty), "")
+
+    def test_invalid_format_is_rejected(self):
+        """Unsupported formats return a validation error."""
+        response = self.client.get(
+            "/api/v1/points/me/transactions/export?format=xml", **self.headers
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_user_without_wallet_gets_header_only(self):
+        """Users without a wallet get an empty statement."""
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.member)}"}
+        response = self.client.get("/api/v1/points/me/transactions/export", **headers)
+        self.assertEqual(len(_content(response).splitlines()), 1)
+
+    def test_organization_export_requires_admin(self):
+        """Organization statements are limited to owners and admins."""
+        response = self.client.get(
+            f"/api/v1/points/organizations/{self.org.slug}/transactions/export",
+            **self.headers,
+        )
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        self.assertEqual([row["description"] for row in rows], ["Org cash"])
+
+        forbidden = self.client.get(
+            f"/api/v1/points/organizations/{self.org.slug}/transactions/export",
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.member)}",
+        )
+        self.assertEqual(forbidden.status_code, 403)
+
+
+class StatementExportAsgiTests(TestCase):
+    """Tests for serving statement exports through the ASGI handler."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="exporter", password="pass")
+        for amount in (10, 20, 30):
+            services.grant_points(self.user, amount, PointType.CASH, "Grant")
+        self.token = create_access_token(self.user)
+        # Like the test client, keep request signals off the test transaction
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    async def _get(self, path: str, query_string: bytes, send) -> None:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query_string,
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", f"Bearer {self.token}".encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        disconnected = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        await ASGIHandler()(scope, receive, send)
+
+    async def test_asgi_export_streams_incrementally(self):
+        """Lines go out before the whole ledger has been read."""
+        produced = []
+        iter_rows = exports._iter_rows
+
+        def counting_rows(queryset):
+            for row in iter_rows(queryset):
+                produced.append(row["id"])
+                yield row
+
+        sent = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.assertEqual(message["status"], 200)
+            elif message.get("body"):
+                sent.append((len(produced), message["body"]))
+
+        with (
+            patch.object(exports, "EXPORT_CHUNK_SIZE", 1),
+            patch.object(exports, "_iter_rows", side_effect=counting_rows),
+        ):
+            await self._get(
+                "/api/v1/points/me/transactions/export", b"format=jsonl", send
+            )
+
+        self.assertEqual([rows_read for rows_read, _ in sent], [1, 2, 3])
+        lines = [json.loads(body) for _, body in sent]
+        self.assertEqual([line["amount"] for line in lines], [10, 20, 30])
+
+
+class StatementExportAdminTests(TestCase):
+    """Tests for the wallet admin export action."""
+
+    def test_export_action_streams_selected_wallets(self):
+        """The admin action exports transactions of selected wallets only."""
+        alice = User.objects.create_user(username="alice", password="pass")
+        bob = User.objects.create_user(username="bob", password="pass")
+        services.grant_points(alice, 10, PointType.CASH, "Alice")
+        services.grant_points(bob, 20, PointType.CASH, "Bob")
+        model_admin = PointWalletAdmin(PointWallet, AdminSite())
+
+        response = model_admin.export_statements(
+            RequestFactory().post("/"),
+            PointWallet.objects.filter(id=services.get_wallet_or_none(alice).id),
+        )
+
+        rows = list(csv.DictReader(io.StringIO(_content(response))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            int(rows[0]["id"]), PointTransaction.objects.get(description="Alice").id
+        )
@@ -0,0 +1,272 @@
+"""Tests for idempotency keys on point operations."""
+
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from accounts.services.jwt_tokens import create_access_token
+from points import services
+from points.models import (
+    IdempotencyRecord,
+    IdempotentOperation,
+    PointSource,
+    PointTransaction,
+    PointType,
+    TransactionType,
+    WithdrawalRequest,
+    WithdrawalStatus,
+)
+
+
+class IdempotentServiceTests(TestCase):
+    """Tests for the idempotency_key service argument."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="idem", password="pass")
+        self.admin = User.objects.create_user(username="admin", password="pass")
+
+    def test_grant_replay_returns_original_source(self):
+        """Replaying a grant neither inserts nor re-validates."""
+        first = services.grant_points(
+            self.user, 100, PointType.CASH, "Grant", idempotency_key="grant-1"
+        )
+        with self.assertNumQueries(2):
+            replay = services.grant_points(
+                self.user, 100, PointType.CASH, "Grant", idempotency_key="grant-1"
+            )
+
+        self.assertEqual(replay, first)
+        self.assertEqual(PointSource.objects.count(), 1)
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 100)
+
+    def test_spend_replay_returns_original_transactions(self):
+        """Replaying a spend skips the balance check."""
+        services.grant_points(self.user, 30, PointType.CASH, "First")
+        services.grant_points(self.user, 30, PointType.CASH, "Second")
+        first = services.spend_points(
+            self.user, 50, PointType.CASH, "Spend", idempotency_key="spend-1"
+        )
+        replay = services.spend_points(
+            self.user, 50, PointType.CASH, "Spend", idempotency_key="spend-1"
+        )
+
+        self.assertEqual([txn.id for txn in replay], [txn.id for txn in first])
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 10)
+
+    def test_key_reused_for_other_operation_is_rejected(self):
+        """A key bound to one operation cannot replay another."""
+        services.grant_points(
+            self.user, 10, PointType.CASH, "Grant", idempotency_key="shared"
+        )
+        with self.assertRaises(services.InvalidPointOperationError):
+            services.spend_points(
+                self.user, 10, PointType.CASH, "Spend", idempotency_key="shared"
+            )
+
+    def test_key_replayed_with_other_arguments_is_rejected(self):
+        """A key cannot silently replay a request with different arguments."""
+        services.grant_points(
+            self.user, 10, PointType.CASH, "Grant", idempotency_key="args"
+        )
+        with self.assertRaises(services.InvalidPointOperationError):
+            services.grant_points(
+                self.user, 20, PointType.CASH, "Grant", idempotency_key="args"
+            )
+
+    def test_positional_and_keyword_arguments_share_fingerprint(self):
+        """Equivalent calls hash the same regardless of argument style."""
+        first = services.grant_points(
+            self.user, 10, PointType.CASH, "Grant", idempotency_key="style"
+        )
+        replay = services.grant_points(
+            owner=self.user,
+            amount=10,
+            point_type=PointType.CASH,
+            reason="Grant",
+            idempotency_key="style",
+        )
+        self.assertEqual(replay, first)
+
+    def test_failed_operation_does_not_burn_key(self):
+        """Errors roll back the record so the key can be retried."""
+        with self.assertRaises(services.InsufficientPointsError):
+            services.spend_points(
+                self.user, 10, PointType.CASH, "Spend", idempotency_key="retry"
+            )
+        self.assertFalse(IdempotencyRecord.objects.filter(key="retry").exists())
+
+        services.grant_points(self.user, 10, PointType.CASH, "Grant")
+        txns = services.spend_points(
+            self.user, 10, PointType.CASH, "Spend", idempotency_key="retry"
+        )
+        self.assertEqual(len(txns), 1)
+
+    def test_concurrent_duplicate_replays_winner(self):
+        """A unique-index conflict falls back to the committed record."""
+        winner = services.grant_points(
+            self.user, 5, PointType.CASH, "Winner", idempotency_key="race"
+        )
+        real_filter = IdempotencyRecord.objects.filter
+        missed = MagicMock()
+        missed.first.return_value = None
+        lookups = iter([missed])
+
+        def racing_filter(*args, **kwargs):
+            return next(lookups, None) or real_filter(*args, **kwargs)
+
+        with patch.object(
+            IdempotencyRecord.objects, "filter", side_effect=racing_filter
+        ):
+            replay = services.grant_points(
+                self.user, 5, PointType.CASH, "Winner", idempotency_key="race"
+            )
+
+        self.assertEqual(replay, winner)
+        self.assertEqual(PointSource.objects.count(), 1)
+
+    def test_integrity_error_without_record_is_raised(self):
+        """Unrelated integrity errors propagate."""
+        with (
+            patch.object(
+                IdempotencyRecord.objects, "create", side_effect=IntegrityError
+            ),
+            self.assertRaises(IntegrityError),
+        ):
+            services.grant_points(
+                self.user, 5, PointType.CASH, "Grant", idempotency_key="boom"
+            )
+
+    def test_refund_withdrawal_runs_once(self):
+        """Refunding the same withdrawal twice only credits once."""
+        services.grant_points(self.user, 500, PointType.CASH, "Cash")
+        withdrawal = services.create_withdrawal_request(
+            self.user, 300, "Name", "13800000000", "110101199001011234", "Bank", "1"
+        )
+        services.approve_withdrawal(withdrawal.id, self.admin)
+
+        first = services.refund_withdrawal(withdrawal, reason="失败")
+        second = services.refund_withdrawal(withdrawal, reason="失败")
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            PointTransaction.objects.filter(
+                transaction_type=TransactionType.REFUND
+            ).count(),
+            1,
+        )
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 500)
+
+    def test_refund_replay_ignores_reason(self):
+        """Different failure paths refund the same withdrawal only once."""
+        services.grant_points(self.user, 500, PointType.CASH, "Cash")
+        withdrawal = services.create_withdrawal_request(
+            self.user, 300, "Name", "13800000000", "110101199001011234", "Bank", "1"
+        )
+        services.approve_withdrawal(withdrawal.id, self.admin)
+
+        first = services.refund_withdrawal(withdrawal, reason="请求失败")
+        second = services.refund_withdrawal(withdrawal, reason="付款失败")
+
+        self.assertEqual(first, second)
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 500)
+
+    def test_purge_removes_expired_client_records_only(self):
+        """Retention cleanup keeps internal reference keys and recent records."""
+        for key in ("api:grant:old", "cli:grant:old", "withdrawal:1", "api:grant:new"):
+            IdempotencyRecord.objects.create(
+                key=key, operation=IdempotentOperation.GRANT
+            )
+        IdempotencyRecord.objects.exclude(key="api:grant:new").update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        deleted = services.purge_idempotency_records(batch_size=1)
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(
+            set(IdempotencyRecord.objects.values_list("key", flat=True)),
+            {"withdrawal:1", "api:grant:new"},
+        )
+
+    def test_refund_replay_after_archival_returns_archived_source(self):
+        """Replays fall back to the archive when the source was compacted."""
+        services.grant_points(self.user, 500, PointType.CASH, "Cash")
+        withdrawal = services.create_withdrawal_request(
+            self.user, 300, "Name", "13800000000", "110101199001011234", "Bank", "1"
+        )
+        services.approve_withdrawal(withdrawal.id, self.admin)
+        source = services.refund_withdrawal(withdrawal)
+        PointSource.objects.filter(id=source.id).update(remaining_amount=0)
+        services.compact_exhausted_sources(older_than_days=-1)
+
+        self.assertEqual(services.refund_withdrawal(withdrawal).pk, source.id)
+
+
+class IdempotentEntryPointTests(TestCase):
+    """Tests for idempotency keys at API and command entry points."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="idem-api", password="pass")
+        services.grant_points(self.user, 1000, PointType.CASH, "Cash")
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}",
+        }
+        self.payload = {
+            "amount": 300,
+            "real_name": "张三",
+            "phone": "13800138000",
+            "id_card": "110101199001011234",
+            "bank_name": "Bank",
+            "bank_account": "6222020200001234567",
+        }
+
+    def _post(self, key):
+        return self.client.post(
+            "/api/v1/points/me/withdrawals",
+            data=self.payload,
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+            **self.headers,
+        )
+
+    def test_withdrawal_header_replays_request(self):
+        """Retrying with the same header returns the original withdrawal."""
+        first = self._post("abc")
+        second = self._post("abc")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(first.json()["id"], second.json()["id"])
+        self.assertEqual(
+            WithdrawalRequest.objects.filter(status=WithdrawalStatus.PENDING).count(),
+            1,
+        )
+
+    def test_overlong_header_is_rejected(self):
+        """Keys longer than the limit fail validation."""
+        self.assertEqual(self._post("x" * 101).status_code, 422)
+
+    def test_grant_command_accepts_idempotency_key(self):
+        """The grant command can be re-run safely with a key."""
+        for _ in range(2):
+            call_command(
+                "grant_points",
+                user=self.user.username,
+                amount=50,
+                type="cash",
+                reason="Retry",
+                idempotency_key="cmd-1",
+                stdout=StringIO(),
+            )
+        self.assertEqual(PointSource.objects.filter(reason="Retry").count(), 1)
+        self.assertTrue(
+            IdempotencyRecord.objects.filter(key="cli:grant:cmd-1").exists()
+        )
@@ -0,0 +1,115 @@
+"""Tests for the optimistic conditional-UPDATE spend path."""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from accounts.models import Organization
+from points import services
+from points.models import PointSource, PointType, PointWallet
+
+
+class OptimisticSpendTests(TestCase):
+    """Tests for spend_points(optimistic=True)."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.org = Organization.objects.create(name="Pool", slug="pool")
+        self.first = services.grant_points(self.org, 10, PointType.CASH, "First")
+        self.second = services.grant_points(self.org, 10, PointType.CASH, "Second")
+
+    def test_spends_fifo_with_running_balances(self):
+        """Optimistic spends drain sources in FIFO order."""
+        txns = services.spend_points(
+            self.org, 15, PointType.CASH, "Spend", optimistic=True
+        )
+
+        self.assertEqual([txn.amount for txn in txns], [-10, -5])
+        self.assertEqual(
+            [txn.source_id for txn in txns], [self.first.id, self.second.id]
+        )
+        self.assertEqual([txn.balance_after for txn in txns], [10, 5])
+        self.assertEqual(services.get_balance(self.org, PointType.CASH), 5)
+
+    def test_missed_update_moves_to_next_source(self):
+        """A source drained concurrently is skipped instead of overdrawn."""
+        stale = list(
+            PointSource.objects.filter(id__in=[self.first.id, self.second.id]).order_by(
+                "id"
+            )
+        )
+        PointSource.objects.filter(id=self.first.id).update(remaining_amount=0)
+
+        spent, remaining = services._decrement_sources_optimistically(stale, 15)
+
+        self.assertEqual(
+            [(source.id, take) for source, take in spent], [(self.second.id, 10)]
+        )
+        self.assertEqual(remaining, 5)
+        self.assertEqual(PointSource.objects.get(id=self.first.id).remaining_amount, 0)
+
+    def test_falls_back_to_locking_path(self):
+        """Unfinished optimistic spends are completed under row locks."""
+        with patch.object(
+            services, "_decrement_sources_optimistically", return_value=([], 12)
+        ):
+            txns = services.spend_points(
+                self.org, 12, PointType.CASH, "Spend", optimistic=True
+            )
+
+        self.assertEqual(sum(txn.amount for txn in txns), -12)
+        self.assertEqual(services.get_balance(self.org, PointType.CASH), 8)
+
+    def test_partial_fallback_records_one_row_per_source(self):
+        """A source touched by both paths yields a single SPEND row."""
+        optimistic = services._decrement_sources_optimistically
+
+        def partial(sources, amount):
+            spent, remaining = optimistic(sources, 3)
+            return spent, remaining + amount - 3
+
+        with patch.object(
+            services, "_decrement_sources_optimistically", side_effect=partial
+        ):
+            txns = services.spend_points(
+                self.org, 15, PointType.CASH, "Spend", optimistic=True
+            )
+
+        self.assertEqual(
+            [(txn.source_id, txn.amount) for txn in txns],
+            [(self.first.id, -10), (self.second.id, -5)],
+        )
+        self.assertEqual([txn.balance_after for txn in txns], [10, 5])
+
+    def test_locking_path_rejects_shortfall(self):
+        """The locked path raises when sources ran dry meanwhile."""
+        wallet = services.get_wallet_or_none(self.org)
+        with self.assertRaises(services.InsufficientPointsError):
+            services._decrement_sources_locked(
+                services._get_spend_sources_queryset(
+                    wallet, PointType.CASH, None, False
+                ),
+                25,
+            )
+
+
+class BenchmarkSpendCommandTests(TransactionTestCase):
+    """Tests for the benchmark_spend command."""
+
+    def test_benchmark_reports_both_modes_and_cleans_up(self):
+        """The benchmark runs each mode and removes its pool."""
+        out = StringIO()
+        call_command("benchmark_spend", workers=1, spends=3, sources=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("[optimistic] workers=1 spends=3 failed=0", output)
+        self.assertIn("[locking] workers=1 spends=3 failed=0", output)
+        self.assertFalse(Organization.objects.exists())
+        self.assertFalse(PointWallet.objects.exists())
+
+    def test_benchmark_rejects_invalid_arguments(self):
+        """Non-positive sizes are rejected."""
+        with self.assertRaises(CommandError):
+            call_command("benchmark_spend", workers=0)
@@ -0,0 +1,153 @@
+"""Tests for aggregated point pools."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts.models import Organization, OrganizationMembership, User
+from accounts.services.jwt_tokens import create_access_token
+from points import services
+from points.models import PointType, Tag
+from points.pools import get_user_pools
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "points-pools-tests",
+    }
+}
+
+
+class PoolsTestMixin:
+    """Shared fixtures for pool tests."""
+
+    def setUp(self):
+        """Create a user with a personal wallet and one administered org."""
+        self.user = User.objects.create_user(username="pooler", password="pass")
+        Tag.objects.create(name="Pool Tag", slug="pool-tag")
+        services.grant_points(self.user, 100, PointType.CASH, "Cash")
+        services.grant_points(
+            self.user, 30, PointType.GIFT, "Gift", tag_slug="pool-tag"
+        )
+        self.org = self._add_org("pool-org", OrganizationMembership.Role.OWNER)
+        services.grant_points(self.org, 500, PointType.CASH, "Org cash")
+        ContentType.objects.get_for_model(Organization)
+        ContentType.objects.get_for_model(User)
+
+    def _add_org(self, slug, role):
+        org = Organization.objects.create(name=slug.title(), slug=slug)
+        OrganizationMembership.objects.create(
+            user=self.user, organization=org, role=role
+        )
+        return org
+
+
+class UserPoolsQueryTests(PoolsTestMixin, TestCase):
+    """Tests for the aggregated pool query."""
+
+    def test_query_count_does_not_grow_with_organizations(self):
+        """Pools are loaded with a membership query and one aggregate."""
+        with self.assertNumQueries(2):
+            get_user_pools(self.user)
+
+        for index in range(5):
+            org = self._add_org(f"extra-{index}", OrganizationMembership.Role.ADMIN)
+            services.grant_points(org, 10, PointType.CASH, "Extra")
+
+        with self.assertNumQueries(2):
+            pools = get_user_pools(self.user)
+        self.assertEqual(len(pools), 8)
+
+    def test_items_match_owner_order_and_balances(self):
+        """User pools come first; member-only orgs and spent sources are skipped."""
+        member_org = self._add_org("member-org", OrganizationMembership.Role.MEMBER)
+        services.grant_points(member_org, 50, PointType.CASH, "Hidden")
+        services.spend_points(self.user, 40, PointType.CASH, "Spend")
+
+        pools = get_user_pools(self.user)
+
+        self.assertEqual(
+            [
+                (item["owner_type"], item["owner_slug"], item["point_type"])
+                for item in pools
+            ],
+            [
+                ("user", None, PointType.CASH),
+                ("user", None, PointType.GIFT),
+                ("organization", "pool-org", PointType.CASH),
+            ],
+        )
+        self.assertEqual(pools[0]["available_balance"], 60)
+        self.assertIsNone(pools[0]["tag"])
+        self.assertEqual(pools[1]["tag"], {"slug": "pool-tag", "name": "Pool Tag"})
+        self.assertEqual(pools[2]["owner_name"], "Pool-Org")
+        self.assertEqual(
+            pools[2]["source_selector"],
+            {
+                "owner_type": "organization",
+                "owner_slug": "pool-org",
+                "point_type": PointType.CASH,
+                "tag_slug": None,
+            },
+        )
+
+    def test_endpoint_returns_pools(self):
+        """The /pools endpoint serves the aggregated items."""
+        response = self.client.get(
+            "/api/v1/points/pools",
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.user)}",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"], get_user_pools(self.user))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UserPoolsCacheTests(PoolsTestMixin, TestCase):
+    """Tests for per-user pool caching and invalidation."""
+
+    def setUp(self):
+        """Start every test with an empty cache."""
+        cache.clear()
+        super().setUp()
+
+    def tearDown(self):
+        """Clear the cache."""
+        cache.clear()
+
+    def _org_cash(self):
+        return next(
+            item["available_balance"]
+            for item in get_user_pools(self.user)
+            if item["owner_type"] == "organization"
+        )
+
+    def test_cached_result_skips_queries(self):
+        """A warm cache serves pools without touching the database."""
+        first = get_user_pools(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_pools(self.user), first)
+
+    def test_grant_and_spend_invalidate_after_commit(self):
+        """Balance changes on an administered org refresh the cached pools."""
+        self.assertEqual(self._org_cash(), 500)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.grant_points(self.org, 25, PointType.CASH, "More")
+        self.assertEqual(self._org_cash(), 525)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.spend_points(self.org, 100, PointType.CASH, "Spend")
+        self.assertEqual(self._org_cash(), 425)
+
+    def test_membership_change_invalidates(self):
+        """Losing the admin role removes the org from cached pools."""
+        self.assertEqual(len(get_user_pools(self.user)), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrganizationMembership.objects.filter(
+                user=self.user, organization=self.org
+            ).get().delete()
+
+        self.assertEqual(len(get_user_pools(self.user)), 2)
@@ -0,0 +1,112 @@
+"""Tests for batched generic owner loading."""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Organization, OrganizationMembership, User
+from accounts.services.jwt_tokens import create_access_token
+from points import services
+from points.models import PointTransaction, PointType, PointWallet
+from points.prefetch import prefetch_generic
+
+
+class PrefetchGenericTests(TestCase):
+    """Tests for prefetch_generic."""
+
+    def setUp(self):
+        """Create wallets owned by users and organizations."""
+        for index in range(3):
+            user = User.objects.create_user(username=f"owner{index}", password="pass")
+            org = Organization.objects.create(name=f"Org {index}", slug=f"org-{index}")
+            services.grant_points(user, 10, PointType.CASH, "User")
+            services.grant_points(org, 10, PointType.CASH, "Org")
+
+    def test_loads_owners_once_per_content_type(self):
+        """Owners are fetched with one query per content type."""
+        wallets = prefetch_generic(PointWallet.objects.all(), "owner")
+
+        with self.assertNumQueries(0):
+            owners = [wallet.owner for wallet in wallets]
+        self.assertEqual(len({type(owner) for owner in owners}), 2)
+
+    def test_nested_lookup_through_wallet(self):
+        """Nested lookups resolve owners behind a foreign key."""
+        transactions = prefetch_generic(
+            PointTransaction.objects.select_related("wallet"), "wallet__owner"
+        )
+
+        with self.assertNumQueries(0):
+            names = {str(txn.wallet.owner) for txn in transactions}
+        self.assertEqual(len(names), 6)
+
+    def test_empty_input(self):
+        """Empty inputs issue no queries."""
+        with self.assertNumQueries(0):
+            self.assertEqual(prefetch_generic([], "owner"), [])
+
+
+class OwnerPrefetchWiringTests(TestCase):
+    """Admin changelists and API lists do not query owners per row."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.admin = get_user_model().objects.create_superuser(
+            username="root", password="pass", email="root@example.com"
+        )
+        self.client.force_login(self.admin)
+
+    def _owner_queries(self, model_name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(f"admin:points_{model_name}_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return [
+            query
+            for query in ctx.captured_queries
+            if 'FROM "accounts_user"' in query["sql"]
+        ]
+
+    def test_changelists_load_owners_in_one_query(self):
+        """Wallet, source and transaction changelists batch owner loading."""
+        for index in range(3):
+            user = User.objects.create_user(username=f"more{index}", password="pass")
+            services.grant_points(user, 5, PointType.CASH, "B")
+
+        for name in ("pointwallet", "pointsource", "pointtransaction"):
+            # 一次用于当前登录用户, 一次批量加载所有者
+            self.assertEqual(len(self._owner_queries(name)), 2, name)
+
+    def test_organization_withdrawal_list_prefetches_owner(self):
+        """The organization withdrawal list resolves the owner once."""
+        org = Organization.objects.create(name="Pay Org", slug="pay-org")
+        OrganizationMembership.objects.create(
+            user=self.admin,
+            organization=org,
+            role=OrganizationMembership.Role.OWNER,
+        )
+        services.grant_points(org, 1000, PointType.CASH, "Cash")
+        withdrawal = services.create_withdrawal_request(
+            org, 300, "Name", "13800000000", "110101199001011234", "Bank", "1"
+        )
+        services.reject_withdrawal(withdrawal.id, self.admin, "no")
+        services.create_withdrawal_request(
+            org, 300, "Name", "13800000000", "110101199001011234", "Bank", "1"
+        )
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.admin)}"}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                f"/api/v1/points/organizations/{org.slug}/withdrawals", **headers
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["items"]), 2)
+        owner_queries = [
+            query
+            for query in ctx.captured_queries
+            if 'FROM "accounts_organization"' in query["sql"]
+        ]
+        # 一次用于成员校验, 一次批量加载所有者
+        self.assertLessEqual(len(owner_queries), 2)
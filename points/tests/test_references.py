@@ -0,0 +1,160 @@
+"""Tests for typed ledger references."""
+
+from django.test import TestCase
+
+from accounts.models import User
+from points import services
+from points.models import (
+    PointSource,
+    PointTransaction,
+    PointType,
+    ReferenceType,
+    TransactionType,
+)
+from points.references import (
+    format_reference_id,
+    parse_reference_id,
+    resolve_reference,
+)
+
+
+class ReferenceHelperTests(TestCase):
+    """Tests for reference format/parse helpers."""
+
+    def test_format_and_parse_round_trip(self):
+        """Every reference type round-trips through the legacy string."""
+        for reference_type in ReferenceType:
+            reference_id = format_reference_id(reference_type, 42)
+            self.assertEqual(
+                parse_reference_id(reference_id), (reference_type.value, 42)
+            )
+
+    def test_legacy_formats(self):
+        """Legacy strings keep their historical shape."""
+        self.assertEqual(
+            format_reference_id(ReferenceType.ALLOCATION, 7), "allocation_7"
+        )
+        self.assertEqual(
+            format_reference_id(ReferenceType.WITHDRAWAL_REFUND, 7),
+            "refund:withdrawal:7",
+        )
+        self.assertEqual(
+            parse_reference_id("outreach_reward_9"),
+            (ReferenceType.OUTREACH_REWARD.value, 9),
+        )
+        self.assertEqual(
+            parse_reference_id("outreach_9"), (ReferenceType.OUTREACH.value, 9)
+        )
+
+    def test_unknown_or_empty_reference(self):
+        """Unrecognized strings produce an empty typed reference."""
+        self.assertEqual(parse_reference_id(""), ("", None))
+        self.assertEqual(parse_reference_id("ext:123"), ("", None))
+        self.assertEqual(parse_reference_id("allocation_abc"), ("", None))
+        self.assertEqual(format_reference_id("", 1), "")
+        self.assertEqual(format_reference_id(ReferenceType.ALLOCATION, None), "")
+
+    def test_resolve_reference(self):
+        """Explicit reference_id wins; missing parts are derived."""
+        self.assertEqual(
+            resolve_reference(reference_type=ReferenceType.SHOP_ITEM, reference_pk=3),
+            ("shop:item:3", "shop_item", 3),
+        )
+        self.assertEqual(
+            resolve_reference(
+                "custom", reference_type=ReferenceType.SHOP_ITEM, reference_pk=3
+            ),
+            ("custom", "shop_item", 3),
+        )
+        self.assertEqual(
+            resolve_reference("withdrawal:5"), ("withdrawal:5", "withdrawal", 5)
+        )
+        self.assertEqual(resolve_reference(), ("", "", None))
+
+
+class TypedReferenceServiceTests(TestCase):
+    """Tests for typed references written by grant/spend services."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="refuser", password="pass")
+
+    def test_grant_with_typed_reference(self):
+        """grant_points stores typed columns and derives reference_id."""
+        source = services.grant_points(
+            self.user,
+            100,
+            PointType.CASH,
+            "Allocation",
+            reference_type=ReferenceType.ALLOCATION,
+            reference_pk=12,
+        )
+
+        self.assertEqual(source.reference_id, "allocation_12")
+        self.assertEqual(source.reference_type, ReferenceType.ALLOCATION)
+        self.assertEqual(source.reference_pk, 12)
+        txn = PointTransaction.objects.get(source=source)
+        self.assertEqual(txn.reference_type, ReferenceType.ALLOCATION)
+        self.assertEqual(txn.reference_pk, 12)
+
+    def test_grant_with_legacy_reference_id(self):
+        """A legacy reference_id is parsed into typed columns."""
+        source = services.grant_points(
+            self.user, 100, PointType.CASH, "Legacy", reference_id="allocation_8"
+        )
+
+        self.assertEqual(source.reference_type, ReferenceType.ALLOCATION)
+        self.assertEqual(source.reference_pk, 8)
+
+    def test_spend_with_typed_reference(self):
+        """spend_points writes typed columns on every SPEND row."""
+        services.grant_points(self.user, 30, PointType.GIFT, "A")
+        services.grant_points(self.user, 30, PointType.GIFT, "B")
+
+        transactions = services.spend_points(
+            self.user,
+            50,
+            PointType.GIFT,
+            "Shop",
+            reference_type=ReferenceType.SHOP_ITEM,
+            reference_pk=4,
+        )
+
+        self.assertEqual(len(transactions), 2)
+        self.assertEqual(
+            PointTransaction.objects.filter(
+                transaction_type=TransactionType.SPEND,
+                reference_type=ReferenceType.SHOP_ITEM,
+                reference_pk=4,
+                reference_id="shop:item:4",
+            ).count(),
+            2,
+        )
+
+    def test_withdrawal_refund_uses_typed_reference(self):
+        """Approve and refund of a withdrawal record typed references."""
+        services.grant_points(self.user, 500, PointType.CASH, "Cash")
+        withdrawal = services.create_withdrawal_request(
+            self.user,
+            300,
+            "张三",
+            "13800138000",
+            "11010519491231002X",
+            "中国银行",
+            "6222000000000000000",
+        )
+        services.approve_withdrawal(withdrawal.id, self.user)
+        services.refund_withdrawal(withdrawal)
+
+        self.assertTrue(
+            PointTransaction.objects.filter(
+                reference_type=ReferenceType.WITHDRAWAL, reference_pk=withdrawal.id
+            ).exists()
+        )
+        refund_source = PointSource.objects.get(
+            reference_type=ReferenceType.WITHDRAWAL_REFUND,
+            reference_pk=withdrawal.id,
+        )
+        self.assertEqual(
+            refund_source.reference_id, f"refund:withdrawal:{withdrawal.id}"
+        )
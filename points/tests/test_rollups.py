@@ -0,0 +1,159 @@
+"""Tests for daily ledger rollups and wallet statistics."""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Organization, OrganizationMembership, User
+from accounts.services.jwt_tokens import create_access_token
+from points import services
+from points.models import (
+    DailyLedgerRollup,
+    LedgerRollupState,
+    PointTransaction,
+    PointType,
+    Tag,
+)
+from points.rollups import get_wallet_stats, rollup_ledger
+
+
+def _later():
+    return timezone.now() + timedelta(hours=1)
+
+
+class RollupLedgerTests(TestCase):
+    """Tests for rollup_ledger."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="rollup", password="pass")
+        Tag.objects.create(name="Rollup Tag", slug="rollup-tag")
+        services.grant_points(self.user, 100, PointType.CASH, "Cash")
+        services.grant_points(self.user, 40, PointType.GIFT, "Gift")
+        services.grant_points(
+            self.user, 60, PointType.GIFT, "Tagged", tag_slug="rollup-tag"
+        )
+        services.spend_points(self.user, 30, PointType.CASH, "Spend")
+
+    def test_rollup_recomputes_days_idempotently(self):
+        """Reruns rebuild the affected days without double counting."""
+        stats = rollup_ledger(now=_later(), batch_size=2)
+        self.assertEqual(stats, {"days": 1, "transactions": 4})
+        self.assertIsNotNone(LedgerRollupState.objects.get(pk=1).rolled_up_until)
+
+        services.grant_points(self.user, 5, PointType.CASH, "More cash")
+        self.assertEqual(rollup_ledger(now=_later())["transactions"], 5)
+        self.assertEqual(rollup_ledger(now=_later())["transactions"], 5)
+
+        cash_earn = DailyLedgerRollup.objects.get(
+            transaction_type="earn", point_type=PointType.CASH
+        )
+        self.assertEqual(cash_earn.amount, 105)
+        self.assertEqual(cash_earn.transaction_count, 2)
+
+    def test_late_commit_is_picked_up(self):
+        """A transaction dated before the last run is counted on the next one."""
+        rollup_ledger(now=_later())
+        late = services.grant_points(self.user, 7, PointType.CASH, "Late commit")
+        PointTransaction.objects.filter(source=late).update(
+            created_at=LedgerRollupState.objects.get(pk=1).rolled_up_until
+            - timedelta(minutes=5)
+        )
+
+        rollup_ledger(now=_later())
+
+        cash_earn = DailyLedgerRollup.objects.get(
+            transaction_type="earn", point_type=PointType.CASH
+        )
+        self.assertEqual(cash_earn.amount, 107)
+
+    def test_rollup_groups_by_tag(self):
+        """Tagged and untagged grants land in separate rows."""
+        rollup_ledger(now=_later())
+
+        gift_rows = DailyLedgerRollup.objects.filter(point_type=PointType.GIFT)
+        self.assertEqual(
+            {(row.tag.slug if row.tag else None, row.amount) for row in gift_rows},
+            {(None, 40), ("rollup-tag", 60)},
+        )
+
+    def test_recent_transactions_wait_for_safety_lag(self):
+        """Transactions inside the safety lag are left for the next run."""
+        self.assertEqual(rollup_ledger()["transactions"], 0)
+        self.assertFalse(DailyLedgerRollup.objects.exists())
+
+    def test_wallet_stats_read_from_rollups(self):
+        """Stats aggregate rollups by period and honour filters."""
+        rollup_ledger(now=_later())
+        wallet = services.get_wallet_or_none(self.user)
+
+        stats = get_wallet_stats(wallet, granularity="day")
+        self.assertEqual(stats["totals"]["earn"], {"amount": 200, "count": 3})
+        self.assertEqual(stats["totals"]["spend"], {"amount": -30, "count": 1})
+        self.assertEqual(stats["series"][0]["period"], timezone.localdate().isoformat())
+
+        monthly = get_wallet_stats(wallet, tag_slug="rollup-tag")
+        self.assertEqual(
+            monthly["series"][0]["period"],
+            timezone.localdate().replace(day=1).isoformat(),
+        )
+        self.assertEqual(monthly["totals"], {"earn": {"amount": 60, "count": 1}})
+
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(get_wallet_stats(wallet, start_date=tomorrow)["series"], [])
+        self.assertEqual(get_wallet_stats(None), {"totals": {}, "series": []})
+
+
+class WalletStatsApiTests(TestCase):
+    """Tests for the stats endpoints."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.user = User.objects.create_user(username="stats", password="pass")
+        self.outsider = User.objects.create_user(username="outsider", password="pass")
+        self.org = Organization.objects.create(name="Stats Org", slug="stats-org")
+        OrganizationMembership.objects.create(
+            user=self.user,
+            organization=self.org,
+            role=OrganizationMembership.Role.MEMBER,
+        )
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"
+        }
+        services.grant_points(self.user, 10, PointType.CASH, "Cash")
+        services.grant_points(self.org, 70, PointType.CASH, "Org cash")
+        rollup_ledger(now=_later())
+
+    def test_me_stats(self):
+        """Current user stats come from the rollup table."""
+        response = self.client.get(
+            "/api/v1/points/me/stats", {"granularity": "day"}, **self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["granularity"], "day")
+        self.assertEqual(payload["totals"]["earn"]["amount"], 10)
+
+    def test_invalid_granularity(self):
+        """Unknown granularities are rejected."""
+        response = self.client.get(
+            "/api/v1/points/me/stats", {"granularity": "year"}, **self.headers
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_organization_stats_requires_membership(self):
+        """Organization stats are visible to members only."""
+        response = self.client.get(
+            f"/api/v1/points/organizations/{self.org.slug}/stats", **self.headers
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["totals"]["earn"]["amount"], 70)
+        self.assertEqual(response.json()["organization"]["slug"], self.org.slug)
+
+        forbidden = self.client.get(
+            f"/api/v1/points/organizations/{self.org.slug}/stats",
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.outsider)}",
+        )
+        self.assertEqual(forbidden.status_code, 403)
@@ -122,7 +122,7 @@ class GetDetailedBalanceTests(TestCase):
         services.grant_points(self.user, 40, PointType.GIFT, "Gift no tag")
         services.grant_points(self.user, 30, PointType.GIFT, "Event", tag_slug="event")
 
-        balance = services.get_detailed_balance_or_zero(self.user)
+        balance = services.get_detailed_balance(self.user)
 
         self.assertEqual(balance["gift"], 70)
         self.assertEqual(balance["gift_no_tag"], 40)
@@ -0,0 +1,127 @@
+"""Tests for the in-process tag registry."""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from points import services
+from points.models import PointSource, PointType, Tag
+from points.tag_registry import (
+    TAG_REGISTRY_VERSION_KEY,
+    filter_by_tag_slug,
+    get_tag,
+    resolve_tag_id,
+    tag_registry,
+)
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "points-tag-registry-tests",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, REDIS_URL="redis://tag-registry-tests")
+class TagRegistryTests(TestCase):
+    """Tests for TagRegistry with a shared cache."""
+
+    def setUp(self):
+        """Start from an empty cache and registry."""
+        cache.clear()
+        tag_registry.clear()
+        self.tag = Tag.objects.create(name="Registry", slug="registry")
+
+    def tearDown(self):
+        """Clear the cache and registry."""
+        cache.clear()
+        tag_registry.clear()
+
+    def test_repeated_lookups_hit_memory(self):
+        """Known slugs and ids are served without queries after the first load."""
+        entry = get_tag("registry")
+        self.assertEqual((entry.id, entry.name), (self.tag.id, "Registry"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_tag_id("registry"), self.tag.id)
+            self.assertEqual(
+                tag_registry.get_by_ids([self.tag.id]), {self.tag.id: entry}
+            )
+
+    def test_unknown_slugs_are_not_cached(self):
+        """Tags created after a miss resolve on the next lookup."""
+        self.assertIsNone(resolve_tag_id("late"))
+        late = Tag.objects.create(name="Late", slug="late")
+
+        self.assertEqual(resolve_tag_id("late"), late.id)
+
+    def test_save_signal_invalidates(self):
+        """Renaming a tag drops the stale slug."""
+        resolve_tag_id("registry")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.slug = "renamed"
+            self.tag.save()
+
+        self.assertIsNone(resolve_tag_id("registry"))
+        self.assertEqual(resolve_tag_id("renamed"), self.tag.id)
+
+    def test_version_bump_from_another_process(self):
+        """A rotated shared token clears local entries on the next check."""
+        resolve_tag_id("registry")
+        Tag.objects.filter(id=self.tag.id).update(name="Changed")
+        cache.set(TAG_REGISTRY_VERSION_KEY, "other-process", None)
+
+        with patch("points.tag_registry.TAG_REGISTRY_RECHECK_SECONDS", 0):
+            self.assertEqual(get_tag("registry").name, "Changed")
+
+    def test_entries_expire_after_ttl(self):
+        """Entries are reloaded once their TTL lapses, even without a bump."""
+        resolve_tag_id("registry")
+        Tag.objects.filter(id=self.tag.id).update(name="Changed")
+
+        with (
+            patch("points.tag_registry.TAG_REGISTRY_RECHECK_SECONDS", 0),
+            patch("points.tag_registry.TAG_REGISTRY_ENTRY_TTL_SECONDS", 0),
+        ):
+            self.assertEqual(get_tag("registry").name, "Changed")
+
+    def test_filter_by_tag_slug(self):
+        """Filtering compares tag_id and yields nothing for unknown slugs."""
+        user = User.objects.create_user(username="tagged", password="pass")
+        services.grant_points(user, 5, PointType.GIFT, "Tagged", tag_slug="registry")
+        services.grant_points(user, 7, PointType.GIFT, "Plain")
+        sources = PointSource.objects.all()
+
+        self.assertEqual(filter_by_tag_slug(sources, "registry").count(), 1)
+        self.assertFalse(filter_by_tag_slug(sources, "missing").exists())
+        self.assertEqual(
+            services.get_gift_balances_by_tag(user, [self.tag.id]), {self.tag.id: 5}
+        )
+
+
+class TagRegistryWithoutSharedCacheTests(TestCase):
+    """Without a shared cache the registry reads through to the database."""
+
+    def setUp(self):
+        """Start from an empty registry."""
+        tag_registry.clear()
+
+    def test_lookups_query_every_time(self):
+        """DummyCache keeps no local entries."""
+        tag = Tag.objects.create(name="Plain", slug="plain")
+        resolve_tag_id("plain")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_tag_id("plain"), tag.id)
+
+    @override_settings(CACHES=LOCMEM_CACHES, REDIS_URL="")
+    def test_process_local_cache_is_not_trusted(self):
+        """A per-process LocMem version token cannot invalidate other workers."""
+        tag = Tag.objects.create(name="Local", slug="local")
+        resolve_tag_id("local")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_tag_id("local"), tag.id)
@@ -0,0 +1,86 @@
+"""Tests for annotated wallet balances."""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from points import services
+from points.models import PointSource, PointType, PointWallet, annotate_wallet_balances
+
+
+class AnnotateWalletBalancesTests(TestCase):
+    """Tests for annotate_wallet_balances."""
+
+    def test_matches_per_wallet_aggregates(self):
+        """Annotations agree with the model balance methods."""
+        user = User.objects.create_user(username="annotated", password="pass")
+        services.grant_points(user, 100, PointType.CASH, "Cash")
+        services.grant_points(user, 40, PointType.GIFT, "Gift")
+        services.spend_points(user, 30, PointType.CASH, "Spend")
+        expired = services.grant_points(user, 5, PointType.GIFT, "Expired")
+        PointSource.objects.filter(id=expired.id).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        empty = User.objects.create_user(username="empty", password="pass")
+        services.get_or_create_wallet(empty)
+
+        wallets = {
+            wallet.id: wallet
+            for wallet in annotate_wallet_balances(PointWallet.objects.all())
+        }
+
+        for wallet in wallets.values():
+            self.assertEqual(wallet.cash_total, wallet.get_cash_balance())
+            self.assertEqual(wallet.gift_total, wallet.get_gift_balance())
+            self.assertEqual(wallet.balance_total, wallet.get_total_balance())
+        self.assertEqual(
+            wallets[services.get_wallet_or_none(user).id].balance_total, 110
+        )
+
+
+class WalletChangelistTests(TestCase):
+    """Tests for the PointWallet admin changelist."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        admin = get_user_model().objects.create_superuser(
+            username="root", password="pass", email="root@example.com"
+        )
+        self.client.force_login(admin)
+        self.url = reverse("admin:points_pointwallet_changelist")
+
+    def _add_wallets(self, count, start=0):
+        for index in range(start, start + count):
+            user = User.objects.create_user(username=f"w{index}", password="pass")
+            services.grant_points(user, 10 * (index + 1), PointType.CASH, "Cash")
+
+    def _query_count(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """The changelist stays at a fixed number of queries."""
+        self._add_wallets(2)
+        small, _ = self._query_count()
+        self._add_wallets(10, start=2)
+        large, _ = self._query_count()
+
+        self.assertEqual(small, large)
+
+    def test_balance_columns_are_sortable(self):
+        """Ordering by the cash column sorts by the annotation."""
+        self._add_wallets(3)
+
+        _, response = self._query_count({"o": "-3"})
+
+        balances = [wallet.cash_total for wallet in response.context["cl"].result_list]
+        self.assertEqual(balances, sorted(balances, reverse=True))
+        self.assertEqual(balances[0], 30)
@@ -0,0 +1,145 @@
+"""Tests for the owner to wallet id cache and read-only balance helpers."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from accounts.models import User
+from points import services
+from points.models import PointType, PointWallet
+from points.wallet_ids import (
+    clear_wallet_ids,
+    get_cached_wallet_id,
+    remember_wallet_id,
+    wallet_id_scope,
+)
+
+
+@override_settings(POINTS_WALLET_ID_CACHE_SIZE=10)
+class WalletIdCacheTests(TestCase):
+    """Tests for wallet id caching in get_wallet_or_none and get_or_create_wallet."""
+
+    def setUp(self):
+        """Create an owner and start from an empty cache."""
+        clear_wallet_ids()
+        self.user = User.objects.create_user(username="cached", password="pass")
+
+    def tearDown(self):
+        """Empty the process cache."""
+        clear_wallet_ids()
+
+    def test_committed_wallet_is_served_from_memory(self):
+        """After commit the wallet lookup skips the database."""
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet = services.get_or_create_wallet(self.user)
+
+        with self.assertNumQueries(0):
+            cached = services.get_wallet_or_none(self.user)
+        self.assertEqual(cached.id, wallet.id)
+        self.assertEqual(cached.owner, self.user)
+        self.assertEqual(services.get_balance(self.user, PointType.CASH), 0)
+
+    def test_rolled_back_wallet_is_not_remembered(self):
+        """Wallets created in a rolled-back transaction never reach the cache."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    services.get_or_create_wallet(self.user)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertIsNone(services.get_wallet_or_none(self.user))
+
+    def test_deleted_wallet_is_forgotten(self):
+        """Deleting a wallet drops its cache entry."""
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet = services.get_or_create_wallet(self.user)
+        PointWallet.objects.get(id=wallet.id).delete()
+
+        self.assertIsNone(services.get_wallet_or_none(self.user))
+
+    def test_write_path_validates_stale_entry(self):
+        """A wallet deleted by another process is not written to."""
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet = services.get_or_create_wallet(self.user)
+        # 模拟其他进程删除钱包: 不触发本进程的 post_delete 信号
+        PointWallet.objects.filter(id=wallet.id)._raw_delete("default")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            source = services.grant_points(self.user, 5, PointType.CASH, "Grant")
+
+        self.assertNotEqual(source.wallet_id, wallet.id)
+        self.assertEqual(services.get_wallet_or_none(self.user).id, source.wallet_id)
+
+    def test_validated_entry_is_reused_within_scope(self):
+        """One existence check per request covers repeated writes."""
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet = services.get_or_create_wallet(self.user)
+
+        with wallet_id_scope():
+            with self.assertNumQueries(1):
+                self.assertEqual(services.get_or_create_wallet(self.user).id, wallet.id)
+            with self.assertNumQueries(0):
+                self.assertEqual(services.get_or_create_wallet(self.user).id, wallet.id)
+
+    @override_settings(POINTS_WALLET_ID_CACHE_SIZE=1)
+    def test_least_recently_used_entry_is_evicted(self):
+        """The process layer is bounded."""
+        remember_wallet_id((1, 1), 10)
+        remember_wallet_id((1, 2), 20)
+
+        self.assertIsNone(get_cached_wallet_id((1, 1)))
+        self.assertEqual(get_cached_wallet_id((1, 2)), 20)
+
+    @override_settings(POINTS_WALLET_ID_CACHE_SIZE=0)
+    def test_request_scope_without_process_cache(self):
+        """With the process layer disabled, entries live only inside a scope."""
+        with wallet_id_scope():
+            remember_wallet_id((1, 1), 10)
+            self.assertEqual(get_cached_wallet_id((1, 1)), 10)
+
+        self.assertIsNone(get_cached_wallet_id((1, 1)))
+
+
+class ReadOnlyBalanceTests(TestCase):
+    """Balance reads never create wallets."""
+
+    def test_balance_reads_do_not_insert(self):
+        """get_balance and get_detailed_balance leave wallet-less owners alone."""
+        user = User.objects.create_user(username="reader", password="pass")
+
+        self.assertEqual(services.get_balance(user), 0)
+        self.assertEqual(services.get_balance(user, PointType.GIFT, "tag"), 0)
+        self.assertEqual(services.get_detailed_balance(user)["total"], 0)
+        self.assertIsNone(services.get_wallet_or_none(user))
+        with self.assertRaises(services.InvalidPointOperationError):
+            services.get_balance(user, "invalid")
+
+    def test_detailed_balance_uses_one_aggregate(self):
+        """Cash and gift buckets come from a single grouped query."""
+        user = User.objects.create_user(username="detailed", password="pass")
+        services.grant_points(user, 100, PointType.CASH, "Cash")
+        services.grant_points(user, 20, PointType.GIFT, "Gift")
+        wallet = services.get_wallet_or_none(user)
+
+        with self.assertNumQueries(1):
+            balance = services.get_wallet_detailed_balance(wallet)
+        self.assertEqual((balance["cash"], balance["gift_no_tag"]), (100, 20))
+
+
+class BenchmarkWalletReadsCommandTests(TransactionTestCase):
+    """Tests for the benchmark_wallet_reads command."""
+
+    def test_reports_both_modes_and_cleans_up(self):
+        """The command reports every endpoint per mode and removes its data."""
+        out = StringIO()
+        call_command("benchmark_wallet_reads", requests=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith("[uncached] /api/v1/points/me/wallet"))
+        self.assertFalse(PointWallet.objects.exists())
+        self.assertFalse(User.objects.filter(username__startswith="bench").exists())
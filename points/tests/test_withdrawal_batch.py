@@ -0,0 +1,126 @@
+"""Tests for batch withdrawal approval and completion."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from points import services
+from points.models import (
+    IdempotencyRecord,
+    PointTransaction,
+    PointType,
+    TransactionType,
+    WithdrawalRequest,
+    WithdrawalStatus,
+)
+from points.references import format_reference_id
+
+
+class BatchWithdrawalTests(TestCase):
+    """Tests for approve_withdrawals and complete_withdrawals."""
+
+    def setUp(self):
+        """Create an admin and two funded users."""
+        self.admin = User.objects.create_user(username="batch-admin", password="pass")
+        self.alice = User.objects.create_user(username="alice", password="pass")
+        self.bob = User.objects.create_user(username="bob", password="pass")
+        for _ in range(2):
+            services.grant_points(self.alice, 3000, PointType.CASH, "Cash")
+        services.grant_points(self.bob, 2000, PointType.CASH, "Cash")
+
+    def _request(self, owner, amount):
+        # 直接创建, 以便同一钱包存在多笔待处理申请
+        return WithdrawalRequest.objects.create(
+            wallet=services.get_or_create_wallet(owner),
+            amount=amount,
+            real_name="Name",
+            phone="13800000000",
+            id_card="110101199001011234",
+            bank_name="Bank",
+            bank_account="1",
+        )
+
+    def test_approves_in_bulk_with_fifo_ledger(self):
+        """Spends cross sources in FIFO order and keep balances consistent."""
+        first = self._request(self.alice, 2000)
+        second = self._request(self.alice, 2500)
+        third = self._request(self.bob, 1500)
+
+        approved, errors = services.approve_withdrawals(
+            [third.id, first.id, second.id], self.admin, note="月结"
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual([w.id for w in approved], [first.id, second.id, third.id])
+        self.assertEqual(services.get_balance(self.alice, PointType.CASH), 1500)
+        self.assertEqual(services.get_balance(self.bob, PointType.CASH), 500)
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, WithdrawalStatus.APPROVED)
+        self.assertEqual(second.admin_note, "月结")
+        self.assertEqual(second.processed_by, self.admin)
+        spends = list(
+            PointTransaction.objects.filter(
+                transaction_type=TransactionType.SPEND, reference_pk=second.id
+            ).order_by("id")
+        )
+        self.assertEqual([txn.amount for txn in spends], [-1000, -1500])
+        self.assertEqual([txn.balance_after for txn in spends], [3000, 1500])
+        self.assertEqual(second.transaction, spends[0])
+        record = IdempotencyRecord.objects.get(
+            key=format_reference_id("withdrawal", second.id)
+        )
+        self.assertEqual(record.result_ids, [txn.id for txn in spends])
+
+    def test_reports_per_item_errors(self):
+        """Failures are reported per request while the rest are approved."""
+        fits = self._request(self.bob, 1500)
+        too_much = self._request(self.bob, 1000)
+        rejected = self._request(self.alice, 200)
+        services.reject_withdrawal(rejected.id, self.admin, "no")
+
+        approved, errors = services.approve_withdrawals(
+            [fits.id, too_much.id, rejected.id, 999_999], self.admin
+        )
+
+        self.assertEqual([w.id for w in approved], [fits.id])
+        self.assertEqual(errors[too_much.id], "现金积分不足：需要 1000，可用 500")
+        self.assertIn("状态无效", errors[rejected.id])
+        self.assertIn("不存在", errors[999_999])
+        too_much.refresh_from_db()
+        self.assertEqual(too_much.status, WithdrawalStatus.PENDING)
+        self.assertEqual(services.get_balance(self.bob, PointType.CASH), 500)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        """The batch uses a fixed number of queries."""
+
+        def approve(count):
+            users = []
+            for index in range(count):
+                user = User.objects.create_user(username=f"b{count}-{index}")
+                services.grant_points(user, 1000, PointType.CASH, "Cash")
+                users.append(self._request(user, 500).id)
+            with CaptureQueriesContext(connection) as ctx:
+                approved, _ = services.approve_withdrawals(users, self.admin)
+            self.assertEqual(len(approved), count)
+            return len(ctx)
+
+        self.assertEqual(approve(2), approve(8))
+
+    def test_complete_withdrawals(self):
+        """Approved requests are completed; others are reported."""
+        pending = self._request(self.alice, 1000)
+        approved = self._request(self.bob, 1000)
+        services.approve_withdrawals([approved.id], self.admin)
+
+        completed, errors = services.complete_withdrawals(
+            [approved.id, pending.id], self.admin
+        )
+
+        self.assertEqual([w.id for w in completed], [approved.id])
+        self.assertIn("状态无效", errors[pending.id])
+        self.assertEqual(
+            WithdrawalRequest.objects.get(id=approved.id).status,
+            WithdrawalStatus.COMPLETED,
+        )
@@ -0,0 +1,82 @@
+"""Owner to wallet id cache, scoped per request and per process."""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# (content_type_id, object_id) -> wallet_id; 钱包创建后所有者映射不再变化, 只缓存已存在的钱包
+_request_wallet_ids: ContextVar[dict | None] = ContextVar(
+    "points_request_wallet_ids", default=None
+)
+_process_wallet_ids: OrderedDict[tuple[int, int], int] = OrderedDict()
+_process_lock = threading.Lock()
+
+
+def get_cached_wallet_id(key: tuple[int, int], validate=None) -> int | None:
+    """
+    Return the cached wallet id for ``key`` from the request or process layer.
+
+    进程层的条目可能已被其他进程删除 (post_delete 信号只清理本进程);
+    传入 ``validate`` 时进程层命中需通过校验, 失败则丢弃并返回 None.
+    通过校验的条目写入请求层, 请求层只保存本请求内已确认存在的钱包.
+    """
+    request_ids = _request_wallet_ids.get()
+    if request_ids is not None and key in request_ids:
+        return request_ids[key]
+
+    with _process_lock:
+        wallet_id = _process_wallet_ids.get(key)
+        if wallet_id is not None:
+            _process_wallet_ids.move_to_end(key)
+    if wallet_id is None or validate is None:
+        return wallet_id
+    if not validate(wallet_id):
+        forget_wallet_id(key)
+        return None
+    if request_ids is not None:
+        request_ids[key] = wallet_id
+    return wallet_id
+
+
+def remember_wallet_id(key: tuple[int, int], wallet_id: int) -> None:
+    """Store ``wallet_id`` in both layers, evicting the least recently used entry."""
+    request_ids = _request_wallet_ids.get()
+    if request_ids is not None:
+        request_ids[key] = wallet_id
+
+    limit = settings.POINTS_WALLET_ID_CACHE_SIZE
+    if limit <= 0:
+        return
+    with _process_lock:
+        _process_wallet_ids[key] = wallet_id
+        _process_wallet_ids.move_to_end(key)
+        while len(_process_wallet_ids) > limit:
+            _process_wallet_ids.popitem(last=False)
+
+
+def forget_wallet_id(key: tuple[int, int]) -> None:
+    """Drop ``key`` from both layers (e.g. after the wallet is deleted)."""
+    request_ids = _request_wallet_ids.get()
+    if request_ids is not None:
+        request_ids.pop(key, None)
+    with _process_lock:
+        _process_wallet_ids.pop(key, None)
+
+
+def clear_wallet_ids() -> None:
+    """Empty the process layer."""
+    with _process_lock:
+        _process_wallet_ids.clear()
+
+
+@contextmanager
+def wallet_id_scope():
+    """在代码块内启用请求级缓存, 退出时丢弃."""
+    token = _request_wallet_ids.set({})
+    try:
+        yield
+    finally:
+        _request_wallet_ids.reset(token)
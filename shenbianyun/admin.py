@@ -2,6 +2,8 @@
 
 from django.contrib import admin
 
+from common.pagination import EstimatedCountPaginator
+
 from .models import PaymentRecord, SignedUser
 
 
@@ -56,6 +58,9 @@ class SignedUserAdmin(admin.ModelAdmin):
 class PaymentRecordAdmin(admin.ModelAdmin):
     """付款记录管理."""
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     list_display = [
         "mer_batch_id",
         "mer_order_id",
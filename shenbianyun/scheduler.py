@@ -97,6 +97,128 @@ def check_payment_status_job():
             logger.exception("付款状态查询任务失败")
 
 
+def expire_points_job():
+    """定时清理过期积分: 清零到期积分来源并记录 EXPIRE 交易."""
+    from points.services import expire_points
+
+    with _distributed_lock("expire_points", timeout=540) as acquired:
+        if not acquired:
+            logger.info("积分过期清理: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            result = expire_points()
+            logger.info("积分过期清理任务完成: %s", result)
+        except Exception:
+            logger.exception("积分过期清理任务失败")
+
+
+def compact_point_sources_job():
+    """定时归档已耗尽的积分来源, 保持 PointSource 热表精简."""
+    from points.services import compact_exhausted_sources
+
+    with _distributed_lock("compact_point_sources", timeout=3000) as acquired:
+        if not acquired:
+            logger.info("积分来源归档: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            result = compact_exhausted_sources()
+            logger.info("积分来源归档任务完成: %s", result)
+        except Exception:
+            logger.exception("积分来源归档任务失败")
+
+
+def purge_idempotency_records_job():
+    """定时清理超过保留期的客户端幂等记录."""
+    from points.services import purge_idempotency_records
+
+    with _distributed_lock("purge_idempotency_records", timeout=3000) as acquired:
+        if not acquired:
+            logger.info("幂等记录清理: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            deleted = purge_idempotency_records()
+            logger.info("幂等记录清理任务完成: deleted=%s", deleted)
+        except Exception:
+            logger.exception("幂等记录清理任务失败")
+
+
+def rollup_ledger_job():
+    """定时增量汇总积分流水日报."""
+    from points.rollups import rollup_ledger
+
+    with _distributed_lock("rollup_ledger", timeout=270) as acquired:
+        if not acquired:
+            logger.info("积分日报汇总: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            result = rollup_ledger()
+            logger.info("积分日报汇总任务完成: %s", result)
+        except Exception:
+            logger.exception("积分日报汇总任务失败")
+
+
+def reconcile_inbox_counters_job():
+    """定时按 UserMessage 校准站内信收件箱计数."""
+    from messages.services import reconcile_inbox_counters
+
+    with _distributed_lock("reconcile_inbox_counters", timeout=3000) as acquired:
+        if not acquired:
+            logger.info("收件箱计数校准: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            fixed = reconcile_inbox_counters()
+            logger.info("收件箱计数校准任务完成: fixed=%d", fixed)
+        except Exception:
+            logger.exception("收件箱计数校准任务失败")
+
+
+def archive_user_messages_job():
+    """定时按保留策略归档旧的站内信."""
+    from messages.services import archive_user_messages
+
+    with _distributed_lock("archive_user_messages", timeout=3000) as acquired:
+        if not acquired:
+            logger.info("站内信归档: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            result = archive_user_messages()
+            logger.info("站内信归档任务完成: %s", result)
+        except Exception:
+            logger.exception("站内信归档任务失败")
+
+
+def resume_stalled_outreach_job():
+    """定时重新入队停滞的人才触达投递任务."""
+    from talent_reach.services import resume_stalled_outreach
+
+    with _distributed_lock("resume_stalled_outreach", timeout=540) as acquired:
+        if not acquired:
+            logger.info("触达投递续传: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID)
+            return
+        try:
+            resumed = resume_stalled_outreach()
+            logger.info("触达投递续传任务完成: resumed=%d", resumed)
+        except Exception:
+            logger.exception("触达投递续传任务失败")
+
+
+def expire_outreach_rewards_job():
+    """定时结算过期未领取的人才触达阅读奖励."""
+    from talent_reach.services import expire_outreach_rewards
+
+    with _distributed_lock("expire_outreach_rewards", timeout=540) as acquired:
+        if not acquired:
+            logger.info(
+                "触达奖励过期结算: 另一节点持有锁, 本节点(%s)跳过本轮", _NODE_ID
+            )
+            return
+        try:
+            result = expire_outreach_rewards()
+            logger.info("触达奖励过期结算任务完成: %s", result)
+        except Exception:
+            logger.exception("触达奖励过期结算任务失败")
+
+
 def start_scheduler():
     """
     Initialize and start the APScheduler background scheduler.
@@ -136,7 +258,74 @@ def start_scheduler():
         replace_existing=True,
     )
 
+    scheduler.add_job(
+        expire_points_job,
+        trigger=IntervalTrigger(minutes=10),
+        id="expire_points",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        compact_point_sources_job,
+        trigger=IntervalTrigger(hours=24),
+        id="compact_point_sources",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        purge_idempotency_records_job,
+        trigger=IntervalTrigger(hours=24),
+        id="purge_idempotency_records",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        rollup_ledger_job,
+        trigger=IntervalTrigger(minutes=5),
+        id="rollup_ledger",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        reconcile_inbox_counters_job,
+        trigger=IntervalTrigger(hours=1),
+        id="reconcile_inbox_counters",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        archive_user_messages_job,
+        trigger=IntervalTrigger(hours=24),
+        id="archive_user_messages",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        resume_stalled_outreach_job,
+        trigger=IntervalTrigger(minutes=10),
+        id="resume_stalled_outreach",
+        max_instances=1,
+        replace_existing=True,
+    )
+
+    scheduler.add_job(
+        expire_outreach_rewards_job,
+        trigger=IntervalTrigger(hours=1),
+        id="expire_outreach_rewards",
+        max_instances=1,
+        replace_existing=True,
+    )
+
     scheduler.start()
     logger.info(
-        "身边云定时任务调度器已启动（同步签约用户:3min, 批量付款:5min, 付款状态查询:5min）"
+        "身边云定时任务调度器已启动（同步签约用户:3min, 批量付款:5min, "
+        "付款状态查询:5min, 积分过期清理:10min, 积分来源归档:24h, "
+        "幂等记录清理:24h, 积分日报汇总:5min, 收件箱计数校准:1h, 站内信归档:24h, "
+        "触达投递续传:10min, 触达奖励过期结算:1h）"
     )
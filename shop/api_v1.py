@@ -13,6 +13,7 @@ from accounts.api_v1 import jwt_bearer_auth
 from accounts.models import ShippingAddress
 from config.api_common import (
     ApiError,
+    CursorPaginationSchema,
     ErrorResponseSchema,
     PaginationSchema,
     build_paginated_response,
@@ -100,7 +101,7 @@ class RedemptionSchema(Schema):
 
 class RedemptionListResponseSchema(Schema):
     items: list[RedemptionSchema]
-    pagination: PaginationSchema
+    pagination: PaginationSchema | CursorPaginationSchema
 
 
 def _get_dynamic_stock(item: ShopItem) -> int | None:
@@ -262,7 +263,7 @@ def shop_item_list_endpoint(request, page: int = 1, page_size: int = 20):
         page_obj,
         [_serialize_shop_item(item, stock_map=stock_map) for item in page_items],
     )
-    response["balance"] = points_services.get_detailed_balance_or_zero(request.auth)
+    response["balance"] = points_services.get_detailed_balance(request.auth)
     return response
 
 
@@ -292,7 +293,13 @@ def shop_item_detail_endpoint(request, item_id: int):
     "/redemptions",
     response={200: RedemptionListResponseSchema, 401: ErrorResponseSchema},
 )
-def redemption_list_endpoint(request, page: int = 1, page_size: int = 20):
+def redemption_list_endpoint(
+    request,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
+):
     """List the current user's redemption history."""
     redemptions = (
         Redemption.objects.filter(user_profile=request.auth)
@@ -303,7 +310,12 @@ def redemption_list_endpoint(request, page: int = 1, page_size: int = 20):
         .prefetch_related("item__allowed_tags")
     )
     page_obj = paginate_queryset(
-        redemptions, page=page, page_size=page_size, max_page_size=100
+        redemptions,
+        page=page,
+        page_size=page_size,
+        max_page_size=100,
+        cursor=cursor,
+        include_total=include_total,
     )
     page_redemptions = list(page_obj.object_list)
     stock_map = _batch_coupon_stock([r.item for r in page_redemptions])
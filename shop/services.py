@@ -7,9 +7,10 @@ from django.db.models import F
 from django.utils import timezone
 
 from points import services as points_services
-from points.models import PointType
+from points.models import PointType, ReferenceType
+from points.tag_registry import tag_registry
 
-from .models import Redemption, ShopItem
+from .models import Redemption, ShopItem, ShopItemAllowedTags
 
 logger = logging.getLogger(__name__)
 
@@ -175,13 +176,22 @@ def redeem_item(user, item_id: int, shipping_address_id=None, lang="zh") -> dict
 
     # 2. 积分验证和扣除
     tag_slug = None
-    allowed_tags = list(item.allowed_tags.all())
+    allowed_tags = sorted(
+        tag_registry.get_by_ids(
+            ShopItemAllowedTags.objects.filter(shopitem=item).values_list(
+                "tag_id", flat=True
+            )
+        ).values(),
+        key=lambda tag: tag.name,
+    )
 
     if allowed_tags:
         # 商品有标签限制，查找用户拥有的、商品允许的标签积分
+        balances = points_services.get_gift_balances_by_tag(
+            user, [tag.id for tag in allowed_tags]
+        )
         for tag in allowed_tags:
-            balance = points_services.get_balance(user, PointType.GIFT, tag.slug)
-            if balance >= item.cost:
+            if balances.get(tag.id, 0) >= item.cost:
                 tag_slug = tag.slug
                 break
 
@@ -220,7 +230,8 @@ def redeem_item(user, item_id: int, shipping_address_id=None, lang="zh") -> dict
             point_type=PointType.GIFT,
             description=f"兑换商品: {item.name_zh}",
             tag_slug=tag_slug,
-            reference_id=f"shop:item:{item.id}",
+            reference_type=ReferenceType.SHOP_ITEM,
+            reference_pk=item.id,
             created_by=user,
         )
     except points_services.InsufficientPointsError as err:
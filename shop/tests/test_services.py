@@ -278,10 +278,10 @@ class RedeemItemServiceTests(TestCase):
                 shipping_address_id=other_address.id,
             )
 
-    @patch("shop.services.points_services.get_balance")
+    @patch("shop.services.points_services.get_gift_balances_by_tag")
     @patch("shop.services.points_services.spend_points")
     def test_allowed_tags_selects_sufficient_tag(
-        self, mock_spend_points, mock_get_balance
+        self, mock_spend_points, mock_get_balances
     ):
         """Ensure allowed tag balance selection prefers a tag with enough points."""
         tag_a = Tag.objects.create(name="Tag A", slug="tag-a")
@@ -296,14 +296,7 @@ class RedeemItemServiceTests(TestCase):
         )
         item.allowed_tags.set([tag_a, tag_b])
 
-        def fake_balance(owner, point_type, tag_slug=None, **kwargs):
-            if tag_slug == tag_a.slug:
-                return 10
-            if tag_slug == tag_b.slug:
-                return 200
-            return 0
-
-        mock_get_balance.side_effect = fake_balance
+        mock_get_balances.return_value = {tag_a.id: 10, tag_b.id: 200}
 
         result = redeem_item(user=self.user, item_id=item.id)
         redemption = result["redemption"]
@@ -316,8 +309,8 @@ class RedeemItemServiceTests(TestCase):
         item.refresh_from_db()
         self.assertEqual(item.stock, 4)
 
-    @patch("shop.services.points_services.get_balance", return_value=0)
-    def test_allowed_tags_insufficient_balance(self, _mock_get_balance):
+    @patch("shop.services.points_services.get_gift_balances_by_tag", return_value={})
+    def test_allowed_tags_insufficient_balance(self, _mock_get_balances):
         """Fail if every allowed tag lacks enough balance."""
         tag_a = Tag.objects.create(name="Tag A", slug="tag-a")
         tag_b = Tag.objects.create(name="Tag B", slug="tag-b")
@@ -340,10 +333,10 @@ class RedeemItemServiceTests(TestCase):
         item.refresh_from_db()
         self.assertEqual(item.stock, 5)
 
-    @patch("shop.services.points_services.get_balance")
+    @patch("shop.services.points_services.get_gift_balances_by_tag")
     @patch("shop.services.points_services.spend_points")
     def test_allowed_tags_prefers_first_sufficient_tag(
-        self, mock_spend_points, mock_get_balance
+        self, mock_spend_points, mock_get_balances
     ):
         """When multiple tags qualify, the first allowed tag should be selected."""
         tag_a = Tag.objects.create(name="Alpha Tag", slug="alpha-tag")
@@ -357,20 +350,15 @@ class RedeemItemServiceTests(TestCase):
             stock=5,
         )
         item.allowed_tags.set([tag_a, tag_b])
-        mock_get_balance.side_effect = (
-            lambda owner, point_type, tag_slug=None, **kwargs: {
-                tag_a.slug: 200,
-                tag_b.slug: 300,
-            }.get(tag_slug, 0)
-        )
+        mock_get_balances.return_value = {tag_a.id: 200, tag_b.id: 300}
 
         redeem_item(user=self.user, item_id=item.id)
 
         _, kwargs = mock_spend_points.call_args
         self.assertEqual(kwargs["tag_slug"], tag_a.slug)
 
-    @patch("shop.services.points_services.get_balance")
-    def test_allowed_tags_do_not_combine_partial_balances(self, mock_get_balance):
+    @patch("shop.services.points_services.get_gift_balances_by_tag")
+    def test_allowed_tags_do_not_combine_partial_balances(self, mock_get_balances):
         """Two insufficient tag buckets should not be combined to satisfy a purchase."""
         tag_a = Tag.objects.create(name="Partial A", slug="partial-a")
         tag_b = Tag.objects.create(name="Partial B", slug="partial-b")
@@ -383,12 +371,7 @@ class RedeemItemServiceTests(TestCase):
             stock=5,
         )
         item.allowed_tags.set([tag_a, tag_b])
-        mock_get_balance.side_effect = (
-            lambda owner, point_type, tag_slug=None, **kwargs: {
-                tag_a.slug: 60,
-                tag_b.slug: 50,
-            }.get(tag_slug, 0)
-        )
+        mock_get_balances.return_value = {tag_a.id: 60, tag_b.id: 50}
 
         with self.assertRaisesMessage(
             RedemptionError, "您没有足够的符合条件的积分来兑换此商品"
@@ -27,13 +27,21 @@ class OutreachCampaignAdmin(admin.ModelAdmin):
         "delivered_count",
         "read_count",
         "rewarded_count",
+        "expired_count",
+        "unclaimed_reward",
+        "refunded_amount",
         "point_type",
         "total_cost",
         "created_at",
     )
     list_filter = ("status", "point_type", "created_at", "author")
     search_fields = ("title", "reference_id")
-    readonly_fields = ("created_at", "completed_at")
+    readonly_fields = (
+        "created_at",
+        "completed_at",
+        "reward_settled_at",
+        "delivery_enqueued_at",
+    )
 
 
 @admin.register(OutreachRecipient)
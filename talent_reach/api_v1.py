@@ -43,6 +43,7 @@ class PreviewRequestSchema(Schema):
     countries: list[str] | None = None
     regions: list[str] | None = None
     top_n: int | None = None
+    count_only: bool = False
 
 
 class SendRequestSchema(Schema):
@@ -63,6 +64,8 @@ class CampaignListSchema(Schema):
     total_recipients: int
     read_count: int
     rewarded_count: int
+    expired_count: int
+    unclaimed_reward: int
     total_cost: int
     reward_pool: int
     point_type: str
@@ -94,6 +97,8 @@ def _serialize_campaign_list_item(campaign) -> dict:
         "total_recipients": campaign.total_recipients,
         "read_count": campaign.read_count,
         "rewarded_count": campaign.rewarded_count,
+        "expired_count": campaign.expired_count,
+        "unclaimed_reward": campaign.unclaimed_reward,
         "total_cost": campaign.total_cost,
         "reward_pool": campaign.reward_pool,
         "point_type": campaign.point_type,
@@ -223,6 +228,7 @@ def preview_endpoint(request, payload: PreviewRequestSchema):
         countries=payload.countries,
         regions=payload.regions,
         top_n=payload.top_n,
+        count_only=payload.count_only,
     )
     return result
 
@@ -299,7 +305,7 @@ def campaign_list_endpoint(request):
     response={200: dict, 401: ErrorResponseSchema, 404: ErrorResponseSchema},
 )
 def campaign_detail_endpoint(request, campaign_id: int):
-    """Get detailed campaign info with live stats."""
+    """Get detailed campaign info with its stats."""
     try:
         detail = services.get_campaign_detail(campaign_id, request.auth)
     except Exception as exc:
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talent_reach', '0002_bilingual_content_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='delivery_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='delivery_cursor',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='delivery_heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='delivery_plan',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:44
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_campaign_counters(apps, schema_editor):
+    OutreachCampaign = apps.get_model("talent_reach", "OutreachCampaign")
+    pending = Q(recipient_records__is_rewarded=False) & Q(
+        recipient_records__reward_expired=False
+    )
+    expired = Q(recipient_records__reward_expired=True)
+    campaigns = OutreachCampaign.objects.annotate(
+        _delivered=Count("recipient_records"),
+        _rewarded=Count("recipient_records", filter=Q(recipient_records__is_rewarded=True)),
+        _expired=Count("recipient_records", filter=expired),
+        _expired_reward=Sum("recipient_records__reward_amount", filter=expired),
+        _unclaimed=Sum("recipient_records__reward_amount", filter=pending),
+    )
+    for campaign in campaigns.iterator():
+        campaign.delivered_count = campaign._delivered
+        campaign.rewarded_count = campaign._rewarded
+        campaign.expired_count = campaign._expired
+        campaign.expired_reward = campaign._expired_reward or 0
+        campaign.unclaimed_reward = campaign._unclaimed or 0
+        campaign.save(
+            update_fields=[
+                "delivered_count",
+                "rewarded_count",
+                "expired_count",
+                "expired_reward",
+                "unclaimed_reward",
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talent_reach', '0003_outreach_delivery_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='expired_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='expired_reward',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='reward_settled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='unclaimed_reward',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_campaign_counters, migrations.RunPython.noop),
+    ]
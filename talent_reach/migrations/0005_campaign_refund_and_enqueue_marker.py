@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('talent_reach', '0004_campaign_reward_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='delivery_enqueued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outreachcampaign',
+            name='refunded_amount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,5 +1,7 @@
 """Talent outreach data models."""
 
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import models
 
@@ -64,12 +66,17 @@ class OutreachCampaign(models.Model):
     reward_ratio = models.FloatField()  # Reward ratio from env var (0-1)
     reward_pool = models.PositiveIntegerField()  # total_cost * reward_ratio
     reward_expiry_days = models.PositiveIntegerField()
+    # Set once the expiry sweep has forfeited every unclaimed reward
+    reward_settled_at = models.DateTimeField(null=True, blank=True)
 
-    # Statistics
+    # Statistics (maintained incrementally by delivery, claims and the sweep)
     total_recipients = models.PositiveIntegerField()
     delivered_count = models.PositiveIntegerField(default=0)
     read_count = models.PositiveIntegerField(default=0)
     rewarded_count = models.PositiveIntegerField(default=0)
+    expired_count = models.PositiveIntegerField(default=0)
+    unclaimed_reward = models.PositiveIntegerField(default=0)
+    expired_reward = models.PositiveIntegerField(default=0)
 
     # Relations
     message = models.ForeignKey(
@@ -82,6 +89,17 @@ class OutreachCampaign(models.Model):
         max_length=100, blank=True
     )  # Points transaction reference
 
+    # Durable delivery: [[user_id, reward_amount, openrank_score], ...] and the
+    # number of plan entries already committed (see services.deliver_outreach)
+    delivery_plan = models.JSONField(default=list, blank=True)
+    delivery_cursor = models.PositiveIntegerField(default=0)
+    delivery_attempts = models.PositiveIntegerField(default=0)
+    delivery_heartbeat_at = models.DateTimeField(null=True, blank=True)
+    # Set when a delivery run is queued, cleared once a run picks it up
+    delivery_enqueued_at = models.DateTimeField(null=True, blank=True)
+    # Points returned to the author for recipients never delivered to
+    refunded_amount = models.PositiveIntegerField(default=0)
+
     # Status
     status = models.CharField(
         max_length=20, choices=Status.choices, default=Status.SENDING
@@ -98,6 +116,11 @@ class OutreachCampaign(models.Model):
         """Return string representation."""
         return f"Campaign: {self.title} ({self.status})"
 
+    @property
+    def reward_expires_at(self):
+        """Deadline after which unclaimed reading rewards are forfeited."""
+        return self.created_at + timedelta(days=self.reward_expiry_days)
+
 
 class OutreachRecipient(models.Model):
     """Per-recipient record for outreach campaigns (includes reading reward)."""
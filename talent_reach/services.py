@@ -1,28 +1,53 @@
 # ruff: noqa: PLR0913
 """Talent outreach service layer."""
 
+import hashlib
+import json
 import logging
 import math
-import threading
 import time
+from collections import defaultdict
 from datetime import timedelta
 
 from django.conf import settings
-from django.db import OperationalError, close_old_connections, transaction
-from django.db.models import F, QuerySet
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from social_django.models import UserSocialAuth
 
-from chdb.services import query_developers_for_outreach
+from chdb.services import (
+    compute_outreach_date_range,
+    query_developers_for_outreach,
+    query_outreach_developer_keys,
+)
 from messages.models import Message, UserMessage
-from messages.services import send_message
-from points.models import PointType
+from messages.services import deliver_message
+from points.models import PointType, ReferenceType
+from points.references import format_reference_id
 from points.services import grant_points, spend_points
 
 from .models import OutreachCampaign, OutreachDraft, OutreachRecipient
 
 logger = logging.getLogger(__name__)
 
+# Recipients written per committed chunk when delivering an outreach campaign
+OUTREACH_CHUNK_SIZE = 1000
+# Runs allowed per campaign before it is marked FAILED
+OUTREACH_MAX_DELIVERY_ATTEMPTS = 5
+# SENDING campaigns without a committed chunk for this long are re-enqueued
+OUTREACH_STALL_MINUTES = 10
+# Recipient rows flagged per UPDATE by the reward expiry sweep
+REWARD_EXPIRY_BATCH_SIZE = 1000
+# Matched audiences are cached per normalized criteria so previews and the
+# following send skip ClickHouse; shares the search_results cache alias
+AUDIENCE_CACHE_ALIAS = "search_results"
+AUDIENCE_CACHE_PREFIX = "talent_reach:audience"
+AUDIENCE_SNAPSHOT_TTL_SECONDS = 600
+# uids per UserSocialAuth lookup, below SQLite's bound-variable limit
+AUDIENCE_MATCH_CHUNK_SIZE = 500
+
 
 # ---------------------------------------------------------------------------
 # Draft management
@@ -82,64 +107,109 @@ def get_draft(draft_id: int, author) -> OutreachDraft:
 # ---------------------------------------------------------------------------
 
 
-def _match_registered_users(developers: list[dict]) -> list[dict]:
+def _match_registered_users(developers: list[dict]) -> list[list]:
     """
     Cross-reference ClickHouse developers with locally registered users.
 
     Matches are based on (provider, uid) in social_django's UserSocialAuth table.
-    Returns only developers who have a registered account.
+    Returns ``[user_id, platform, actor_id, openrank_score]`` rows for developers
+    who have a registered account, in the order ClickHouse returned them.
     """
     if not developers:
         return []
 
     # Build lookup: (provider_lower, actor_id) -> developer dict
     lookup = {}
+    uids_by_provider = defaultdict(list)
     for dev in developers:
         platform = (dev.get("platform") or "").lower()
         actor_id = str(dev.get("actor_id", ""))
+        if (platform, actor_id) not in lookup:
+            uids_by_provider[platform].append(actor_id)
         lookup[(platform, actor_id)] = dev
 
-    # Query UserSocialAuth for matching (provider, uid) pairs
-    # social_django stores provider as e.g. "github", uid as string
-    platforms = list({k[0] for k in lookup})
-    actor_ids = list({k[1] for k in lookup})
-
-    social_auths = UserSocialAuth.objects.filter(
-        provider__in=platforms,
-        uid__in=actor_ids,
-    ).select_related("user")
+    user_by_key = {
+        (provider, uid): user_id
+        for provider, uid, user_id in _iter_social_auth_matches(uids_by_provider)
+    }
 
     matched = []
     seen_users = set()
-    for sa in social_auths:
-        key = (sa.provider.lower(), str(sa.uid))
-        dev = lookup.get(key)
-        if dev and sa.user_id not in seen_users:
-            seen_users.add(sa.user_id)
+    for key, dev in lookup.items():
+        user_id = user_by_key.get(key)
+        if user_id is not None and user_id not in seen_users:
+            seen_users.add(user_id)
             matched.append(
-                {
-                    "user_id": sa.user_id,
-                    "username": sa.user.username,
-                    "platform": dev["platform"],
-                    "actor_id": dev["actor_id"],
-                    "openrank_score": dev.get("openrank_score", 0.0),
-                }
+                [
+                    user_id,
+                    dev["platform"],
+                    dev["actor_id"],
+                    dev.get("openrank_score", 0.0),
+                ]
             )
     return matched
 
 
-def preview_recipients(
+def _iter_social_auth_matches(uids_by_provider: dict[str, list[str]]):
+    """
+    Yield ``(provider, uid, user_id)`` for registered (provider, uid) pairs.
+
+    Queries one provider at a time in chunks of AUDIENCE_MATCH_CHUNK_SIZE uids,
+    so each lookup hits the (provider, uid) unique index with a bounded IN
+    list. social_django stores providers lowercase, e.g. "github".
+    """
+    for provider, uids in uids_by_provider.items():
+        for start in range(0, len(uids), AUDIENCE_MATCH_CHUNK_SIZE):
+            chunk = uids[start : start + AUDIENCE_MATCH_CHUNK_SIZE]
+            for uid, user_id in UserSocialAuth.objects.filter(
+                provider=provider, uid__in=chunk
+            ).values_list("uid", "user_id"):
+                yield provider, uid, user_id
+
+
+def _normalize_criteria(values: list[str] | None) -> list[str]:
+    return sorted({str(v).strip() for v in values or [] if str(v).strip()})
+
+
+def _audience_cache_key(
+    tag_ids: list[str],
+    languages: list[str] | None,
+    countries: list[str] | None,
+    regions: list[str] | None,
+    top_n: int | None,
+) -> str:
+    """Key an audience by its normalized criteria and the OpenRank date window."""
+    criteria = {
+        "tag_ids": _normalize_criteria(tag_ids),
+        "languages": _normalize_criteria(languages),
+        "countries": _normalize_criteria(countries),
+        "regions": _normalize_criteria(regions),
+        "top_n": top_n if top_n and top_n > 0 else None,
+        "window": compute_outreach_date_range(),
+    }
+    digest = hashlib.sha256(json.dumps(criteria, sort_keys=True).encode()).hexdigest()
+    return f"{AUDIENCE_CACHE_PREFIX}:{digest}"
+
+
+def get_audience(
     tag_ids: list[str],
     languages: list[str] | None = None,
     countries: list[str] | None = None,
     regions: list[str] | None = None,
     top_n: int | None = None,
-) -> dict:
+) -> list[list]:
     """
-    Preview reachable registered users matching the given criteria.
+    Return registered users matching the criteria, from the snapshot if fresh.
 
-    Returns cost estimates and developer list.
+    Returns ``[user_id, platform, actor_id, openrank_score]`` rows. Only
+    non-empty audiences are cached, so a ClickHouse outage is not remembered.
     """
+    cache_key = _audience_cache_key(tag_ids, languages, countries, regions, top_n)
+    audience_cache = caches[AUDIENCE_CACHE_ALIAS]
+    audience = audience_cache.get(cache_key)
+    if audience is not None:
+        return audience
+
     developers = query_developers_for_outreach(
         tag_ids=tag_ids,
         languages=languages,
@@ -147,22 +217,114 @@ def preview_recipients(
         regions=regions,
         top_n=top_n,
     )
+    audience = _match_registered_users(developers)
+    if audience:
+        audience_cache.set(cache_key, audience, AUDIENCE_SNAPSHOT_TTL_SECONDS)
+    return audience
+
+
+def count_audience(
+    tag_ids: list[str],
+    languages: list[str] | None = None,
+    countries: list[str] | None = None,
+    regions: list[str] | None = None,
+    top_n: int | None = None,
+) -> int:
+    """
+    Count registered users matching the criteria.
+
+    Uses the audience snapshot when fresh; otherwise fetches only developer
+    keys from ClickHouse and collects matching user ids chunk by chunk,
+    without building (or caching) the full audience.
+    """
+    cache_key = _audience_cache_key(tag_ids, languages, countries, regions, top_n)
+    audience = caches[AUDIENCE_CACHE_ALIAS].get(cache_key)
+    if audience is not None:
+        return len(audience)
+
+    uids_by_provider = defaultdict(dict)
+    for platform, actor_id in query_outreach_developer_keys(
+        tag_ids=tag_ids,
+        languages=languages,
+        countries=countries,
+        regions=regions,
+        top_n=top_n,
+    ):
+        uids_by_provider[platform.lower()][actor_id] = None
+    return len(
+        {
+            user_id
+            for _, _, user_id in _iter_social_auth_matches(
+                {provider: list(uids) for provider, uids in uids_by_provider.items()}
+            )
+        }
+    )
+
+
+def _iter_usernames(user_ids: list[int]):
+    """Yield ``(id, username)`` in chunks of AUDIENCE_MATCH_CHUNK_SIZE ids."""
+    from accounts.models import User
 
-    matched = _match_registered_users(developers)
-    registered_count = len(matched)
+    for start in range(0, len(user_ids), AUDIENCE_MATCH_CHUNK_SIZE):
+        yield from User.objects.filter(
+            id__in=user_ids[start : start + AUDIENCE_MATCH_CHUNK_SIZE]
+        ).values_list("id", "username")
+
+
+def preview_recipients(
+    tag_ids: list[str],
+    languages: list[str] | None = None,
+    countries: list[str] | None = None,
+    regions: list[str] | None = None,
+    top_n: int | None = None,
+    *,
+    count_only: bool = False,
+) -> dict:
+    """
+    Preview reachable registered users matching the given criteria.
+
+    Returns cost estimates and, unless ``count_only``, the developer list.
+    """
+    criteria = {
+        "tag_ids": tag_ids,
+        "languages": languages,
+        "countries": countries,
+        "regions": regions,
+        "top_n": top_n,
+    }
+    if count_only:
+        audience = None
+        registered_count = count_audience(**criteria)
+    else:
+        audience = get_audience(**criteria)
+        registered_count = len(audience)
     cost_per_user = settings.OUTREACH_COST_PER_USER
     reward_ratio = settings.OUTREACH_REWARD_RATIO
 
     estimated_cost = registered_count * cost_per_user
     reward_pool = int(estimated_cost * reward_ratio)
 
-    return {
+    result = {
         "reachable_users": registered_count,
         "estimated_cost": estimated_cost,
         "reward_pool": reward_pool,
         "reward_ratio": reward_ratio,
-        "developers": matched,
     }
+    if count_only:
+        return result
+
+    usernames = dict(_iter_usernames([row[0] for row in audience]))
+    result["developers"] = [
+        {
+            "user_id": user_id,
+            "username": usernames.get(user_id, ""),
+            "platform": platform,
+            "actor_id": actor_id,
+            "openrank_score": openrank_score,
+        }
+        for user_id, platform, actor_id, openrank_score in audience
+    ]
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -222,23 +384,21 @@ def send_outreach(
     """
     Execute the outreach campaign.
 
-    Synchronous part: validate, deduct points, create campaign.
-    Async part: send messages in background thread.
+    Synchronous part: validate, deduct points, create campaign and its plan.
+    Async part: deliver messages on the task worker (deliver_outreach).
     """
     # 1. Validate draft
     draft = OutreachDraft.objects.get(id=draft_id, author=author)
 
-    # 2. Query developers (reuse preview logic)
-    preview = preview_recipients(
+    # 2. Resolve the audience (the preview's snapshot when still fresh)
+    audience = get_audience(
         tag_ids=tag_ids,
         languages=languages,
         countries=countries,
         regions=regions,
         top_n=top_n,
     )
-
-    developers = preview["developers"]
-    if not developers:
+    if not audience:
         msg = "No reachable registered users found for the given criteria."
         raise ValueError(msg)
 
@@ -251,7 +411,7 @@ def send_outreach(
     cost_per_user = settings.OUTREACH_COST_PER_USER
     reward_ratio = settings.OUTREACH_REWARD_RATIO
     reward_expiry_days = settings.OUTREACH_REWARD_EXPIRY_DAYS
-    total_cost = len(developers) * cost_per_user
+    total_cost = len(audience) * cost_per_user
     reward_pool = int(total_cost * reward_ratio)
 
     # 5. Create campaign record first to get its ID for reference_id
@@ -273,11 +433,11 @@ def send_outreach(
         reward_ratio=reward_ratio,
         reward_pool=reward_pool,
         reward_expiry_days=reward_expiry_days,
-        total_recipients=len(developers),
+        total_recipients=len(audience),
         status=OutreachCampaign.Status.SENDING,
     )
 
-    reference_id = f"outreach_{campaign.id}"
+    reference_id = format_reference_id(ReferenceType.OUTREACH, campaign.id)
     campaign.reference_id = reference_id
     campaign.save(update_fields=["reference_id"])
 
@@ -291,6 +451,9 @@ def send_outreach(
             description=f"Talent outreach: {draft.title}",
             tag_is_null=tag_is_null,
             reference_id=reference_id,
+            reference_type=ReferenceType.OUTREACH,
+            reference_pk=campaign.id,
+            optimistic=True,
         )
     except Exception:
         campaign.status = OutreachCampaign.Status.FAILED
@@ -298,144 +461,225 @@ def send_outreach(
         raise
 
     # 7. Calculate reward_amount for each user using largest remainder method
-    scores = [d["openrank_score"] for d in developers]
+    scores = [openrank_score for _, _, _, openrank_score in audience]
     reward_amounts = _largest_remainder_allocation(scores, reward_pool)
 
-    # 8. Pre-fetch recipient users in the main thread (avoids transaction isolation
-    #    issues in the background thread where the test DB may not be visible).
-    from accounts.models import User
-
-    user_ids = [d["user_id"] for d in developers]
-    recipient_users = list(User.objects.filter(id__in=user_ids))
-    user_map = {u.id: u for u in recipient_users}
+    # 8. Persist the delivery plan (ids, never User rows) so the worker can
+    #    resume from the last committed chunk. Audience ids come from
+    #    UserSocialAuth rows; users deleted since are skipped per chunk.
+    campaign.delivery_plan = [
+        [user_id, reward_amount, openrank_score]
+        for (user_id, _, _, openrank_score), reward_amount in zip(
+            audience, reward_amounts, strict=True
+        )
+    ]
+    campaign.delivery_enqueued_at = timezone.now()
+    campaign.save(update_fields=["delivery_plan", "delivery_enqueued_at"])
 
     # 9. Delete draft
     draft.delete()
 
-    # 10. Send messages asynchronously (or synchronously in test environment)
-    # Run synchronously in test environment to avoid SQLite/transaction issues
-    if settings.TESTING:
-        _send_outreach_async(
-            campaign, developers, reward_amounts, author, recipient_users, user_map
-        )
-    else:
-        thread = threading.Thread(
-            target=_send_outreach_async,
-            args=(
-                campaign,
-                developers,
-                reward_amounts,
-                author,
-                recipient_users,
-                user_map,
-            ),
-            daemon=True,
-        )
-        thread.start()
+    # 10. Hand delivery to the task worker
+    from .tasks import deliver_outreach_campaign
 
+    deliver_outreach_campaign.enqueue(campaign.id)
+    campaign.refresh_from_db()
     return campaign
 
 
-def _send_outreach_async(
-    campaign: OutreachCampaign,
-    developers: list[dict],
-    reward_amounts: list[int],
-    author,
-    recipient_users: list,
-    user_map: dict,
-) -> None:
-    """Background thread: send messages and create recipient records."""
-    MAX_RETRIES = 3
-    RETRY_DELAY = 0.5  # seconds
-
-    try:
-        close_old_connections()
+def deliver_outreach(campaign_id: int) -> dict:
+    """
+    Deliver a SENDING campaign chunk by chunk, resuming from its cursor.
 
-        # Defensive check: abort early if no recipients resolved
-        if not recipient_users:
+    Each chunk creates UserMessage and OutreachRecipient rows and advances
+    ``delivery_cursor`` in one transaction, so a restarted run never
+    duplicates or skips recipients.
+    """
+    started = time.monotonic()
+    with transaction.atomic():
+        campaign = OutreachCampaign.objects.select_for_update().get(pk=campaign_id)
+        if campaign.status != OutreachCampaign.Status.SENDING:
+            return {"campaign_id": campaign_id, "status": campaign.status}
+        campaign.delivery_attempts += 1
+        campaign.delivery_heartbeat_at = timezone.now()
+        campaign.delivery_enqueued_at = None
+        if campaign.delivery_attempts > OUTREACH_MAX_DELIVERY_ATTEMPTS:
+            campaign.status = OutreachCampaign.Status.FAILED
+        elif not campaign.delivery_plan:
             logger.warning(
                 "No recipients for campaign %s, marking as failed", campaign.id
             )
             campaign.status = OutreachCampaign.Status.FAILED
-            campaign.save(update_fields=["status"])
-            return
-
-        user_ids = [d["user_id"] for d in developers]
-
-        # Retry wrapper for SQLite "database table is locked" errors
-        for attempt in range(MAX_RETRIES):
-            try:
-                # Send message
-                message = send_message(
-                    title=campaign.title,
-                    content=campaign.content,
-                    message_type=Message.MessageType.OUTREACH,
-                    sender=author,
-                    recipients=recipient_users,
-                )
-
-                # Link campaign to message
-                campaign.message = message
-                campaign.save(update_fields=["message"])
-
-                # Get created UserMessage records
-                user_messages = UserMessage.objects.filter(
-                    message=message, user_id__in=user_ids
-                )
-                um_map = {um.user_id: um for um in user_messages}
-
-                # Bulk create OutreachRecipient records
-                recipients_to_create = []
-                for dev, reward_amount in zip(developers, reward_amounts, strict=True):
-                    user_id = dev["user_id"]
-                    user_obj = user_map.get(user_id)
-                    um = um_map.get(user_id)
-                    if user_obj:
-                        recipients_to_create.append(
-                            OutreachRecipient(
-                                campaign=campaign,
-                                user=user_obj,
-                                user_message=um,
-                                reward_amount=reward_amount,
-                                openrank_score=dev.get("openrank_score", 0.0),
-                            )
-                        )
-
-                OutreachRecipient.objects.bulk_create(recipients_to_create)
-
-                # Update campaign status
-                campaign.status = OutreachCampaign.Status.COMPLETED
-                campaign.delivered_count = len(recipients_to_create)
-                campaign.completed_at = timezone.now()
-                campaign.save(
-                    update_fields=["status", "delivered_count", "completed_at"]
-                )
-
-                logger.info(
-                    "Outreach campaign %d completed: %d messages delivered",
-                    campaign.id,
-                    len(recipients_to_create),
-                )
-                break
-
-            except OperationalError as e:
-                if "locked" in str(e) and attempt < MAX_RETRIES - 1:
-                    logger.warning(
-                        "SQLite locked on attempt %d for campaign %d, retrying...",
-                        attempt + 1,
-                        campaign.id,
-                    )
-                    time.sleep(RETRY_DELAY * (attempt + 1))
-                    close_old_connections()
-                else:
-                    raise
+        elif campaign.message_id is None:
+            campaign.message = Message.objects.create(
+                title=campaign.title,
+                content=campaign.content,
+                message_type=Message.MessageType.OUTREACH,
+                sender_id=campaign.author_id,
+            )
+        if campaign.status == OutreachCampaign.Status.FAILED:
+            campaign.refunded_amount = _refund_undelivered(campaign)
+        campaign.save(
+            update_fields=[
+                "status",
+                "message",
+                "delivery_attempts",
+                "delivery_heartbeat_at",
+                "delivery_enqueued_at",
+                "refunded_amount",
+            ]
+        )
+    if campaign.status != OutreachCampaign.Status.SENDING:
+        return {"campaign_id": campaign_id, "status": campaign.status}
+
+    plan = campaign.delivery_plan
+    resumed_from = campaign.delivery_cursor
+    cursor = resumed_from
+    while cursor < len(plan):
+        chunk = plan[cursor : cursor + OUTREACH_CHUNK_SIZE]
+        with transaction.atomic():
+            locked_cursor = (
+                OutreachCampaign.objects.select_for_update()
+                .values_list("delivery_cursor", flat=True)
+                .get(pk=campaign_id)
+            )
+            if locked_cursor != cursor:
+                # Another run already committed this chunk
+                cursor = locked_cursor
+                continue
+            delivered = _deliver_outreach_chunk(campaign, chunk)
+            cursor += len(chunk)
+            OutreachCampaign.objects.filter(pk=campaign_id).update(
+                delivery_cursor=cursor,
+                delivered_count=F("delivered_count") + len(delivered),
+                unclaimed_reward=F("unclaimed_reward")
+                + sum(reward_amount for _, reward_amount, _ in delivered),
+                delivery_heartbeat_at=timezone.now(),
+            )
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Outreach campaign %d: %d/%d delivered (%.0f recipients/s)",
+            campaign_id,
+            cursor,
+            len(plan),
+            (cursor - resumed_from) / elapsed if elapsed else 0,
+        )
 
-    except Exception:
-        logger.exception("Outreach campaign %d failed", campaign.id)
-        campaign.status = OutreachCampaign.Status.FAILED
-        campaign.save(update_fields=["status"])
-    finally:
-        close_old_connections()
+    OutreachCampaign.objects.filter(
+        pk=campaign_id, status=OutreachCampaign.Status.SENDING
+    ).update(
+        status=OutreachCampaign.Status.COMPLETED,
+        completed_at=timezone.now(),
+        delivery_plan=[],
+    )
+    elapsed = time.monotonic() - started
+    delivered = cursor - resumed_from
+    result = {
+        "campaign_id": campaign_id,
+        "status": OutreachCampaign.Status.COMPLETED,
+        "delivered": delivered,
+        "resumed_from": resumed_from,
+        "seconds": round(elapsed, 3),
+        "per_second": round(delivered / elapsed, 1) if elapsed else None,
+    }
+    logger.info("Outreach campaign %d completed: %s", campaign_id, result)
+    return result
+
+
+def _refund_undelivered(campaign: OutreachCampaign) -> int:
+    """
+    Return the cost of every recipient not yet delivered to the author.
+
+    Runs in the transaction that marks the campaign FAILED; the idempotency
+    key makes a replayed failure return the original grant instead of
+    refunding twice.
+    """
+    amount = (
+        campaign.total_recipients - campaign.delivery_cursor
+    ) * campaign.cost_per_user
+    if amount <= 0:
+        return 0
+    grant_points(
+        owner=campaign.author,
+        amount=amount,
+        point_type=campaign.point_type,
+        reason=f"Talent outreach refund: {campaign.title}",
+        reference_type=ReferenceType.OUTREACH,
+        reference_pk=campaign.id,
+        idempotency_key=(
+            f"{format_reference_id(ReferenceType.OUTREACH, campaign.id)}:refund"
+        ),
+    )
+    logger.info("Outreach campaign %d failed, refunded %d", campaign.id, amount)
+    return amount
+
+
+def _deliver_outreach_chunk(campaign: OutreachCampaign, chunk: list) -> list:
+    """
+    Create UserMessage and OutreachRecipient rows for one plan chunk.
+
+    Returns the plan entries delivered; users deleted since the audience
+    snapshot are skipped.
+    """
+    from accounts.models import User
+
+    existing_ids = set(
+        User.objects.filter(id__in=[user_id for user_id, _, _ in chunk]).values_list(
+            "id", flat=True
+        )
+    )
+    chunk = [entry for entry in chunk if entry[0] in existing_ids]
+    if not chunk:
+        return chunk
+    user_ids = [user_id for user_id, _, _ in chunk]
+    deliver_message(campaign.message, user_ids)
+    um_map = dict(
+        UserMessage.objects.filter(
+            message_id=campaign.message_id, user_id__in=user_ids
+        ).values_list("user_id", "id")
+    )
+    OutreachRecipient.objects.bulk_create(
+        [
+            OutreachRecipient(
+                campaign=campaign,
+                user_id=user_id,
+                user_message_id=um_map.get(user_id),
+                reward_amount=reward_amount,
+                openrank_score=openrank_score,
+            )
+            for user_id, reward_amount, openrank_score in chunk
+        ],
+        ignore_conflicts=True,
+    )
+    return chunk
+
+
+def resume_stalled_outreach() -> int:
+    """
+    Re-enqueue SENDING campaigns whose delivery stopped making progress.
+
+    Campaigns with a run queued within the stall window are skipped, so a
+    backlog on the task worker does not pile up duplicate runs.
+    """
+    from .tasks import deliver_outreach_campaign
+
+    now = timezone.now()
+    stale_before = now - timedelta(minutes=OUTREACH_STALL_MINUTES)
+    campaign_ids = list(
+        OutreachCampaign.objects.filter(
+            Q(delivery_heartbeat_at__lt=stale_before)
+            | Q(delivery_heartbeat_at__isnull=True, created_at__lt=stale_before),
+            Q(delivery_enqueued_at__isnull=True)
+            | Q(delivery_enqueued_at__lt=stale_before),
+            status=OutreachCampaign.Status.SENDING,
+        ).values_list("id", flat=True)
+    )
+    OutreachCampaign.objects.filter(id__in=campaign_ids).update(
+        delivery_enqueued_at=now
+    )
+    for campaign_id in campaign_ids:
+        deliver_outreach_campaign.enqueue(campaign_id)
+    return len(campaign_ids)
 
 
 # ---------------------------------------------------------------------------
@@ -449,61 +693,163 @@ def claim_reading_reward(user, user_message_id: int) -> dict | None:
 
     Returns reward info dict or None if not applicable.
     """
-    try:
-        recipient = OutreachRecipient.objects.select_related("campaign").get(
-            user_message_id=user_message_id, user=user
-        )
-    except OutreachRecipient.DoesNotExist:
-        return None
-
-    # Already rewarded or expired
-    if recipient.is_rewarded or recipient.reward_expired:
-        return None
-
-    # Check expiry
-    campaign = recipient.campaign
-    expiry_date = campaign.created_at + timedelta(days=campaign.reward_expiry_days)
-    if timezone.now() > expiry_date:
-        recipient.reward_expired = True
-        recipient.save(update_fields=["reward_expired"])
-        return None
-
-    # Zero reward amount means no reward to grant
-    if recipient.reward_amount <= 0:
-        return None
-
-    # Atomically claim the reward by conditionally updating is_rewarded.
-    # Only one concurrent request can succeed because the UPDATE filters on
-    # is_rewarded=False; if another request already flipped it, updated==0.
+    rewards = _claim_rewards(
+        user, OutreachRecipient.objects.filter(user_message_id=user_message_id)
+    )
+    return rewards[0] if rewards else None
+
+
+def claim_reading_rewards(user, message_ids: list[int]) -> list[dict]:
+    """
+    Claim reading rewards for every outreach message in a mark-as-read batch.
+
+    Returns one reward info dict per rewarded message.
+    """
+    if not message_ids:
+        return []
+    return _claim_rewards(
+        user,
+        OutreachRecipient.objects.filter(user_message__message_id__in=message_ids),
+    )
+
+
+def _claim_rewards(user, recipients: QuerySet) -> list[dict]:
+    """
+    Claim the pending rewards among ``recipients`` in one transaction.
+
+    Recipient rows are locked up front; rewards past their campaign's expiry
+    are forfeited, the rest are flagged in one UPDATE, credited with one
+    grant_points per campaign and counted with one grouped campaign UPDATE.
+    """
     now = timezone.now()
     with transaction.atomic():
-        updated = OutreachRecipient.objects.filter(
-            id=recipient.id, is_rewarded=False
+        pending = list(
+            recipients.filter(user=user, is_rewarded=False, reward_expired=False)
+            .select_for_update()
+            .only("id", "campaign_id", "reward_amount")
+            .order_by("id")
+        )
+        if not pending:
+            return []
+        campaigns = OutreachCampaign.objects.in_bulk(
+            {recipient.campaign_id for recipient in pending}
+        )
+
+        expired: dict[int, list[int]] = defaultdict(list)
+        claimed: dict[int, list[OutreachRecipient]] = defaultdict(list)
+        for recipient in pending:
+            if now > campaigns[recipient.campaign_id].reward_expires_at:
+                expired[recipient.campaign_id].append(recipient.id)
+            # Zero reward amount means no reward to grant
+            elif recipient.reward_amount > 0:
+                claimed[recipient.campaign_id].append(recipient)
+        # Expiry is normally settled by the sweep; catch claims that beat it
+        for campaign_id, recipient_ids in expired.items():
+            _forfeit_rewards(campaign_id, recipient_ids=recipient_ids)
+        if not claimed:
+            return []
+
+        OutreachRecipient.objects.filter(
+            id__in=[r.id for rows in claimed.values() for r in rows]
         ).update(is_rewarded=True, rewarded_at=now)
 
-        if not updated:
-            # Another request already claimed the reward
-            return None
-
-        # Grant points inside the transaction so it rolls back on failure
-        grant_points(
-            owner=user,
-            amount=recipient.reward_amount,
-            point_type=campaign.point_type,
-            reason=f"Outreach reading reward: {campaign.title}",
-            reference_id=f"outreach_reward_{campaign.id}",
+        rewards = []
+        amounts = {}
+        for campaign_id, rows in claimed.items():
+            campaign = campaigns[campaign_id]
+            amounts[campaign_id] = sum(r.reward_amount for r in rows)
+            # Grant points inside the transaction so it rolls back on failure
+            grant_points(
+                owner=user,
+                amount=amounts[campaign_id],
+                point_type=campaign.point_type,
+                reason=f"Outreach reading reward: {campaign.title}",
+                reference_type=ReferenceType.OUTREACH_REWARD,
+                reference_pk=campaign.id,
+            )
+            rewards.extend(
+                {"reward_amount": r.reward_amount, "point_type": campaign.point_type}
+                for r in rows
+            )
+
+        counts = _per_campaign({cid: len(rows) for cid, rows in claimed.items()})
+        OutreachCampaign.objects.filter(id__in=claimed).update(
+            read_count=F("read_count") + counts,
+            rewarded_count=F("rewarded_count") + counts,
+            unclaimed_reward=Greatest(
+                F("unclaimed_reward") - _per_campaign(amounts), 0
+            ),
         )
+    return rewards
+
+
+def _per_campaign(values: dict[int, int]) -> Case:
+    """Build a CASE expression mapping campaign id to a per-campaign value."""
+    return Case(
+        *(
+            When(id=campaign_id, then=Value(value))
+            for campaign_id, value in values.items()
+        ),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _forfeit_rewards(campaign_id: int, recipient_ids: list[int] | None = None):
+    """
+    Flag unclaimed rewards of a campaign as expired and move them to its counters.
 
-        # Update campaign counters atomically
-        OutreachCampaign.objects.filter(id=campaign.id).update(
-            read_count=F("read_count") + 1,
-            rewarded_count=F("rewarded_count") + 1,
+    Rows are locked before counting so a concurrent claim either wins the row
+    or sees ``reward_expired`` and backs off. Returns (recipients, points).
+    """
+    with transaction.atomic():
+        pending = OutreachRecipient.objects.filter(
+            campaign_id=campaign_id, is_rewarded=False, reward_expired=False
         )
+        if recipient_ids is not None:
+            pending = pending.filter(id__in=recipient_ids)
+        rows = list(pending.select_for_update().values_list("id", "reward_amount"))
+        for start in range(0, len(rows), REWARD_EXPIRY_BATCH_SIZE):
+            batch = rows[start : start + REWARD_EXPIRY_BATCH_SIZE]
+            OutreachRecipient.objects.filter(
+                id__in=[recipient_id for recipient_id, _ in batch]
+            ).update(reward_expired=True)
+        forfeited = sum(amount for _, amount in rows)
+        if rows:
+            OutreachCampaign.objects.filter(id=campaign_id).update(
+                expired_count=F("expired_count") + len(rows),
+                expired_reward=F("expired_reward") + forfeited,
+                unclaimed_reward=Greatest(F("unclaimed_reward") - forfeited, 0),
+            )
+    return len(rows), forfeited
 
-    return {
-        "reward_amount": recipient.reward_amount,
-        "point_type": campaign.point_type,
-    }
+
+def expire_outreach_rewards() -> dict:
+    """
+    Forfeit unclaimed reading rewards of campaigns past their expiry.
+
+    Each expired campaign is settled once: its remaining recipients are
+    flagged in bulk and ``reward_settled_at`` is set, so later runs skip it.
+    """
+    now = timezone.now()
+    candidates = OutreachCampaign.objects.filter(
+        reward_settled_at__isnull=True
+    ).exclude(status=OutreachCampaign.Status.SENDING)
+    result = {"campaigns": 0, "expired": 0, "forfeited": 0}
+    for campaign in candidates.only("id", "created_at", "reward_expiry_days"):
+        if campaign.reward_expires_at > now:
+            continue
+        with transaction.atomic():
+            settled = OutreachCampaign.objects.filter(
+                id=campaign.id, reward_settled_at__isnull=True
+            ).update(reward_settled_at=now, unclaimed_reward=0)
+            if not settled:
+                continue
+            expired, forfeited = _forfeit_rewards(campaign.id)
+        result["campaigns"] += 1
+        result["expired"] += expired
+        result["forfeited"] += forfeited
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -517,14 +863,9 @@ def list_campaigns(author) -> QuerySet:
 
 
 def get_campaign_detail(campaign_id: int, author) -> dict:
-    """Get campaign with live stats."""
+    """Get campaign with its incrementally maintained stats."""
     campaign = OutreachCampaign.objects.get(id=campaign_id, author=author)
 
-    recipients_qs = campaign.recipient_records.all()
-    delivered_count = recipients_qs.count()
-    rewarded_count = recipients_qs.filter(is_rewarded=True).count()
-    read_count = campaign.read_count
-
     return {
         "id": campaign.id,
         "title": campaign.title,
@@ -544,9 +885,17 @@ def get_campaign_detail(campaign_id: int, author) -> dict:
         "reward_pool": campaign.reward_pool,
         "reward_expiry_days": campaign.reward_expiry_days,
         "total_recipients": campaign.total_recipients,
-        "delivered_count": delivered_count,
-        "read_count": read_count,
-        "rewarded_count": rewarded_count,
+        "delivered_count": campaign.delivered_count,
+        "read_count": campaign.read_count,
+        "rewarded_count": campaign.rewarded_count,
+        "expired_count": campaign.expired_count,
+        "unclaimed_reward": campaign.unclaimed_reward,
+        "expired_reward": campaign.expired_reward,
+        "refunded_amount": campaign.refunded_amount,
+        "reward_expires_at": campaign.reward_expires_at.isoformat(),
+        "reward_settled_at": campaign.reward_settled_at.isoformat()
+        if campaign.reward_settled_at
+        else None,
         "status": campaign.status,
         "created_at": campaign.created_at.isoformat(),
         "completed_at": campaign.completed_at.isoformat()
@@ -0,0 +1,11 @@
+"""Background tasks for talent outreach."""
+
+from django_tasks import task
+
+from . import services
+
+
+@task()
+def deliver_outreach_campaign(campaign_id: int) -> dict:
+    """Deliver (or resume delivering) an outreach campaign."""
+    return services.deliver_outreach(campaign_id)
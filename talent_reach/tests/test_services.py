@@ -5,23 +5,28 @@ from unittest.mock import patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from social_django.models import UserSocialAuth
 
 from messages.models import Message, UserMessage
 from messages.services import send_message
-from points.models import PointType
+from points.models import PointSource, PointType, ReferenceType
 from points.services import grant_points
 from talent_reach.models import OutreachCampaign, OutreachDraft, OutreachRecipient
 from talent_reach.services import (
     _largest_remainder_allocation,
     claim_reading_reward,
+    claim_reading_rewards,
     create_draft,
     delete_draft,
+    deliver_outreach,
+    expire_outreach_rewards,
+    get_campaign_detail,
     get_draft,
     list_drafts,
     preview_recipients,
+    resume_stalled_outreach,
     send_outreach,
     update_draft,
 )
@@ -178,6 +183,72 @@ class TestPreviewRecipients(TestCase):
         self.assertEqual(result["reachable_users"], 0)
         self.assertEqual(result["estimated_cost"], 0)
 
+    @patch("talent_reach.services.AUDIENCE_MATCH_CHUNK_SIZE", 1)
+    @patch("talent_reach.services.query_developers_for_outreach")
+    def test_preview_matches_exact_pairs_per_provider(self, mock_query):
+        """Each provider is matched in bounded chunks of exact (provider, uid)."""
+        gitee_user = User.objects.create_user(username="gitee-dev")
+        UserSocialAuth.objects.create(user=gitee_user, provider="gitee", uid="1001")
+        mock_query.return_value = [
+            {"platform": "GitHub", "actor_id": "1001", "openrank_score": 5.0},
+            {"platform": "Gitee", "actor_id": "1002", "openrank_score": 4.0},
+            {"platform": "GitHub", "actor_id": "1002", "openrank_score": 3.0},
+        ]
+
+        # Two single-uid chunks for github, one for gitee, then one username
+        # lookup per matched user
+        with self.assertNumQueries(5):
+            result = preview_recipients(tag_ids=["repo:a"])
+
+        self.assertEqual(result["reachable_users"], 2)
+        self.assertEqual(
+            {dev["username"] for dev in result["developers"]}, {"dev1", "dev2"}
+        )
+
+    @patch("talent_reach.services.query_developers_for_outreach")
+    @patch("talent_reach.services.query_outreach_developer_keys")
+    def test_count_only_miss_counts_keys(self, mock_keys, mock_query):
+        """A count-only preview without a snapshot fetches only developer keys."""
+        mock_keys.return_value = [
+            ("GitHub", "1001"),
+            ("GitHub", "1002"),
+            ("GitHub", "9999"),
+        ]
+
+        with self.assertNumQueries(1):
+            result = preview_recipients(tag_ids=["repo:a"], count_only=True)
+
+        self.assertEqual(result["reachable_users"], 2)
+        mock_query.assert_not_called()
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            "search_results": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": "talent-reach-audience-tests",
+            },
+        }
+    )
+    @patch("talent_reach.services.query_developers_for_outreach")
+    def test_preview_reuses_audience_snapshot(self, mock_query):
+        """Equivalent criteria hit the snapshot; count_only skips the list."""
+        mock_query.return_value = [
+            {"platform": "GitHub", "actor_id": "1001", "openrank_score": 5.0},
+        ]
+
+        listed = preview_recipients(tag_ids=[" repo:a", "repo:b"], languages=["Go"])
+        counted = preview_recipients(
+            tag_ids=["repo:b", "repo:a"], languages=["Go"], count_only=True
+        )
+
+        mock_query.assert_called_once()
+        self.assertNotIn("developers", counted)
+        self.assertEqual(counted["reachable_users"], 1)
+        self.assertEqual(listed["developers"][0]["username"], "dev1")
+        preview_recipients(tag_ids=["repo:a"], languages=["Go"])
+        self.assertEqual(mock_query.call_count, 2)
+
 
 # ---------------------------------------------------------------------------
 # Send Tests
@@ -440,6 +511,151 @@ class TestLargestRemainderAllocation(TestCase):
         self.assertEqual(sum(result), 10)
 
 
+class TestDeliverOutreach(TestCase):
+    """Tests for resumable, chunked outreach delivery."""
+
+    def setUp(self):
+        """Create a SENDING campaign with a three-recipient plan."""
+        self.author = User.objects.create_user(username="sender", password="pass")
+        self.users = [
+            User.objects.create_user(username=f"dev{i}", password="pass")
+            for i in range(3)
+        ]
+        self.campaign = OutreachCampaign.objects.create(
+            author=self.author,
+            title="Hello",
+            content="Body",
+            point_type=PointType.CASH,
+            cost_per_user=5,
+            total_cost=15,
+            reward_ratio=0.5,
+            reward_pool=6,
+            reward_expiry_days=30,
+            total_recipients=3,
+            delivery_plan=[[user.id, 2, 1.0] for user in self.users],
+        )
+
+    @patch("talent_reach.services.OUTREACH_CHUNK_SIZE", 2)
+    def test_delivers_in_chunks_and_completes(self):
+        """Every plan entry gets a message and a recipient record."""
+        result = deliver_outreach(self.campaign.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.COMPLETED)
+        self.assertEqual(self.campaign.delivered_count, 3)
+        self.assertEqual(self.campaign.unclaimed_reward, 6)
+        self.assertEqual(self.campaign.delivery_plan, [])
+        self.assertEqual(result["delivered"], 3)
+        self.assertEqual(
+            OutreachRecipient.objects.filter(
+                campaign=self.campaign, user_message__isnull=False
+            ).count(),
+            3,
+        )
+
+    def test_skips_users_deleted_since_snapshot(self):
+        """Plan entries for deleted users are skipped, not retried."""
+        self.users[1].delete()
+
+        deliver_outreach(self.campaign.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.COMPLETED)
+        self.assertEqual(self.campaign.delivered_count, 2)
+        self.assertEqual(self.campaign.unclaimed_reward, 4)
+
+    @patch("talent_reach.services.OUTREACH_CHUNK_SIZE", 2)
+    def test_resumes_from_last_committed_chunk(self):
+        """A failed run leaves the cursor on the last commit; the rerun continues."""
+        with (
+            patch(
+                "talent_reach.services.deliver_message",
+                side_effect=[2, RuntimeError("worker died")],
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            deliver_outreach(self.campaign.id)
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.delivery_cursor, 2)
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.SENDING)
+
+        result = deliver_outreach(self.campaign.id)
+
+        self.assertEqual((result["resumed_from"], result["delivered"]), (2, 1))
+        self.assertEqual(
+            UserMessage.objects.filter(message=self.campaign.message).count(), 1
+        )
+        self.assertEqual(
+            OutreachRecipient.objects.filter(campaign=self.campaign).count(), 3
+        )
+
+    def test_gives_up_after_max_attempts(self):
+        """Campaigns that keep failing are marked FAILED."""
+        self.campaign.delivery_attempts = 5
+        self.campaign.save(update_fields=["delivery_attempts"])
+
+        deliver_outreach(self.campaign.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.FAILED)
+
+    @patch("talent_reach.services.OUTREACH_CHUNK_SIZE", 2)
+    def test_failed_campaign_refunds_undelivered_share_once(self):
+        """Giving up refunds the cost of every recipient not delivered to."""
+        with (
+            patch(
+                "talent_reach.services.deliver_message",
+                side_effect=[2, RuntimeError("worker died")],
+            ),
+            self.assertRaises(RuntimeError),
+        ):
+            deliver_outreach(self.campaign.id)
+        OutreachCampaign.objects.filter(pk=self.campaign.pk).update(delivery_attempts=5)
+
+        deliver_outreach(self.campaign.id)
+        OutreachCampaign.objects.filter(pk=self.campaign.pk).update(
+            status=OutreachCampaign.Status.SENDING
+        )
+        deliver_outreach(self.campaign.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.FAILED)
+        self.assertEqual(self.campaign.refunded_amount, 5)
+        refunds = PointSource.objects.filter(
+            reference_type=ReferenceType.OUTREACH, reference_pk=self.campaign.id
+        )
+        self.assertEqual([source.original_amount for source in refunds], [5])
+
+    def test_resume_skips_campaigns_already_queued(self):
+        """A run queued within the stall window is not enqueued again."""
+        OutreachCampaign.objects.filter(pk=self.campaign.pk).update(
+            delivery_heartbeat_at=timezone.now() - timedelta(hours=1),
+            delivery_enqueued_at=timezone.now(),
+        )
+
+        with patch("talent_reach.tasks.deliver_outreach_campaign") as task:
+            self.assertEqual(resume_stalled_outreach(), 0)
+            OutreachCampaign.objects.filter(pk=self.campaign.pk).update(
+                delivery_enqueued_at=timezone.now() - timedelta(hours=1)
+            )
+            self.assertEqual(resume_stalled_outreach(), 1)
+            self.assertEqual(resume_stalled_outreach(), 0)
+
+        task.enqueue.assert_called_once_with(self.campaign.id)
+
+    def test_resume_stalled_outreach_requeues_stale_campaigns(self):
+        """Stale SENDING campaigns are enqueued again and delivered."""
+        OutreachCampaign.objects.filter(pk=self.campaign.pk).update(
+            delivery_heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(resume_stalled_outreach(), 1)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, OutreachCampaign.Status.COMPLETED)
+        self.assertEqual(resume_stalled_outreach(), 0)
+
+
 # ---------------------------------------------------------------------------
 # Reading Reward Tests
 # ---------------------------------------------------------------------------
@@ -471,6 +687,8 @@ class TestClaimReadingReward(TestCase):
             reward_pool=2,
             reward_expiry_days=30,
             total_recipients=1,
+            delivered_count=1,
+            unclaimed_reward=2,
             status=OutreachCampaign.Status.COMPLETED,
         )
 
@@ -570,3 +788,83 @@ class TestClaimReadingReward(TestCase):
         self.campaign.refresh_from_db()
         self.assertEqual(self.campaign.read_count, 1)
         self.assertEqual(self.campaign.rewarded_count, 1)
+        self.assertEqual(self.campaign.unclaimed_reward, 0)
+
+    def test_claim_rewards_in_batch(self):
+        """One call claims every message, granting once per campaign."""
+        other_campaign = OutreachCampaign.objects.get(pk=self.campaign.pk)
+        other_campaign.pk = None
+        other_campaign.save()
+        second = send_message(
+            title="Follow-up",
+            content="Again",
+            message_type=Message.MessageType.OUTREACH,
+            sender=self.author,
+            recipients=[self.recipient_user],
+        )
+        OutreachRecipient.objects.create(
+            campaign=other_campaign,
+            user=self.recipient_user,
+            user_message=UserMessage.objects.get(message=second),
+            reward_amount=3,
+        )
+
+        rewards = claim_reading_rewards(
+            self.recipient_user, [self.message.id, second.id, 999_999]
+        )
+
+        self.assertEqual(sorted(reward["reward_amount"] for reward in rewards), [2, 3])
+        self.assertEqual(
+            PointSource.objects.filter(
+                reference_type=ReferenceType.OUTREACH_REWARD
+            ).count(),
+            2,
+        )
+        self.assertEqual(claim_reading_rewards(self.recipient_user, [second.id]), [])
+        other_campaign.refresh_from_db()
+        self.assertEqual(
+            (other_campaign.read_count, other_campaign.rewarded_count), (1, 1)
+        )
+
+    def test_lazy_expiry_updates_campaign_counters(self):
+        """A late claim forfeits the reward into the expired counters."""
+        OutreachCampaign.objects.filter(id=self.campaign.id).update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        claim_reading_reward(self.recipient_user, self.user_message.id)
+        claim_reading_reward(self.recipient_user, self.user_message.id)
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(
+            (
+                self.campaign.expired_count,
+                self.campaign.expired_reward,
+                self.campaign.unclaimed_reward,
+            ),
+            (1, 2, 0),
+        )
+
+    def test_expire_outreach_rewards_settles_expired_campaigns(self):
+        """The sweep forfeits unclaimed rewards once and blocks later claims."""
+        self.assertEqual(
+            expire_outreach_rewards(), {"campaigns": 0, "expired": 0, "forfeited": 0}
+        )
+        OutreachCampaign.objects.filter(id=self.campaign.id).update(
+            created_at=timezone.now() - timedelta(days=31)
+        )
+
+        result = expire_outreach_rewards()
+
+        self.assertEqual(result, {"campaigns": 1, "expired": 1, "forfeited": 2})
+        self.recipient_record.refresh_from_db()
+        self.assertTrue(self.recipient_record.reward_expired)
+        detail = get_campaign_detail(self.campaign.id, self.author)
+        self.assertEqual(detail["expired_count"], 1)
+        self.assertEqual(detail["expired_reward"], 2)
+        self.assertEqual(detail["unclaimed_reward"], 0)
+        self.assertIsNotNone(detail["reward_settled_at"])
+        self.assertEqual(expire_outreach_rewards()["campaigns"], 0)
+        self.assertIsNone(
+            claim_reading_reward(self.recipient_user, self.user_message.id)
+        )